@@ -0,0 +1,43 @@
+"""
+Endpoints de Análises de Compatibilidade
+"""
+from typing import Dict, Any, AsyncIterator
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+import logging
+
+from schemas.requests.requests import BulkAnalysisRequest
+from services.analysis_service import AnalysisService
+from core.dependencies import get_current_user
+from api.sse import format_sse, SSE_HEADERS
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/analyses", tags=["Analyses"])
+
+
+@router.post("/bulk/stream")
+async def stream_bulk_analysis(
+    request: BulkAnalysisRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Analisar vários currículos contra uma vaga com streaming (SSE) dos resultados"""
+    analysis_service = AnalysisService()
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in analysis_service.stream_bulk_analysis(
+                current_user["user_id"], request
+            ):
+                yield format_sse(event["event"], event["data"])
+
+        except ValueError as e:
+            yield format_sse("error", {"message": str(e)})
+        except Exception as e:
+            logger.error(f"Error in stream_bulk_analysis: {e}")
+            yield format_sse("error", {"message": "Internal server error"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
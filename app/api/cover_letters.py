@@ -0,0 +1,43 @@
+"""
+Endpoints de Cartas de Apresentação
+"""
+from typing import Dict, Any, AsyncIterator
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+import logging
+
+from schemas.requests.requests import CoverLetterCreateRequest
+from services.cover_letter_service import CoverLetterService
+from core.dependencies import get_current_user
+from api.sse import format_sse, SSE_HEADERS
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/cover-letters", tags=["Cover Letters"])
+
+
+@router.post("/stream")
+async def stream_cover_letter(
+    request: CoverLetterCreateRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Gerar carta de apresentação com streaming (SSE) dos parágrafos"""
+    cover_letter_service = CoverLetterService()
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in cover_letter_service.stream_cover_letter(
+                current_user["user_id"], request
+            ):
+                yield format_sse(event["event"], event["data"])
+
+        except ValueError as e:
+            yield format_sse("error", {"message": str(e)})
+        except Exception as e:
+            logger.error(f"Error in stream_cover_letter: {e}")
+            yield format_sse("error", {"message": "Internal server error"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
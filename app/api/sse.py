@@ -0,0 +1,16 @@
+"""
+Utilitários de Server-Sent Events
+"""
+from typing import Any, Dict
+import json
+
+# Cabeçalhos para evitar buffering de proxies
+SSE_HEADERS: Dict[str, str] = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Formatar evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -1,7 +1,7 @@
 """
 Configurações da aplicação SkillSync
 """
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, validator
 from pydantic_settings import BaseSettings
 from decouple import config
@@ -125,12 +125,21 @@ class DatabaseSettings:
     SQL_MAX_OVERFLOW: int = 20
     SQL_POOL_TIMEOUT: int = 30
     SQL_POOL_RECYCLE: int = 3600
+    # Threads que executam as sessões síncronas fora do event loop
+    SQL_THREAD_POOL_SIZE: int = config("SQL_THREAD_POOL_SIZE", default=10, cast=int)
     
     # MongoDB
     MONGO_MIN_POOL_SIZE: int = 5
     MONGO_MAX_POOL_SIZE: int = 50
     MONGO_MAX_IDLE_TIME: int = 30000
     
+    # Compressão dos payloads volumosos no MongoDB ("none", "zlib" ou "zstd");
+    # "zstd" exige zstandard instalado (validado na inicialização)
+    MONGO_PAYLOAD_COMPRESSION: str = config("MONGO_PAYLOAD_COMPRESSION", default="none")
+    MONGO_PAYLOAD_COMPRESSION_LEVEL: int = config("MONGO_PAYLOAD_COMPRESSION_LEVEL", default=3, cast=int)
+    # Payloads menores que isso são gravados sem compressão
+    MONGO_PAYLOAD_COMPRESSION_MIN_BYTES: int = 1024
+    
     # Connection retry
     MAX_RETRIES: int = 3
     RETRY_DELAY: int = 1
@@ -139,6 +148,56 @@ class DatabaseSettings:
 db_settings = DatabaseSettings()
 
 
+class QueueSettings:
+    """Configurações da fila de processamento de análises"""
+
+    # Pool de workers
+    WORKER_COUNT: int = config("ANALYSIS_WORKER_COUNT", default=4, cast=int)
+    MAX_CONCURRENT_PER_USER: int = config("ANALYSIS_MAX_CONCURRENT_PER_USER", default=2, cast=int)
+
+    # Retentativas
+    MAX_ATTEMPTS: int = config("ANALYSIS_MAX_ATTEMPTS", default=3, cast=int)
+    RETRY_BASE_DELAY_SECONDS: float = 5.0
+    RETRY_MAX_DELAY_SECONDS: float = 300.0
+    RETRY_JITTER: float = 0.2
+
+    # Persistência ("mongo" ou "memory")
+    BACKEND: str = config("ANALYSIS_QUEUE_BACKEND", default="mongo")
+    LEASE_SECONDS: int = 600
+    RECOVERY_INTERVAL_SECONDS: int = 30
+    RECOVERY_BATCH_SIZE: int = 500
+
+
+queue_settings = QueueSettings()
+
+
+class CacheSettings:
+    """Configurações do cache compartilhado entre processos"""
+
+    # "none" (desativado), "memory" (um processo, testes) ou "redis" (REDIS_URL)
+    BACKEND: str = config("SHARED_CACHE_BACKEND", default="none")
+    KEY_PREFIX: str = config("SHARED_CACHE_KEY_PREFIX", default="skillsync")
+    # Timeout de conexão/operação: uma falha do Redis vira cache miss, não latência
+    TIMEOUT_SECONDS: float = config("SHARED_CACHE_TIMEOUT_SECONDS", default=0.25, cast=float)
+
+    # TTL por namespace (segundos); namespaces ausentes usam CACHE_EXPIRE_SECONDS
+    NAMESPACE_TTL_SECONDS: Dict[str, int] = {
+        "user": 300,
+        "job_content": 3600,
+        "stage_analysis": 24 * 3600,
+        "dashboard_stats": 600
+    }
+
+    # TTL suave (get_or_load): após ele o valor é servido e recarregado em background;
+    # após o TTL do namespace o chamador aguarda o recálculo
+    NAMESPACE_SOFT_TTL_SECONDS: Dict[str, int] = {
+        "dashboard_stats": 60
+    }
+
+
+cache_settings = CacheSettings()
+
+
 class AISettings:
     """Configurações para serviços de IA"""
     
@@ -147,6 +206,143 @@ class AISettings:
     TEMPERATURE: float = 0.7
     TOP_P: float = 1.0
     
+    # Roteamento de modelos por operação ("default" = OPENAI_MODEL, "fast" = LLM_FAST_MODEL);
+    # respostas JSON inválidas são refeitas com fallback_model (padrão: "default") e com
+    # pelo menos MAX_TOKENS de orçamento (respostas cortadas pelo limite também são inválidas)
+    LLM_FAST_MODEL: str = config("LLM_FAST_MODEL", default="gpt-4o-mini")
+    LLM_MODEL_ROUTES: Dict[str, Dict[str, Any]] = {
+        "resume_analysis": {"model": "default", "temperature": 0.2},
+        "job_analysis": {"model": "fast", "max_tokens": 1000, "temperature": 0.2},
+        "skill_extraction": {"model": "fast", "max_tokens": 800, "temperature": 0.0},
+        "compatibility": {"model": "default", "temperature": 0.3},
+        "cover_letter": {"model": "default", "max_tokens": 1500, "temperature": 0.7},
+        "cover_letter_stream": {"model": "default", "max_tokens": 1500, "temperature": 0.7}
+    }
+    
+    # Preços dos modelos (USD por 1M de tokens) para estimativa de custo por operação
+    LLM_MODEL_PRICES: Dict[str, Dict[str, float]] = {
+        "gpt-4-turbo-preview": {"prompt": 10.0, "completion": 30.0},
+        "gpt-4o": {"prompt": 2.5, "completion": 10.0},
+        "gpt-4o-mini": {"prompt": 0.15, "completion": 0.6}
+    }
+    
+    # Backend de LLM ("openai" ou "fake" para benchmarks/testes de carga locais)
+    LLM_BACKEND: str = config("LLM_BACKEND", default="openai")
+    LLM_FAKE_LATENCY_PROFILE: str = config("LLM_FAKE_LATENCY_PROFILE", default="fast")  # instant, fast, realistic, slow
+    LLM_FAKE_ERROR_RATE: float = config("LLM_FAKE_ERROR_RATE", default=0.0, cast=float)
+    LLM_FAKE_RATE_LIMIT_RATE: float = config("LLM_FAKE_RATE_LIMIT_RATE", default=0.0, cast=float)
+    LLM_FAKE_SEED: int = config("LLM_FAKE_SEED", default=0, cast=int)
+    
+    # Governador de chamadas (limites do provedor e concorrência adaptativa)
+    LLM_REQUESTS_PER_MINUTE: int = config("LLM_REQUESTS_PER_MINUTE", default=500, cast=int)
+    LLM_TOKENS_PER_MINUTE: int = config("LLM_TOKENS_PER_MINUTE", default=300000, cast=int)
+    LLM_MIN_CONCURRENCY: int = 1
+    LLM_MAX_CONCURRENCY: int = config("LLM_MAX_CONCURRENCY", default=32, cast=int)
+    LLM_INITIAL_CONCURRENCY: int = 8
+    LLM_LATENCY_TARGET_SECONDS: float = 30.0
+    LLM_INTERACTIVE_WEIGHT: int = 4  # vagas interativas por vaga de lote
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 1.0
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 30.0
+    
+    # Circuit breaker do provedor (falhas consecutivas abrem o circuito; chamadas falham
+    # imediatamente e as análises voltam para a fila até o fim do intervalo)
+    LLM_CALL_TIMEOUT_SECONDS: float = config("LLM_CALL_TIMEOUT_SECONDS", default=40.0, cast=float)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = config("LLM_CIRCUIT_FAILURE_THRESHOLD", default=5, cast=int)
+    LLM_CIRCUIT_OPEN_SECONDS: float = config("LLM_CIRCUIT_OPEN_SECONDS", default=30.0, cast=float)
+    LLM_CIRCUIT_HALF_OPEN_PROBES: int = 1
+    
+    # Requisições hedged: após o p95 de latência da operação, dispara uma segunda chamada
+    # e usa a primeira que concluir (apenas chamadas interativas com circuito fechado)
+    LLM_HEDGING_ENABLED: bool = config("LLM_HEDGING_ENABLED", default=False, cast=bool)
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 2.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_WINDOW: int = 200
+    
+    # Timeouts por estágio da análise (segundos)
+    STAGE_TIMEOUT_SECONDS: Dict[str, float] = {
+        "resume_analysis": 60.0,
+        "job_analysis": 45.0,
+        "compatibility": 60.0
+    }
+    
+    # Versões dos prompts (fazem parte das chaves de cache por estágio)
+    RESUME_PROMPT_VERSION: str = "1"
+    JOB_PROMPT_VERSION: str = "1"
+    
+    # Cache por estágio (horas)
+    RESUME_ANALYSIS_CACHE_TTL_HOURS: int = 24 * 7
+    JOB_ANALYSIS_CACHE_TTL_HOURS: int = 24 * 3
+    COMPATIBILITY_CACHE_TTL_HOURS: int = config("COMPATIBILITY_CACHE_TTL_HOURS", default=24, cast=int)
+    
+    # TTL por operação (expiração pelo índice TTL do MongoDB)
+    CACHE_TTL_HOURS: Dict[str, int] = {
+        "resume_analysis": RESUME_ANALYSIS_CACHE_TTL_HOURS,
+        "job_analysis": JOB_ANALYSIS_CACHE_TTL_HOURS,
+        "compatibility": COMPATIBILITY_CACHE_TTL_HOURS
+    }
+    
+    # TTL suave da análise de compatibilidade: após ele o resultado ainda é servido,
+    # com um recálculo em background, até a expiração (0 = desativado)
+    COMPATIBILITY_CACHE_SOFT_TTL_HOURS: int = config("COMPATIBILITY_CACHE_SOFT_TTL_HOURS", default=18, cast=int)
+    
+    # Capacidade do cache de análises (remoção das entradas usadas há mais tempo); 0 = sem limite
+    ANALYSIS_CACHE_MAX_ENTRIES: int = config("ANALYSIS_CACHE_MAX_ENTRIES", default=0, cast=int)
+    
+    # Cache local (L1) por worker na frente dos caches do MongoDB; 0 bytes desativa
+    LOCAL_CACHE_MAX_BYTES: int = config("LOCAL_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int)
+    LOCAL_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+    LOCAL_CACHE_TTL_SECONDS: float = config("LOCAL_CACHE_TTL_SECONDS", default=300.0, cast=float)
+    LOCAL_CACHE_NEGATIVE_TTL_SECONDS: float = config("LOCAL_CACHE_NEGATIVE_TTL_SECONDS", default=2.0, cast=float)
+    
+    # Contadores de hits do cache (acumulados em memória e gravados em lote)
+    CACHE_HIT_FLUSH_INTERVAL_SECONDS: float = config("CACHE_HIT_FLUSH_INTERVAL_SECONDS", default=30.0, cast=float)
+    CACHE_HIT_MAX_PENDING_KEYS: int = 50000
+    
+    # Pré-aquecimento da análise de vagas (com análise enfileirada e mais analisadas)
+    JOB_WARMING_ENABLED: bool = config("JOB_WARMING_ENABLED", default=True, cast=bool)
+    JOB_WARMING_INTERVAL_SECONDS: float = config("JOB_WARMING_INTERVAL_SECONDS", default=900.0, cast=float)
+    JOB_WARMING_TOP_N: int = config("JOB_WARMING_TOP_N", default=50, cast=int)
+    JOB_WARMING_LOOKBACK_HOURS: int = 24
+    # Vagas aquecidas em paralelo (orçamento de chamadas ao LLM do aquecimento)
+    JOB_WARMING_CONCURRENCY: int = config("JOB_WARMING_CONCURRENCY", default=2, cast=int)
+    
+    # Currículos quase duplicados (SimHash de 64 bits; distância de Hamming máxima)
+    RESUME_NEAR_DUPLICATE_ENABLED: bool = config("RESUME_NEAR_DUPLICATE_ENABLED", default=True, cast=bool)
+    RESUME_NEAR_DUPLICATE_MAX_DISTANCE: int = config("RESUME_NEAR_DUPLICATE_MAX_DISTANCE", default=6, cast=int)
+    RESUME_NEAR_DUPLICATE_MIN_TOKENS: int = 50
+    
+    # Coalescência entre workers (lease no MongoDB)
+    ANALYSIS_LEASE_ENABLED: bool = config("ANALYSIS_LEASE_ENABLED", default=False, cast=bool)
+    ANALYSIS_LEASE_TTL_SECONDS: int = 180
+    ANALYSIS_LEASE_POLL_SECONDS: float = 1.0
+    
+    # Extração local de habilidades (catálogo + Aho-Corasick)
+    SKILL_CATALOG_REFRESH_SECONDS: int = config("SKILL_CATALOG_REFRESH_SECONDS", default=300, cast=int)
+    SKILL_EXTRACTOR_MIN_CONFIDENCE: float = 0.5
+    SKILL_EXTRACTOR_MAX_UNKNOWN_SPANS: int = 30
+    SKILL_EXTRACTOR_DEFAULT_PROFICIENCY: int = 50
+    SKILL_EXTRACTION_LLM_FALLBACK: bool = config("SKILL_EXTRACTION_LLM_FALLBACK", default=True, cast=bool)
+    
+    # Pré-score local de compatibilidade
+    PRE_SCORE_WEIGHTS: Dict[str, float] = {
+        "skills": 0.55,
+        "experience": 0.25,
+        "education": 0.20
+    }
+    # Análises em lote abaixo deste pré-score não passam pelo LLM
+    BULK_PRE_SCORE_THRESHOLD: float = config("BULK_PRE_SCORE_THRESHOLD", default=30.0, cast=float)
+    
+    # Análise em lote (uma vaga, vários currículos)
+    BULK_ANALYSIS_MAX_RESUMES: int = config("BULK_ANALYSIS_MAX_RESUMES", default=200, cast=int)
+    BULK_ANALYSIS_CONCURRENCY: int = config("BULK_ANALYSIS_CONCURRENCY", default=8, cast=int)
+    
+    # Orçamento de tokens dos prompts (documentos longos são cortados por seções)
+    PROMPT_TOKEN_BUDGET: int = config("PROMPT_TOKEN_BUDGET", default=12000, cast=int)
+    RESUME_PROMPT_MAX_TOKENS: int = 6000
+    JOB_PROMPT_MAX_TOKENS: int = 3000
+    
     # Análise de currículo
     RESUME_ANALYSIS_PROMPT: str = """
     Analise o seguinte currículo e extraia as seguintes informações:
@@ -182,6 +378,24 @@ class AISettings:
     Tom: {tone}
     Tamanho: {length}
     """
+    
+    # Formato da cover letter em streaming (texto simples, um parágrafo por bloco)
+    COVER_LETTER_STREAM_FORMAT: str = """
+    Escreva a carta em texto simples (sem JSON e sem markdown), com os blocos
+    separados por uma linha em branco, exatamente nesta ordem:
+    Assunto: <assunto da carta>
+    <saudação>
+    <parágrafo de introdução>
+    <um ou mais parágrafos do corpo>
+    <parágrafo de conclusão>
+    <assinatura>
+    """
+    
+    # Cover letter sem vaga informada (carta genérica a partir do currículo)
+    COVER_LETTER_GENERIC_INSTRUCTIONS: str = """
+    Nenhuma vaga específica foi informada: escreva uma carta genérica para a área do
+    candidato, destacando as qualificações do currículo, sem citar empresa ou posição.
+    """
 
 
 ai_settings = AISettings()
@@ -0,0 +1,96 @@
+"""
+Ciclo de vida dos serviços de background
+Inicialização e encerramento chamados pelo lifespan da aplicação
+"""
+import logging
+
+from core.config import queue_settings, ai_settings
+from core.shared_cache import get_shared_cache, set_shared_cache
+from data.mongo_repository import (
+    AnalysisJobMongoRepository, AnalysisLeaseMongoRepository, AIAnalysisCacheRepository,
+    StageAnalysisCacheRepository, ResumeFingerprintRepository
+)
+from data.sql_executor import shutdown_sql_executor
+from services.analysis_queue import (
+    AnalysisQueue, InMemoryJobStore, get_analysis_queue, set_analysis_queue
+)
+from services.analysis_service import AnalysisService
+from services.cache_maintenance import CacheMaintenance, get_cache_maintenance, set_cache_maintenance
+from services.job_warmer import JobAnalysisWarmer, get_job_warmer, set_job_warmer
+
+logger = logging.getLogger(__name__)
+
+
+async def startup_services() -> None:
+    """Iniciar serviços de background"""
+    # Leases: coalescência de análises e aquecimento periódico das vagas
+    if ai_settings.ANALYSIS_LEASE_ENABLED or ai_settings.JOB_WARMING_ENABLED:
+        lease_repo = AnalysisLeaseMongoRepository()
+        await lease_repo.connect()
+        await lease_repo.ensure_indexes()
+        await lease_repo.disconnect()
+
+    if queue_settings.BACKEND == "memory":
+        store = InMemoryJobStore()
+    else:
+        store = AnalysisJobMongoRepository()
+        await store.connect()
+
+    analysis_service = AnalysisService()
+    queue = AnalysisQueue(
+        store=store,
+        handler=analysis_service.process_queued_analysis,
+        on_failure=analysis_service.handle_queued_analysis_failure
+    )
+    await queue.start()
+    set_analysis_queue(queue)
+
+    # Índices TTL dos caches (expiração feita pelo MongoDB)
+    for repo in (StageAnalysisCacheRepository(), ResumeFingerprintRepository()):
+        await repo.connect()
+        await repo.ensure_indexes()
+        await repo.disconnect()
+
+    cache_repo = AIAnalysisCacheRepository()
+    await cache_repo.connect()
+    await cache_repo.ensure_indexes()
+    maintenance = CacheMaintenance(cache_repo)
+    await maintenance.start()
+    set_cache_maintenance(maintenance)
+
+    # Aquecimento das vagas mais analisadas (após os índices dos caches)
+    if ai_settings.JOB_WARMING_ENABLED:
+        warmer = JobAnalysisWarmer(analysis_service)
+        await warmer.start()
+        set_job_warmer(warmer)
+
+
+async def shutdown_services() -> None:
+    """Encerrar serviços de background"""
+    warmer = get_job_warmer()
+    if warmer:
+        await warmer.stop()
+        set_job_warmer(None)
+
+    queue = get_analysis_queue()
+    if queue:
+        await queue.stop()
+        set_analysis_queue(None)
+
+        if isinstance(queue.store, AnalysisJobMongoRepository):
+            await queue.store.disconnect()
+
+    # Hits pendentes são gravados antes de desconectar
+    maintenance = get_cache_maintenance()
+    if maintenance:
+        await maintenance.stop()
+        set_cache_maintenance(None)
+        await maintenance.cache_repo.disconnect()
+
+    shared_cache = get_shared_cache()
+    if shared_cache:
+        await shared_cache.close()
+        set_shared_cache(None)
+
+    # Operações SQL em andamento terminam antes de encerrar o pool
+    shutdown_sql_executor()
@@ -0,0 +1,140 @@
+"""
+Cache local (L1)
+LRU em processo limitado por bytes, com TTL e cache negativo, na frente
+dos caches do MongoDB (L2)
+"""
+from typing import Optional, Dict, Any, Tuple
+from collections import OrderedDict
+import json
+import time
+
+from core.config import ai_settings
+from core.metrics import metrics
+
+requests_counter = metrics.counter("local_cache_requests_total", "Consultas ao cache local por resultado")
+evictions_counter = metrics.counter("local_cache_evictions_total", "Entradas removidas por limite de bytes")
+bytes_gauge = metrics.gauge("local_cache_bytes", "Bytes estimados ocupados pelo cache local")
+entries_gauge = metrics.gauge("local_cache_entries", "Entradas no cache local")
+
+# Tamanho estimado de uma entrada negativa (chave + metadados)
+_NEGATIVE_ENTRY_BYTES = 64
+
+
+def estimate_size(value: Any) -> int:
+    """Tamanho aproximado do valor em bytes (JSON compacto)"""
+    return len(json.dumps(value, default=str, separators=(",", ":")).encode())
+
+
+class LocalCache:
+    """LRU limitado por bytes; valores são compartilhados e não devem ser alterados"""
+
+    def __init__(self, name: str,
+                 max_bytes: int = ai_settings.LOCAL_CACHE_MAX_BYTES,
+                 ttl_seconds: float = ai_settings.LOCAL_CACHE_TTL_SECONDS,
+                 negative_ttl_seconds: float = ai_settings.LOCAL_CACHE_NEGATIVE_TTL_SECONDS,
+                 max_entry_bytes: int = ai_settings.LOCAL_CACHE_MAX_ENTRY_BYTES):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.current_bytes = 0
+        # chave -> (valor, tamanho, expira em); valor None = ausência conhecida (cache negativo)
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(encontrado, valor); encontrado com valor None indica ausência conhecida no L2"""
+        entry = self._entries.get(key)
+        if entry is None:
+            requests_counter.inc(cache=self.name, result="miss")
+            return False, None
+
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            requests_counter.inc(cache=self.name, result="miss")
+            return False, None
+
+        self._entries.move_to_end(key)
+        requests_counter.inc(cache=self.name, result="negative_hit" if value is None else "hit")
+        return True, value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Armazenar valor (TTL limitado ao TTL local)"""
+        if not self.enabled or value is None:
+            return
+
+        ttl = min(self.ttl_seconds, ttl_seconds) if ttl_seconds is not None else self.ttl_seconds
+        size = estimate_size(value)
+        if ttl <= 0 or size > self.max_entry_bytes:
+            self.invalidate(key)
+            return
+
+        self._store(key, value, size, ttl)
+
+    def set_negative(self, key: str) -> None:
+        """Registrar ausência no L2 por um intervalo curto"""
+        if self.enabled and self.negative_ttl_seconds > 0:
+            self._store(key, None, len(key) + _NEGATIVE_ENTRY_BYTES, self.negative_ttl_seconds)
+
+    def invalidate(self, key: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+            self._publish_metrics()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+        self._publish_metrics()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Estado atual do cache"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def _store(self, key: str, value: Any, size: int, ttl: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self.current_bytes += size
+
+        # Remover as entradas menos usadas até caber no limite
+        while self.current_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            evictions_counter.inc(cache=self.name)
+
+        self._publish_metrics()
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _publish_metrics(self) -> None:
+        bytes_gauge.set(self.current_bytes, cache=self.name)
+        entries_gauge.set(len(self._entries), cache=self.name)
+
+
+# Caches locais do processo, por nome
+_local_caches: Dict[str, LocalCache] = {}
+
+
+def get_local_cache(name: str) -> LocalCache:
+    """Obter (ou criar) cache local do processo"""
+    cache = _local_caches.get(name)
+    if cache is None:
+        cache = _local_caches[name] = LocalCache(name)
+    return cache
+
+
+def get_local_cache_metrics() -> Dict[str, Dict[str, Any]]:
+    """Estado de todos os caches locais"""
+    return {name: cache.get_metrics() for name, cache in _local_caches.items()}
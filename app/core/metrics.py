@@ -0,0 +1,162 @@
+"""
+Métricas da aplicação
+Registro em processo de contadores, gauges e histogramas expostos em /metrics
+"""
+from typing import Optional, List, Dict, Any, Tuple
+import bisect
+import threading
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    """Chave ordenada para um conjunto de labels"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _label_name(key: LabelKey) -> str:
+    """Representação textual dos labels (ex: operation=resume,model=gpt)"""
+    return ",".join(f"{name}={value}" for name, value in key) or "_total"
+
+
+class Counter:
+    """Contador monotônico com labels"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {_label_name(key): value for key, value in self._values.items()}
+
+
+class Gauge:
+    """Valor instantâneo com labels"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {_label_name(key): value for key, value in self._values.items()}
+
+
+class Histogram:
+    """Histograma com buckets fixos e labels"""
+
+    def __init__(self, name: str, description: str = "", buckets: Optional[List[float]] = None):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS)
+        self._series: Dict[LabelKey, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"count": 0, "sum": 0.0, "bucket_counts": [0] * (len(self.buckets) + 1)}
+                self._series[key] = series
+
+            series["count"] += 1
+            series["sum"] += value
+            series["bucket_counts"][bisect.bisect_left(self.buckets, value)] += 1
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Estimativa do quantil pelo limite superior do bucket"""
+        series = self._series.get(_label_key(labels))
+        if not series or not series["count"]:
+            return None
+
+        target = q * series["count"]
+        cumulative = 0
+        for index, count in enumerate(series["bucket_counts"]):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for key, series in self._series.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.buckets + ["+Inf"], series["bucket_counts"]):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+
+                result[_label_name(key)] = {
+                    "count": series["count"],
+                    "sum": round(series["sum"], 6),
+                    "buckets": buckets
+                }
+            return result
+
+
+class MetricsRegistry:
+    """Registro de métricas do processo"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, description))
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(name, lambda: Gauge(name, description))
+
+    def histogram(self, name: str, description: str = "",
+                  buckets: Optional[List[float]] = None) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, description, buckets))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Valores atuais de todas as métricas"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = factory()
+                self._metrics[name] = metric
+            return metric
+
+
+# Instância global das métricas
+metrics = MetricsRegistry()
@@ -0,0 +1,398 @@
+"""
+Cache compartilhado (entre processos)
+Backends Redis e em memória com TTL por namespace, multi-get em pipeline e
+valores em msgpack, atrás do cache local (L1) de cada processo
+"""
+from typing import Optional, Dict, Any, List, Iterable, Tuple, Callable, Awaitable
+from abc import ABC, abstractmethod
+from datetime import datetime, date
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+import asyncio
+import json
+import logging
+import time
+
+from core.config import settings, cache_settings
+from core.local_cache import get_local_cache
+from core.metrics import metrics
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependência opcional
+    msgpack = None
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - dependência opcional
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+requests_counter = metrics.counter("shared_cache_requests_total", "Consultas ao cache compartilhado por resultado")
+errors_counter = metrics.counter("shared_cache_errors_total", "Falhas do backend do cache compartilhado")
+stale_counter = metrics.counter("shared_cache_stale_served_total", "Valores servidos após o TTL suave")
+refresh_counter = metrics.counter("shared_cache_refreshes_total", "Recargas em background por resultado")
+
+# Prefixo de formato de cada valor gravado
+_FORMAT_MSGPACK = b"m"
+_FORMAT_JSON = b"j"
+
+
+def _encode_default(obj: Any) -> Any:
+    """Tipos sem representação nativa em msgpack/JSON"""
+    if isinstance(obj, datetime):
+        return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__date__": obj.isoformat()}
+    if isinstance(obj, UUID):
+        return {"__uuid__": str(obj)}
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Cannot encode {type(obj).__name__} for the shared cache")
+
+
+def _decode_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+        if "__uuid__" in obj:
+            return UUID(obj["__uuid__"])
+    return obj
+
+
+def encode_value(value: Any) -> bytes:
+    """Serializar valor (msgpack quando instalado; senão JSON)"""
+    if msgpack is not None:
+        return _FORMAT_MSGPACK + msgpack.packb(value, default=_encode_default, use_bin_type=True)
+    return _FORMAT_JSON + json.dumps(value, default=_encode_default, separators=(",", ":")).encode()
+
+
+def decode_value(data: bytes) -> Any:
+    fmt, payload = data[:1], data[1:]
+    if fmt == _FORMAT_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("msgpack is required to read msgpack-encoded cache values")
+        return msgpack.unpackb(payload, object_hook=_decode_hook, raw=False, strict_map_key=False)
+    if fmt == _FORMAT_JSON:
+        return json.loads(payload, object_hook=_decode_hook)
+    raise ValueError("Unknown shared cache value format")
+
+
+def namespace_ttl(namespace: str) -> float:
+    """TTL padrão do namespace (segundos)"""
+    return cache_settings.NAMESPACE_TTL_SECONDS.get(namespace, settings.CACHE_EXPIRE_SECONDS)
+
+
+def namespace_soft_ttl(namespace: str) -> float:
+    """TTL suave do namespace (igual ao TTL quando não configurado)"""
+    return min(
+        cache_settings.NAMESPACE_SOFT_TTL_SECONDS.get(namespace, namespace_ttl(namespace)),
+        namespace_ttl(namespace)
+    )
+
+
+class SharedCache(ABC):
+    """Interface do cache compartilhado; falhas do backend são tratadas como miss"""
+
+    @abstractmethod
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        """Valores encontrados para as chaves (chaves ausentes ou expiradas omitidas)"""
+
+    @abstractmethod
+    async def set_many(self, namespace: str, values: Dict[str, Any],
+                       ttl_seconds: Optional[float] = None) -> None:
+        """Gravar valores com o TTL informado (limitado ao TTL do namespace)"""
+
+    @abstractmethod
+    async def invalidate(self, namespace: str, *keys: str) -> None:
+        """Remover chaves do namespace"""
+
+    @abstractmethod
+    async def invalidate_namespace(self, namespace: str) -> None:
+        """Remover todas as chaves do namespace"""
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        return (await self.get_many(namespace, [key])).get(key)
+
+    async def set(self, namespace: str, key: str, value: Any,
+                  ttl_seconds: Optional[float] = None) -> None:
+        await self.set_many(namespace, {key: value}, ttl_seconds)
+
+    def _ttl(self, namespace: str, ttl_seconds: Optional[float]) -> float:
+        # TTL informado nunca excede o TTL do namespace
+        default = namespace_ttl(namespace)
+        return min(default, ttl_seconds) if ttl_seconds is not None else default
+
+    def _record(self, namespace: str, keys: List[str], found: Dict[str, Any]) -> None:
+        hits = len(found)
+        if hits:
+            requests_counter.inc(hits, namespace=namespace, result="hit")
+        if len(keys) - hits:
+            requests_counter.inc(len(keys) - hits, namespace=namespace, result="miss")
+
+
+class InMemorySharedCache(SharedCache):
+    """Backend em memória (um processo): testes e desenvolvimento sem Redis"""
+
+    def __init__(self):
+        # (namespace, chave) -> (valor serializado, expira em)
+        self._entries: Dict[Tuple[str, str], Tuple[bytes, float]] = {}
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        found = {}
+        for key in keys:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                continue
+            if entry[1] <= now:
+                del self._entries[(namespace, key)]
+                continue
+            found[key] = decode_value(entry[0])
+
+        self._record(namespace, keys, found)
+        return found
+
+    async def set_many(self, namespace: str, values: Dict[str, Any],
+                       ttl_seconds: Optional[float] = None) -> None:
+        ttl = self._ttl(namespace, ttl_seconds)
+        if ttl <= 0:
+            return
+
+        expires_at = time.monotonic() + ttl
+        for key, value in values.items():
+            self._entries[(namespace, key)] = (encode_value(value), expires_at)
+
+    async def invalidate(self, namespace: str, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop((namespace, key), None)
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == namespace]:
+            del self._entries[entry_key]
+
+
+class RedisSharedCache(SharedCache):
+    """Backend Redis (settings.REDIS_URL)"""
+
+    def __init__(self, url: str = settings.REDIS_URL,
+                 key_prefix: str = cache_settings.KEY_PREFIX,
+                 timeout_seconds: float = cache_settings.TIMEOUT_SECONDS):
+        if redis_asyncio is None:
+            raise RuntimeError("redis is required for the Redis shared cache backend")
+
+        self.key_prefix = key_prefix
+        self.client = redis_asyncio.from_url(
+            url,
+            socket_timeout=timeout_seconds,
+            socket_connect_timeout=timeout_seconds
+        )
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.key_prefix}:{namespace}:{key}"
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+
+        try:
+            # Pipeline (e não MGET) para funcionar também com chaves em slots diferentes
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(self._key(namespace, key))
+                values = await pipe.execute()
+        except Exception as e:
+            errors_counter.inc(operation="get")
+            logger.warning(f"Shared cache get failed for {namespace}: {e}")
+            return {}
+
+        found = {}
+        for key, data in zip(keys, values):
+            if data is None:
+                continue
+            try:
+                found[key] = decode_value(data)
+            except Exception as e:
+                errors_counter.inc(operation="decode")
+                logger.warning(f"Discarding undecodable shared cache value {namespace}:{key}: {e}")
+
+        self._record(namespace, keys, found)
+        return found
+
+    async def set_many(self, namespace: str, values: Dict[str, Any],
+                       ttl_seconds: Optional[float] = None) -> None:
+        ttl_ms = int(self._ttl(namespace, ttl_seconds) * 1000)
+        if ttl_ms <= 0 or not values:
+            return
+
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(self._key(namespace, key), encode_value(value), px=ttl_ms)
+                await pipe.execute()
+        except Exception as e:
+            errors_counter.inc(operation="set")
+            logger.warning(f"Shared cache set failed for {namespace}: {e}")
+
+    async def invalidate(self, namespace: str, *keys: str) -> None:
+        if not keys:
+            return
+
+        try:
+            await self.client.unlink(*(self._key(namespace, key) for key in keys))
+        except Exception as e:
+            errors_counter.inc(operation="invalidate")
+            logger.warning(f"Shared cache invalidation failed for {namespace}: {e}")
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        """Remover todas as chaves do namespace (SCAN incremental, sem bloquear o Redis)"""
+        try:
+            batch = []
+            async for redis_key in self.client.scan_iter(match=self._key(namespace, "*"), count=500):
+                batch.append(redis_key)
+                if len(batch) >= 500:
+                    await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                await self.client.unlink(*batch)
+        except Exception as e:
+            errors_counter.inc(operation="invalidate")
+            logger.warning(f"Shared cache namespace invalidation failed for {namespace}: {e}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class TieredCache:
+    """Cache de um namespace: L1 local na frente do cache compartilhado"""
+
+    def __init__(self, namespace: str, shared: Optional[SharedCache] = None):
+        self.namespace = namespace
+        self._shared = shared
+        self.local_cache = get_local_cache(f"shared:{namespace}")
+        # Recargas em background em andamento no processo, por chave
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    @property
+    def shared(self) -> Optional[SharedCache]:
+        return self._shared or get_shared_cache()
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Valores encontrados (L1, depois uma ida ao compartilhado para o restante)"""
+        found = {}
+        missing = []
+        for key in keys:
+            hit, value = self.local_cache.get(key)
+            if hit and value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+
+        shared = self.shared
+        if missing and shared is not None:
+            remote = await shared.get_many(self.namespace, missing)
+            for key, value in remote.items():
+                self.local_cache.set(key, value, namespace_ttl(self.namespace))
+            found.update(remote)
+
+        return found
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = namespace_ttl(self.namespace)
+        if ttl_seconds is not None:
+            ttl = min(ttl, ttl_seconds)
+        self.local_cache.set(key, value, ttl)
+
+        shared = self.shared
+        if shared is not None:
+            await shared.set(self.namespace, key, value, ttl)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Stale-while-revalidate: após o TTL suave serve o valor e recarrega uma vez em
+        background; só após o TTL do namespace (expiração) o chamador aguarda o loader.
+        As chaves usadas aqui guardam um envelope e não devem ser lidas com get"""
+        entry = await self.get(key)
+        if entry is not None:
+            if time.time() >= entry["staleAt"]:
+                stale_counter.inc(namespace=self.namespace)
+                self._schedule_refresh(key, loader)
+            return entry["value"]
+
+        return await self._load(key, loader)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        # Relógio de parede: o envelope é compartilhado entre processos
+        await self.set(key, {"value": value, "staleAt": time.time() + namespace_soft_ttl(self.namespace)})
+        return value
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key not in self._refreshing:
+            self._refreshing[key] = asyncio.create_task(self._refresh(key, loader))
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await self._load(key, loader)
+            refresh_counter.inc(namespace=self.namespace, result="success")
+        except Exception as e:
+            # O valor antigo continua sendo servido até expirar
+            refresh_counter.inc(namespace=self.namespace, result="error")
+            logger.warning(f"Background refresh failed for {self.namespace}:{key}: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def invalidate(self, *keys: str) -> None:
+        """Invalidar chaves no L1 deste processo e no compartilhado (o L1 dos demais expira pelo TTL)"""
+        for key in keys:
+            self.local_cache.invalidate(key)
+
+        shared = self.shared
+        if shared is not None:
+            await shared.invalidate(self.namespace, *keys)
+
+    async def invalidate_all(self) -> None:
+        self.local_cache.clear()
+
+        shared = self.shared
+        if shared is not None:
+            await shared.invalidate_namespace(self.namespace)
+
+
+# Instância global (criada sob demanda conforme cache_settings.BACKEND)
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_configured = False
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Obter cache compartilhado do processo (None se desativado)"""
+    global _shared_cache, _shared_cache_configured
+    if not _shared_cache_configured:
+        _shared_cache_configured = True
+        backend = cache_settings.BACKEND.lower()
+        if backend == "redis":
+            try:
+                _shared_cache = RedisSharedCache()
+            except RuntimeError as e:
+                logger.warning(f"Shared cache disabled: {e}")
+        elif backend == "memory":
+            _shared_cache = InMemorySharedCache()
+    return _shared_cache
+
+
+def set_shared_cache(cache: Optional[SharedCache]) -> None:
+    """Registrar cache compartilhado do processo (testes ou configuração explícita)"""
+    global _shared_cache, _shared_cache_configured
+    _shared_cache = cache
+    _shared_cache_configured = True
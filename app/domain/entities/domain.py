@@ -326,6 +326,9 @@ class DetailedAnalysis:
     version: str
     created_at: datetime
     updated_at: datetime
+    stage_timings: Dict[str, int] = field(default_factory=dict)  # ms por estágio
+    stage_models: Dict[str, Optional[str]] = field(default_factory=dict)  # modelo por estágio
+    llm_usage: Dict[str, Any] = field(default_factory=dict)  # tokens, latência, custo e cache
 
 
 @dataclass
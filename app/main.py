@@ -11,8 +11,15 @@ import time
 from datetime import datetime
 
 from core.config import settings
-from api import auth
-# from data.mongo_repository import MongoRepository
+from core.lifecycle import startup_services, shutdown_services
+from core.metrics import metrics
+from core.local_cache import get_local_cache_metrics
+from data.connections import init_connections, close_connections
+from services.analysis_queue import get_analysis_queue
+from services.llm_governor import get_llm_governor
+from services.llm_backends import get_llm_backend
+from services.llm_resilience import get_circuit_breaker
+from api import auth, cover_letters, analyses
 from schemas.responses.responses import ErrorResponse, HealthCheckResponse
 
 # Configurar logging
@@ -22,9 +29,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Instância global do MongoDB (comentado por enquanto)
-# mongo_repo = MongoRepository()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,11 +37,12 @@ async def lifespan(app: FastAPI):
     logger.info("Starting SkillSync API...")
     
     try:
-        # Conectar ao MongoDB (comentado por enquanto)
-        # await mongo_repo.connect()
-        # logger.info("Connected to MongoDB")
+        # Engine SQL e cliente MongoDB compartilhados pelos repositórios
+        await init_connections()
+        
+        # Serviços de background (fila de análises)
+        await startup_services()
         
-        # Outras inicializações aqui
         logger.info("SkillSync API started successfully")
         
     except Exception as e:
@@ -50,9 +55,10 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down SkillSync API...")
     
     try:
-        # Desconectar do MongoDB (comentado por enquanto)
-        # await mongo_repo.disconnect()
-        # logger.info("Disconnected from MongoDB")
+        await shutdown_services()
+        
+        # Fechar pools após os serviços de background
+        await close_connections()
         
         logger.info("SkillSync API shut down successfully")
         
@@ -159,6 +165,8 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 # Incluir routers
 app.include_router(auth.router, prefix=settings.API_V1_STR)
+app.include_router(cover_letters.router, prefix=settings.API_V1_STR)
+app.include_router(analyses.router, prefix=settings.API_V1_STR)
 
 
 # Endpoints básicos
@@ -239,7 +247,13 @@ async def get_metrics():
         "active_users": 0,
         "database_connections": 0,
         "memory_usage_mb": 0.0,
-        "cpu_usage_percentage": 0.0
+        "cpu_usage_percentage": 0.0,
+        "analysis_queue": get_analysis_queue().get_metrics() if get_analysis_queue() else None,
+        "llm_governor": get_llm_governor().get_metrics(),
+        "llm_backend": get_llm_backend().get_metrics(),
+        "llm_circuit": get_circuit_breaker().get_metrics(),
+        "local_caches": get_local_cache_metrics(),
+        "metrics": metrics.snapshot()
     }
 
 
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field, validator
+from core.config import ai_settings
 from domain.entities.domain import (
     SubscriptionType, ResumeStatus, JobType, 
     ExperienceLevel, NotificationType
@@ -154,7 +155,7 @@ class AnalysisCreateRequest(BaseModel):
 
 class BulkAnalysisRequest(BaseModel):
     """DTO para análise em lote"""
-    resume_ids: List[UUID] = Field(..., min_items=1, max_items=10)
+    resume_ids: List[UUID] = Field(..., min_items=1, max_items=ai_settings.BULK_ANALYSIS_MAX_RESUMES)
     job_id: UUID
 
 
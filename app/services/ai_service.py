@@ -2,127 +2,147 @@
 Serviço de IA
 Integração com OpenAI e outros serviços de IA
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from uuid import UUID
 import json
-import openai
 import logging
+import asyncio
+import random
+import time
 from datetime import datetime
 
-from core.config import settings, ai_settings
+from core.config import ai_settings
+from core.metrics import metrics
+from data.sql_repository import SkillRepository
+from services.llm_backends import get_llm_backend, LLMResponse
+from services.llm_governor import (
+    get_llm_governor, current_priority, LLMRateLimitedError, PRIORITY_INTERACTIVE
+)
+from services.llm_usage import record_call, record_retry, record_parse_failure
+from services.llm_resilience import (
+    get_circuit_breaker, get_latency_tracker, CircuitOpenError, CIRCUIT_CLOSED
+)
+from services.model_router import get_model_route, ModelRoute
+from services.prompt_builder import PromptBuilder, BuiltPrompt
+from services.skill_extractor import get_skill_extractor
 
 logger = logging.getLogger(__name__)
 
+model_fallback_counter = metrics.counter(
+    "llm_model_fallback_total", "Respostas JSON inválidas refeitas com o modelo de fallback"
+)
+hedged_requests_counter = metrics.counter("llm_hedged_requests_total", "Chamadas com hedge disparado")
+hedge_wins_counter = metrics.counter("llm_hedge_wins_total", "Hedges que concluíram antes da chamada original")
+
 
 class AIService:
     """Serviço de integração com IA"""
     
     def __init__(self):
-        openai.api_key = settings.OPENAI_API_KEY
-        self.model = settings.OPENAI_MODEL
-        self.max_tokens = ai_settings.MAX_TOKENS
-        self.temperature = ai_settings.TEMPERATURE
+        self.backend = get_llm_backend()
     
-    async def analyze_resume(self, resume_content: str) -> Dict[str, Any]:
-        """Analisar currículo usando IA"""
+    async def analyze_resume(self, resume_content: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Analisar currículo usando IA (análise e modelo que a atendeu; None no resultado padrão)"""
         try:
-            prompt = f"""
-            {ai_settings.RESUME_ANALYSIS_PROMPT}
-            
-            Currículo:
-            {resume_content}
-            
+            prompt = (
+                PromptBuilder("resume_analysis")
+                .add_text(ai_settings.RESUME_ANALYSIS_PROMPT)
+                .add_document("Currículo", resume_content, max_tokens=ai_settings.RESUME_PROMPT_MAX_TOKENS)
+                .add_text("""
             Retorne APENAS um JSON válido com a seguinte estrutura:
-            {{
+            {
                 "extractedSkills": [
-                    {{
+                    {
                         "name": "Python",
                         "confidence": 0.95,
                         "matched": true,
                         "category": "Programming Languages"
-                    }}
+                    }
                 ],
                 "experience": [
-                    {{
+                    {
                         "company": "Empresa XYZ",
                         "position": "Desenvolvedor Senior",
                         "duration": "2 anos",
                         "description": "Descrição das atividades",
                         "relevanceScore": 0.85
-                    }}
+                    }
                 ],
                 "education": [
-                    {{
+                    {
                         "institution": "Universidade ABC",
                         "degree": "Bacharelado",
                         "field": "Ciência da Computação",
                         "year": "2020"
-                    }}
+                    }
                 ],
                 "languages": ["Português", "Inglês"],
                 "certifications": ["AWS Certified", "Scrum Master"]
-            }}
-            """
+            }
+            """, name="format")
+                .build()
+            )
             
-            response = await self._call_openai(prompt)
-            return self._parse_json_response(response, "resume analysis")
+            return await self._call_llm_json(prompt, "resume analysis")
             
+        except LLMRateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error analyzing resume: {e}")
-            return self._get_default_resume_analysis()
+            return self._get_default_resume_analysis(), None
     
-    async def analyze_job_description(self, job_content: str) -> Dict[str, Any]:
-        """Analisar descrição da vaga usando IA"""
+    async def analyze_job_description(self, job_content: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Analisar descrição da vaga usando IA (análise e modelo que a atendeu; None no resultado padrão)"""
         try:
-            prompt = f"""
-            Analise a seguinte descrição de vaga e extraia as informações estruturadas:
-            
-            Descrição da Vaga:
-            {job_content}
-            
+            prompt = (
+                PromptBuilder("job_analysis")
+                .add_text("Analise a seguinte descrição de vaga e extraia as informações estruturadas:")
+                .add_document("Descrição da Vaga", job_content, max_tokens=ai_settings.JOB_PROMPT_MAX_TOKENS)
+                .add_text("""
             Retorne APENAS um JSON válido com a seguinte estrutura:
-            {{
+            {
                 "keyRequirements": ["Python", "React", "SQL"],
                 "requiredSkills": ["Desenvolvimento Web", "APIs REST", "Banco de Dados"],
                 "experienceLevel": "Senior",
                 "education": "Superior Completo",
                 "benefits": ["Vale Refeição", "Plano de Saúde"],
-                "companyInfo": {{
+                "companyInfo": {
                     "name": "Nome da Empresa",
                     "industry": "Tecnologia",
                     "size": "Médio Porte"
-                }}
-            }}
-            """
+                }
+            }
+            """, name="format")
+                .build()
+            )
             
-            response = await self._call_openai(prompt)
-            return self._parse_json_response(response, "job analysis")
+            return await self._call_llm_json(prompt, "job analysis")
             
+        except LLMRateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error analyzing job description: {e}")
-            return self._get_default_job_analysis()
+            return self._get_default_job_analysis(), None
     
     async def analyze_compatibility(self, resume_analysis: Dict[str, Any], 
-                                  job_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Analisar compatibilidade entre currículo e vaga"""
+                                  job_analysis: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Analisar compatibilidade entre currículo e vaga (relatório e modelo; None no resultado padrão)"""
         try:
-            prompt = f"""
-            {ai_settings.COMPATIBILITY_ANALYSIS_PROMPT}
-            
-            Análise do Currículo:
-            {json.dumps(resume_analysis, indent=2, ensure_ascii=False)}
-            
-            Análise da Vaga:
-            {json.dumps(job_analysis, indent=2, ensure_ascii=False)}
-            
+            prompt = (
+                PromptBuilder("compatibility")
+                .add_text(ai_settings.COMPATIBILITY_ANALYSIS_PROMPT)
+                .add_json("Análise do Currículo", resume_analysis)
+                .add_json("Análise da Vaga", job_analysis)
+                .add_text("""
             Retorne APENAS um JSON válido com a seguinte estrutura:
-            {{
+            {
                 "overallScore": 85.5,
-                "categoryScores": {{
+                "categoryScores": {
                     "skills": 90.0,
                     "experience": 85.0,
                     "education": 80.0,
                     "cultural": 75.0
-                }},
+                },
                 "strengths": [
                     "Forte experiência em Python e desenvolvimento web",
                     "Conhecimento sólido em bancos de dados"
@@ -136,21 +156,24 @@ class AIService:
                     "Mencionar experiência com APIs REST"
                 ],
                 "improvementAreas": [
-                    {{
+                    {
                         "area": "Frontend Development",
                         "priority": "high",
                         "suggestions": ["Aprender React", "Estudar TypeScript"]
-                    }}
+                    }
                 ]
-            }}
-            """
+            }
+            """, name="format")
+                .build()
+            )
             
-            response = await self._call_openai(prompt)
-            return self._parse_json_response(response, "compatibility analysis")
+            return await self._call_llm_json(prompt, "compatibility analysis")
             
+        except LLMRateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error analyzing compatibility: {e}")
-            return self._get_default_compatibility_analysis()
+            return self._get_default_compatibility_analysis(), None
     
     async def generate_cover_letter(self, resume_analysis: Dict[str, Any], 
                                   job_analysis: Dict[str, Any],
@@ -161,23 +184,15 @@ class AIService:
             length = customizations.get("length", "medium")
             focus_areas = customizations.get("focus_areas", [])
             
-            prompt = ai_settings.COVER_LETTER_PROMPT.format(
-                tone=tone,
-                length=length
-            )
-            
-            prompt += f"""
-            
-            Análise do Currículo:
-            {json.dumps(resume_analysis, indent=2, ensure_ascii=False)}
-            
-            Análise da Vaga:
-            {json.dumps(job_analysis, indent=2, ensure_ascii=False)}
-            
-            Áreas de Foco: {', '.join(focus_areas) if focus_areas else 'Geral'}
-            
+            prompt = (
+                PromptBuilder("cover_letter")
+                .add_text(ai_settings.COVER_LETTER_PROMPT.format(tone=tone, length=length))
+                .add_json("Análise do Currículo", resume_analysis)
+                .add_json("Análise da Vaga", job_analysis)
+                .add_text(f"Áreas de Foco: {', '.join(focus_areas) if focus_areas else 'Geral'}", name="focus_areas")
+                .add_text("""
             Retorne APENAS um JSON válido com a seguinte estrutura:
-            {{
+            {
                 "subject": "Candidatura para [Posição] - [Seu Nome]",
                 "greeting": "Prezados Senhores,",
                 "introduction": "Parágrafo de introdução...",
@@ -188,102 +203,473 @@ class AIService:
                 "conclusion": "Parágrafo de conclusão...",
                 "signature": "Atenciosamente,\\n[Seu Nome]",
                 "fullText": "Carta completa formatada..."
-            }}
-            """
+            }
+            """, name="format")
+                .build()
+            )
             
-            response = await self._call_openai(prompt)
-            return self._parse_json_response(response, "cover letter generation")
+            cover_letter, _ = await self._call_llm_json(prompt, "cover letter generation")
+            return cover_letter
             
+        except LLMRateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error generating cover letter: {e}")
             return self._get_default_cover_letter()
     
-    async def extract_skills_from_text(self, text: str) -> List[Dict[str, Any]]:
-        """Extrair habilidades de um texto"""
+    async def stream_cover_letter(self, resume_analysis: Dict[str, Any],
+                                  job_analysis: Optional[Dict[str, Any]],
+                                  customizations: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Gerar carta de apresentação em streaming (eventos por parágrafo e carta final)
+
+        Sem análise da vaga (job_analysis None) a carta é genérica, baseada só no currículo
+        """
+        tone = customizations.get("tone", "formal")
+        length = customizations.get("length", "medium")
+        focus_areas = customizations.get("focus_areas", [])
+        custom_instructions = customizations.get("custom_instructions")
+        
+        builder = (
+            PromptBuilder("cover_letter_stream")
+            .add_text(ai_settings.COVER_LETTER_PROMPT.format(tone=tone, length=length))
+            .add_json("Análise do Currículo", resume_analysis)
+        )
+        if job_analysis is not None:
+            builder.add_json("Análise da Vaga", job_analysis)
+        else:
+            builder.add_text(ai_settings.COVER_LETTER_GENERIC_INSTRUCTIONS, name="generic")
+        builder.add_text(f"Áreas de Foco: {', '.join(focus_areas) if focus_areas else 'Geral'}", name="focus_areas")
+        if custom_instructions:
+            builder.add_text(f"Instruções adicionais: {custom_instructions}", name="custom_instructions")
+        prompt = builder.add_text(ai_settings.COVER_LETTER_STREAM_FORMAT, name="format").build()
+        
+        paragraphs: List[str] = []
+        buffer = ""
+        
+        async for delta in self._stream_llm(prompt):
+            buffer += delta
+            
+            # Emitir cada parágrafo assim que estiver completo
+            while "\n\n" in buffer:
+                block, buffer = buffer.split("\n\n", 1)
+                block = block.strip()
+                if block:
+                    paragraphs.append(block)
+                    yield self._cover_letter_paragraph_event(block, len(paragraphs) - 1)
+        
+        if buffer.strip():
+            paragraphs.append(buffer.strip())
+            yield self._cover_letter_paragraph_event(buffer.strip(), len(paragraphs) - 1)
+        
+        yield {"event": "complete", "data": self._build_cover_letter_content(paragraphs)}
+    
+    def _cover_letter_paragraph_event(self, text: str, index: int) -> Dict[str, Any]:
+        """Evento de parágrafo (seção provisória pela posição)"""
+        sections = ["subject", "greeting", "introduction"]
+        section = sections[index] if index < len(sections) else "body"
+        
+        if section == "subject":
+            text = self._strip_subject_prefix(text)
+        
+        return {"event": "paragraph", "data": {"index": index, "section": section, "text": text}}
+    
+    def _build_cover_letter_content(self, paragraphs: List[str]) -> Dict[str, Any]:
+        """Montar conteúdo estruturado a partir dos parágrafos gerados"""
+        if len(paragraphs) < 5:
+            logger.warning(f"Streamed cover letter has only {len(paragraphs)} paragraphs")
+            content = self._get_default_cover_letter()
+            if paragraphs:
+                content["body"] = paragraphs
+                content["fullText"] = "\n\n".join(paragraphs)
+            return content
+        
+        subject = self._strip_subject_prefix(paragraphs[0])
+        letter_paragraphs = paragraphs[1:]
+        
+        return {
+            "subject": subject,
+            "greeting": letter_paragraphs[0],
+            "introduction": letter_paragraphs[1],
+            "body": letter_paragraphs[2:-2],
+            "conclusion": letter_paragraphs[-2],
+            "signature": letter_paragraphs[-1],
+            "fullText": "\n\n".join(letter_paragraphs)
+        }
+    
+    @staticmethod
+    def _strip_subject_prefix(text: str) -> str:
+        """Remover prefixo 'Assunto:' da primeira linha"""
+        for prefix in ("Assunto:", "Subject:"):
+            if text.lower().startswith(prefix.lower()):
+                return text[len(prefix):].strip()
+        return text
+    
+    async def extract_skills_from_text(self, text: str,
+                                       user_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+        """Extrair habilidades de um texto (catálogo local; LLM só para trechos desconhecidos)"""
         try:
-            prompt = f"""
-            Extraia todas as habilidades técnicas e profissionais do seguinte texto:
+            extractor = await get_skill_extractor()
+            extraction = extractor.extract(text)
+            skills = [match.to_dict() for match in extraction.matches]
+            
+            if user_id and extraction.matches:
+                await SkillRepository().upsert_user_skills(
+                    extractor.to_user_skills(user_id, extraction.matches)
+                )
             
-            {text}
+            if extraction.unknown_spans and ai_settings.SKILL_EXTRACTION_LLM_FALLBACK:
+                known = {skill["name"].casefold() for skill in skills}
+                for skill in await self._extract_skills_with_llm("\n".join(extraction.unknown_spans)):
+                    if skill.get("name") and skill["name"].casefold() not in known:
+                        skill["source"] = "ai"
+                        skills.append(skill)
             
+            return skills
+            
+        except LLMRateLimitedError:
+            raise
+        except Exception as e:
+            logger.error(f"Error extracting skills: {e}")
+            return []
+    
+    async def _extract_skills_with_llm(self, text: str) -> List[Dict[str, Any]]:
+        """Extrair habilidades via LLM"""
+        prompt = (
+            PromptBuilder("skill_extraction")
+            .add_text("Extraia todas as habilidades técnicas e profissionais do seguinte texto:")
+            .add_document("Texto", text)
+            .add_text("""
             Retorne APENAS um JSON válido com array de habilidades:
-            {{
+            {
                 "skills": [
-                    {{
+                    {
                         "name": "Python",
                         "category": "Programming Languages",
                         "confidence": 0.95
-                    }},
-                    {{
+                    },
+                    {
                         "name": "Gestão de Projetos",
                         "category": "Soft Skills",
                         "confidence": 0.80
-                    }}
+                    }
                 ]
-            }}
-            """
-            
-            response = await self._call_openai(prompt)
-            result = self._parse_json_response(response, "skill extraction")
-            return result.get("skills", [])
-            
-        except Exception as e:
-            logger.error(f"Error extracting skills: {e}")
-            return []
+            }
+            """, name="format")
+            .build()
+        )
+        
+        result, _ = await self._call_llm_json(prompt, "skill extraction")
+        return result.get("skills", [])
     
     async def suggest_improvements(self, resume_analysis: Dict[str, Any], 
                                  target_role: str) -> List[str]:
         """Sugerir melhorias para o currículo"""
         try:
-            prompt = f"""
-            Com base na análise do currículo abaixo, sugira melhorias específicas 
-            para uma posição de {target_role}:
-            
-            {json.dumps(resume_analysis, indent=2, ensure_ascii=False)}
-            
+            prompt = (
+                PromptBuilder("improvement_suggestions")
+                .add_text(f"Com base na análise do currículo abaixo, sugira melhorias específicas para uma posição de {target_role}:")
+                .add_json("Análise do Currículo", resume_analysis)
+                .add_text("""
             Retorne APENAS um JSON válido com sugestões:
-            {{
+            {
                 "suggestions": [
                     "Adicionar mais detalhes sobre projetos com Python",
                     "Incluir métricas de performance nos projetos",
                     "Destacar experiência com metodologias ágeis"
                 ]
-            }}
-            """
+            }
+            """, name="format")
+                .build()
+            )
             
-            response = await self._call_openai(prompt)
-            result = self._parse_json_response(response, "improvement suggestions")
+            result, _ = await self._call_llm_json(prompt, "improvement suggestions")
             return result.get("suggestions", [])
             
+        except LLMRateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error suggesting improvements: {e}")
             return []
     
-    async def _call_openai(self, prompt: str) -> str:
-        """Chamar API do OpenAI"""
+    async def _call_llm_json(self, prompt: BuiltPrompt, description: str) -> Tuple[Dict[str, Any], str]:
+        """Chamar o LLM e parsear JSON (resultado e modelo que o atendeu)
+
+        Resposta inválida é refeita com o modelo de fallback
+        """
+        route = get_model_route(prompt.operation)
+        response = await self._call_llm(prompt, route)
+        
         try:
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
+            result = self._parse_json_response(response, description)
+        except ValueError:
+            record_parse_failure(prompt.operation, route.model)
+            fallback_route = route.fallback()
+            if not fallback_route:
+                raise
+            
+            logger.warning(
+                f"Invalid JSON from {route.model} for {description}, retrying with {fallback_route.model}"
+            )
+            model_fallback_counter.inc(operation=prompt.operation, model=route.model)
+            record_retry(prompt.operation, "invalid_json")
+            route = fallback_route
+            response = await self._call_llm(prompt, route)
+            try:
+                result = self._parse_json_response(response, description)
+            except ValueError:
+                record_parse_failure(prompt.operation, route.model)
+                raise
+        
+        return result, route.model
+    
+    async def _call_llm(self, prompt: BuiltPrompt, route: Optional[ModelRoute] = None) -> str:
+        """Chamar o LLM (via governador e circuit breaker, com retentativa em 429)"""
+        route = route or get_model_route(prompt.operation)
+        messages = [
+            {
+                "role": "system",
+                "content": "Você é um especialista em análise de currículos e recrutamento. Sempre retorne respostas em JSON válido."
+            },
+            {
+                "role": "user",
+                "content": prompt.text
+            }
+        ]
+        estimated_tokens = prompt.total_tokens + route.max_tokens
+        retry_after = None
+        
+        for attempt in range(ai_settings.LLM_MAX_RETRIES + 1):
+            try:
+                response = await self._complete_hedged(messages, route, prompt.operation, estimated_tokens)
+                
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if not self._is_rate_limit_error(e):
+                    logger.error(f"Error calling LLM backend ({self.backend.name}): {e}")
+                    raise
+                
+                retry_after = self._get_retry_after(e)
+                if attempt < ai_settings.LLM_MAX_RETRIES:
+                    record_retry(prompt.operation, "rate_limited")
+                    delay = retry_after or min(
+                        ai_settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt),
+                        ai_settings.LLM_RETRY_MAX_DELAY_SECONDS
+                    ) * random.uniform(0.8, 1.2)
+                    logger.warning(f"LLM rate limited (attempt {attempt + 1}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                continue
+            
+            return response.content
+        
+        raise LLMRateLimitedError("LLM rate limit persisted after retries", retry_after)
+    
+    async def _complete_hedged(self, messages: List[Dict[str, str]], route: ModelRoute,
+                               operation: str, estimated_tokens: int) -> LLMResponse:
+        """Chamada com hedge opcional: após o p95 da operação, dispara uma segunda e usa a primeira que concluir"""
+        delay = self._hedge_delay(operation)
+        if delay is None:
+            return await self._complete_once(messages, route, operation, estimated_tokens)
+        
+        primary = asyncio.ensure_future(self._complete_once(messages, route, operation, estimated_tokens))
+        tasks = [primary]
+        
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            
+            hedged_requests_counter.inc(operation=operation)
+            hedge = asyncio.ensure_future(self._complete_once(messages, route, operation, estimated_tokens))
+            tasks.append(hedge)
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            hedge_wins_counter.inc(operation=operation)
+                        return task.result()
+            
+            # Ambas falharam: propagar o erro da chamada original
+            return primary.result()
+            
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def _complete_once(self, messages: List[Dict[str, str]], route: ModelRoute,
+                             operation: str, estimated_tokens: int) -> LLMResponse:
+        """Uma chamada ao backend (circuito, vaga no governador e timeout)"""
+        breaker = get_circuit_breaker()
+        governor = get_llm_governor()
+        
+        try:
+            probe = breaker.before_call()
+        except CircuitOpenError:
+            record_call(operation, route.model, "circuit_open")
+            raise
+        
+        try:
+            ticket = await governor.acquire(estimated_tokens)
+        except BaseException:
+            breaker.record_neutral(probe)
+            raise
+        
+        started = time.monotonic()
+        
+        try:
+            response = await asyncio.wait_for(
+                self.backend.complete(
+                    messages,
+                    model=route.model,
+                    max_tokens=route.max_tokens,
+                    temperature=route.temperature,
+                    top_p=ai_settings.TOP_P,
+                    operation=operation
+                ),
+                timeout=ai_settings.LLM_CALL_TIMEOUT_SECONDS
+            )
+            
+        except asyncio.CancelledError:
+            # Hedge perdedor ou chamador cancelado
+            record_call(operation, route.model, "cancelled", time.monotonic() - started)
+            await governor.release(ticket)
+            breaker.record_neutral(probe)
+            raise
+        except Exception as e:
+            latency = time.monotonic() - started
+            if self._is_rate_limit_error(e):
+                record_call(operation, route.model, "rate_limited", latency)
+                await governor.release(ticket, rate_limited=True, retry_after=self._get_retry_after(e))
+                breaker.record_neutral(probe)
+            else:
+                outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                record_call(operation, route.model, outcome, latency)
+                await governor.release(ticket)
+                breaker.record_failure(probe)
+            raise
+        
+        latency = time.monotonic() - started
+        record_call(
+            operation, response.model or route.model, "success", latency,
+            prompt_tokens=response.prompt_tokens,
+            completion_tokens=response.completion_tokens
+        )
+        await governor.release(ticket, latency=latency, actual_tokens=response.total_tokens)
+        breaker.record_success(probe)
+        get_latency_tracker().observe(operation, latency)
+        
+        return response
+    
+    def _hedge_delay(self, operation: str) -> Optional[float]:
+        """Atraso até o hedge (None: sem hedge para esta chamada)"""
+        if not ai_settings.LLM_HEDGING_ENABLED or current_priority() != PRIORITY_INTERACTIVE:
+            return None
+        if get_circuit_breaker().state != CIRCUIT_CLOSED:
+            return None
+        
+        latency = get_latency_tracker().percentile(operation, ai_settings.LLM_HEDGE_PERCENTILE)
+        if latency is None:
+            return None
+        return max(latency, ai_settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+    
+    async def _stream_llm(self, prompt: BuiltPrompt) -> AsyncIterator[str]:
+        """Chamar o LLM em modo streaming, retornando os trechos de texto"""
+        route = get_model_route(prompt.operation)
+        breaker = get_circuit_breaker()
+        governor = get_llm_governor()
+        
+        try:
+            probe = breaker.before_call()
+        except CircuitOpenError:
+            record_call(prompt.operation, route.model, "circuit_open")
+            raise
+        
+        try:
+            ticket = await governor.acquire(prompt.total_tokens + route.max_tokens)
+        except BaseException:
+            breaker.record_neutral(probe)
+            raise
+        
+        started = time.monotonic()
+        outcome = "cancelled"
+        
+        try:
+            stream = self.backend.stream(
+                [
                     {
                         "role": "system",
-                        "content": "Você é um especialista em análise de currículos e recrutamento. Sempre retorne respostas em JSON válido."
+                        "content": "Você é um especialista em análise de currículos e recrutamento."
                     },
                     {
                         "role": "user",
-                        "content": prompt
+                        "content": prompt.text
                     }
                 ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                top_p=ai_settings.TOP_P
+                model=route.model,
+                max_tokens=route.max_tokens,
+                temperature=route.temperature,
+                top_p=ai_settings.TOP_P,
+                operation=prompt.operation
             )
             
-            return response.choices[0].message.content.strip()
+            async for content in stream:
+                yield content
+            
+            outcome = "success"
             
         except Exception as e:
-            logger.error(f"Error calling OpenAI API: {e}")
+            if self._is_rate_limit_error(e):
+                outcome = "rate_limited"
+                retry_after = self._get_retry_after(e)
+                await governor.release(ticket, rate_limited=True, retry_after=retry_after)
+                ticket = None
+                raise LLMRateLimitedError("LLM rate limited streaming request", retry_after)
+            
+            outcome = "error"
+            logger.error(f"Error streaming from LLM backend ({self.backend.name}): {e}")
             raise
+            
+        finally:
+            latency = time.monotonic() - started
+            if ticket:
+                await governor.release(ticket, latency=latency if outcome == "success" else None)
+            
+            if outcome == "success":
+                breaker.record_success(probe)
+            elif outcome == "error":
+                breaker.record_failure(probe)
+            else:
+                breaker.record_neutral(probe)
+            
+            # Streaming não informa uso de tokens: prompt estimado, completion desconhecido
+            record_call(
+                prompt.operation, route.model, outcome, latency,
+                prompt_tokens=prompt.total_tokens
+            )
+    
+    @staticmethod
+    def _is_rate_limit_error(error: Exception) -> bool:
+        """Verificar se o erro é um 429 do provedor"""
+        status = getattr(error, "http_status", None) or getattr(error, "status_code", None)
+        return status == 429 or type(error).__name__ == "RateLimitError"
+    
+    @staticmethod
+    def _get_retry_after(error: Exception) -> Optional[float]:
+        """Extrair Retry-After (segundos) do erro, se disponível"""
+        headers = getattr(error, "headers", None)
+        if headers is None:
+            headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            return None
+        
+        try:
+            return float(headers.get("retry-after") or headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
     
     def _parse_json_response(self, response: str, operation: str) -> Dict[str, Any]:
         """Parsear resposta JSON da IA"""
@@ -302,6 +688,11 @@ class AIService:
             logger.error(f"Raw response: {response}")
             raise ValueError(f"Invalid JSON response from AI for {operation}")
     
+    @staticmethod
+    def is_fallback_result(result: Dict[str, Any]) -> bool:
+        """Indica se o resultado é a resposta padrão de erro (não deve ir para cache)"""
+        return bool(result.get("isFallback"))
+    
     def _get_default_resume_analysis(self) -> Dict[str, Any]:
         """Análise padrão de currículo em caso de erro"""
         return {
@@ -316,7 +707,8 @@ class AIService:
             "experience": [],
             "education": [],
             "languages": [],
-            "certifications": []
+            "certifications": [],
+            "isFallback": True
         }
     
     def _get_default_job_analysis(self) -> Dict[str, Any]:
@@ -331,7 +723,8 @@ class AIService:
                 "name": "Unknown",
                 "industry": "Unknown",
                 "size": "Unknown"
-            }
+            },
+            "isFallback": True
         }
     
     def _get_default_compatibility_analysis(self) -> Dict[str, Any]:
@@ -347,7 +740,8 @@ class AIService:
             "strengths": ["Análise não disponível"],
             "weaknesses": ["Análise não disponível"],
             "recommendations": ["Tente novamente mais tarde"],
-            "improvementAreas": []
+            "improvementAreas": [],
+            "isFallback": True
         }
     
     def _get_default_cover_letter(self) -> Dict[str, Any]:
@@ -368,22 +762,21 @@ class AIService:
     async def analyze_market_trends(self, skills: List[str], industry: str) -> Dict[str, Any]:
         """Analisar tendências do mercado para habilidades específicas"""
         try:
-            prompt = f"""
-            Analise as tendências do mercado de trabalho para as seguintes habilidades 
-            na indústria de {industry}:
-            
-            Habilidades: {', '.join(skills)}
-            
+            prompt = (
+                PromptBuilder("market_trends")
+                .add_text(f"Analise as tendências do mercado de trabalho para as seguintes habilidades na indústria de {industry}:")
+                .add_text(f"Habilidades: {', '.join(skills)}", name="skills")
+                .add_text("""
             Retorne APENAS um JSON válido com análise de mercado:
-            {{
-                "marketDemand": {{
-                    "Python": {{
+            {
+                "marketDemand": {
+                    "Python": {
                         "demand": "high",
                         "growth": "increasing",
                         "salaryRange": "R$ 8.000 - R$ 15.000",
                         "opportunities": 1250
-                    }}
-                }},
+                    }
+                },
                 "emergingSkills": ["Docker", "Kubernetes", "Machine Learning"],
                 "industryInsights": [
                     "Crescimento de 25% na demanda por desenvolvedores Python",
@@ -393,12 +786,16 @@ class AIService:
                     "Investir em aprendizado de containerização",
                     "Desenvolver conhecimentos em cloud computing"
                 ]
-            }}
-            """
+            }
+            """, name="format")
+                .build()
+            )
             
-            response = await self._call_openai(prompt)
-            return self._parse_json_response(response, "market trends analysis")
+            trends, _ = await self._call_llm_json(prompt, "market trends analysis")
+            return trends
             
+        except LLMRateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error analyzing market trends: {e}")
             return {
@@ -412,38 +809,38 @@ class AIService:
                                          resume_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Gerar perguntas de entrevista baseadas na vaga e currículo"""
         try:
-            prompt = f"""
-            Gere perguntas de entrevista relevantes baseadas na vaga e currículo:
-            
-            Análise da Vaga:
-            {json.dumps(job_analysis, indent=2, ensure_ascii=False)}
-            
-            Análise do Currículo:
-            {json.dumps(resume_analysis, indent=2, ensure_ascii=False)}
-            
+            prompt = (
+                PromptBuilder("interview_questions")
+                .add_text("Gere perguntas de entrevista relevantes baseadas na vaga e currículo:")
+                .add_json("Análise da Vaga", job_analysis)
+                .add_json("Análise do Currículo", resume_analysis)
+                .add_text("""
             Retorne APENAS um JSON válido com perguntas:
-            {{
+            {
                 "questions": [
-                    {{
+                    {
                         "category": "Technical",
                         "question": "Como você implementaria uma API REST em Python?",
                         "difficulty": "medium",
                         "expectedAnswer": "Resposta esperada resumida..."
-                    }},
-                    {{
+                    },
+                    {
                         "category": "Behavioral",
                         "question": "Conte sobre um projeto desafiador que você liderou",
                         "difficulty": "medium",
                         "expectedAnswer": "Buscar exemplos de liderança e resolução de problemas"
-                    }}
+                    }
                 ]
-            }}
-            """
+            }
+            """, name="format")
+                .build()
+            )
             
-            response = await self._call_openai(prompt)
-            result = self._parse_json_response(response, "interview questions")
+            result, _ = await self._call_llm_json(prompt, "interview questions")
             return result.get("questions", [])
             
+        except LLMRateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error generating interview questions: {e}")
             return []
@@ -0,0 +1,376 @@
+"""
+Fila de Análises
+Processamento em background com pool de workers, fairness por usuário,
+retentativas com backoff e persistência dos jobs
+"""
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
+from uuid import uuid4
+from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+import asyncio
+import logging
+import random
+
+from core.config import queue_settings
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[Dict[str, Any], str], Awaitable[None]]
+
+
+class NonRetryableJobError(Exception):
+    """Erro de job que não deve ser reprocessado"""
+
+
+class InMemoryJobStore:
+    """Armazenamento de jobs em memória (testes e desenvolvimento)"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    async def ensure_indexes(self) -> None:
+        """Sem índices em memória"""
+        return None
+
+    async def save_job(self, job: Dict[str, Any]) -> str:
+        """Persistir novo job"""
+        async with self._lock:
+            job["createdAt"] = datetime.utcnow()
+            job["updatedAt"] = datetime.utcnow()
+            self._jobs[job["jobId"]] = dict(job)
+            return job["jobId"]
+
+    async def claim_job(self, job_id: str, worker_id: str,
+                        locked_until: datetime) -> Optional[Dict[str, Any]]:
+        """Reservar job pendente ou com lease expirado"""
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+
+            now = datetime.utcnow()
+            claimable = (
+                (job["status"] == "pending" and job["runAt"] <= now) or
+                (job["status"] == "running" and job["lockedUntil"] and job["lockedUntil"] < now)
+            )
+            if not claimable:
+                return None
+
+            job.update({
+                "status": "running",
+                "lockedBy": worker_id,
+                "lockedUntil": locked_until,
+                "attempts": job.get("attempts", 0) + 1,
+                "updatedAt": now
+            })
+            return dict(job)
+
+    async def complete_job(self, job_id: str) -> bool:
+        """Marcar job como concluído"""
+        return await self._update_job(job_id, {
+            "status": "completed",
+            "lockedBy": None,
+            "lockedUntil": None
+        })
+
+    async def reschedule_job(self, job_id: str, run_at: datetime, error: str) -> bool:
+        """Devolver job para a fila com nova data de execução"""
+        return await self._update_job(job_id, {
+            "status": "pending",
+            "runAt": run_at,
+            "lastError": error,
+            "lockedBy": None,
+            "lockedUntil": None
+        })
+
+    async def fail_job(self, job_id: str, error: str) -> bool:
+        """Marcar job como falho definitivamente"""
+        return await self._update_job(job_id, {
+            "status": "failed",
+            "lastError": error,
+            "lockedBy": None,
+            "lockedUntil": None
+        })
+
+    async def get_recoverable_jobs(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Buscar jobs pendentes ou com lease expirado"""
+        async with self._lock:
+            now = datetime.utcnow()
+            jobs = [
+                dict(job) for job in self._jobs.values()
+                if job["status"] == "pending" or (
+                    job["status"] == "running" and job["lockedUntil"] and job["lockedUntil"] < now
+                )
+            ]
+            jobs.sort(key=lambda job: job["createdAt"])
+            return jobs[:limit]
+
+    async def _update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
+        """Atualizar campos do job"""
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return False
+
+            updates["updatedAt"] = datetime.utcnow()
+            job.update(updates)
+            return True
+
+
+class FairScheduler:
+    """Agendador em memória com rodízio entre usuários"""
+
+    def __init__(self, max_concurrent_per_user: int):
+        self.max_concurrent_per_user = max_concurrent_per_user
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._queued_ids: set = set()
+        self._in_flight: Dict[str, int] = {}
+        self._condition = asyncio.Condition()
+
+    @property
+    def depth(self) -> int:
+        """Quantidade de jobs aguardando"""
+        return len(self._queued_ids)
+
+    async def push(self, user_id: str, job_id: str) -> None:
+        """Adicionar job na fila do usuário (ignora duplicados)"""
+        async with self._condition:
+            if job_id in self._queued_ids:
+                return
+
+            self._queues.setdefault(user_id, deque()).append(job_id)
+            self._queued_ids.add(job_id)
+            self._condition.notify()
+
+    async def pop(self) -> Tuple[str, str]:
+        """Obter próximo job respeitando o limite por usuário"""
+        async with self._condition:
+            while True:
+                item = self._next_ready()
+                if item:
+                    return item
+                await self._condition.wait()
+
+    async def task_done(self, user_id: str) -> None:
+        """Liberar vaga do usuário após processamento"""
+        async with self._condition:
+            remaining = self._in_flight.get(user_id, 1) - 1
+            if remaining > 0:
+                self._in_flight[user_id] = remaining
+            else:
+                self._in_flight.pop(user_id, None)
+            self._condition.notify_all()
+
+    def _next_ready(self) -> Optional[Tuple[str, str]]:
+        """Rodízio: primeiro usuário com job pendente e vaga disponível"""
+        for user_id in list(self._queues.keys()):
+            if self._in_flight.get(user_id, 0) >= self.max_concurrent_per_user:
+                continue
+
+            user_queue = self._queues.pop(user_id)
+            job_id = user_queue.popleft()
+            if user_queue:
+                # Usuário volta para o fim da fila
+                self._queues[user_id] = user_queue
+
+            self._queued_ids.discard(job_id)
+            self._in_flight[user_id] = self._in_flight.get(user_id, 0) + 1
+            return user_id, job_id
+
+        return None
+
+
+class AnalysisQueue:
+    """Fila persistente de análises com pool de workers"""
+
+    def __init__(self, store: Any, handler: JobHandler,
+                 on_failure: Optional[FailureHandler] = None,
+                 worker_count: int = queue_settings.WORKER_COUNT,
+                 max_attempts: int = queue_settings.MAX_ATTEMPTS):
+        self.store = store
+        self.handler = handler
+        self.on_failure = on_failure
+        self.worker_count = worker_count
+        self.max_attempts = max_attempts
+        self.scheduler = FairScheduler(queue_settings.MAX_CONCURRENT_PER_USER)
+        self._workers: List[asyncio.Task] = []
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._delayed: Dict[str, asyncio.Task] = {}
+        self._running = False
+
+    async def start(self) -> None:
+        """Iniciar workers e recuperar jobs pendentes"""
+        if self._running:
+            return
+
+        self._running = True
+        await self.store.ensure_indexes()
+        await self._recover_jobs()
+
+        self._workers = [
+            asyncio.create_task(self._worker(f"worker-{uuid4().hex[:8]}"))
+            for _ in range(self.worker_count)
+        ]
+        self._recovery_task = asyncio.create_task(self._recovery_loop())
+        logger.info(f"Analysis queue started with {self.worker_count} workers")
+
+    async def stop(self) -> None:
+        """Parar workers (jobs em andamento são recuperados pelo lease)"""
+        self._running = False
+
+        tasks = self._workers + list(self._delayed.values())
+        if self._recovery_task:
+            tasks.append(self._recovery_task)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._workers = []
+        self._delayed = {}
+        self._recovery_task = None
+        logger.info("Analysis queue stopped")
+
+    async def enqueue(self, user_id: str, payload: Dict[str, Any]) -> str:
+        """Persistir e agendar novo job"""
+        job = {
+            "jobId": str(uuid4()),
+            "userId": user_id,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "maxAttempts": self.max_attempts,
+            "runAt": datetime.utcnow(),
+            "lastError": None,
+            "lockedBy": None,
+            "lockedUntil": None
+        }
+
+        job_id = await self.store.save_job(job)
+        await self.scheduler.push(user_id, job_id)
+        return job_id
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas da fila"""
+        return {
+            "queue_depth": self.scheduler.depth,
+            "delayed_jobs": len(self._delayed),
+            "workers": len(self._workers)
+        }
+
+    async def _worker(self, worker_id: str) -> None:
+        """Loop de processamento de um worker"""
+        while self._running:
+            user_id, job_id = await self.scheduler.pop()
+            try:
+                locked_until = datetime.utcnow() + timedelta(seconds=queue_settings.LEASE_SECONDS)
+                job = await self.store.claim_job(job_id, worker_id, locked_until)
+                if job:
+                    await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error in analysis worker {worker_id}: {e}")
+            finally:
+                await self.scheduler.task_done(user_id)
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        """Executar job e tratar retentativas"""
+        job_id = job["jobId"]
+
+        try:
+            await self.handler(job["payload"])
+            await self.store.complete_job(job_id)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            attempts = job.get("attempts", 1)
+            max_attempts = job.get("maxAttempts", self.max_attempts)
+            retryable = not isinstance(e, NonRetryableJobError)
+
+            if retryable and attempts < max_attempts:
+                delay = self._retry_delay(attempts, getattr(e, "retry_after", None))
+                run_at = datetime.utcnow() + timedelta(seconds=delay)
+                await self.store.reschedule_job(job_id, run_at, str(e))
+                self._schedule_later(job["userId"], job_id, delay)
+                logger.warning(
+                    f"Analysis job {job_id} failed (attempt {attempts}/{max_attempts}), "
+                    f"retrying in {delay:.1f}s: {e}"
+                )
+                return
+
+            await self.store.fail_job(job_id, str(e))
+            logger.error(f"Analysis job {job_id} failed permanently: {e}")
+
+            if self.on_failure:
+                try:
+                    await self.on_failure(job["payload"], str(e))
+                except Exception as callback_error:
+                    logger.error(f"Error in analysis failure handler: {callback_error}")
+
+    def _retry_delay(self, attempts: int, retry_after: Optional[float] = None) -> float:
+        """Backoff exponencial com jitter"""
+        delay = min(
+            queue_settings.RETRY_BASE_DELAY_SECONDS * (2 ** (attempts - 1)),
+            queue_settings.RETRY_MAX_DELAY_SECONDS
+        )
+        delay *= 1 + random.uniform(0, queue_settings.RETRY_JITTER)
+
+        if retry_after:
+            delay = max(delay, float(retry_after))
+
+        return delay
+
+    def _schedule_later(self, user_id: str, job_id: str, delay: float) -> None:
+        """Reagendar job no scheduler após o atraso"""
+        if job_id in self._delayed:
+            return
+
+        async def push_later():
+            await asyncio.sleep(delay)
+            self._delayed.pop(job_id, None)
+            await self.scheduler.push(user_id, job_id)
+
+        self._delayed[job_id] = asyncio.create_task(push_later())
+
+    async def _recover_jobs(self) -> None:
+        """Recolocar no scheduler jobs persistidos (reinício ou outros processos)"""
+        jobs = await self.store.get_recoverable_jobs(queue_settings.RECOVERY_BATCH_SIZE)
+        now = datetime.utcnow()
+
+        for job in jobs:
+            if job["status"] == "pending" and job["runAt"] > now:
+                delay = (job["runAt"] - now).total_seconds()
+                self._schedule_later(job["userId"], job["jobId"], delay)
+            else:
+                await self.scheduler.push(job["userId"], job["jobId"])
+
+        if jobs:
+            logger.info(f"Recovered {len(jobs)} analysis jobs")
+
+    async def _recovery_loop(self) -> None:
+        """Varredura periódica de jobs recuperáveis"""
+        while self._running:
+            await asyncio.sleep(queue_settings.RECOVERY_INTERVAL_SECONDS)
+            try:
+                await self._recover_jobs()
+            except Exception as e:
+                logger.error(f"Error recovering analysis jobs: {e}")
+
+
+# Instância global da fila (configurada no startup da aplicação)
+_analysis_queue: Optional[AnalysisQueue] = None
+
+
+def get_analysis_queue() -> Optional[AnalysisQueue]:
+    """Obter fila de análises do processo"""
+    return _analysis_queue
+
+
+def set_analysis_queue(queue: Optional[AnalysisQueue]) -> None:
+    """Registrar fila de análises do processo"""
+    global _analysis_queue
+    _analysis_queue = queue
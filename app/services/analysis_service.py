@@ -2,24 +2,72 @@
 Serviço de Análise
 Lógica de negócio para análises de compatibilidade
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
 from uuid import UUID, uuid4
 from datetime import datetime
 import json
 import hashlib
 import logging
+import asyncio
 
-from app.core.config import settings, ai_settings
-from app.models.domain import CompatibilityAnalysis, AnalysisStatus
-from app.dto.requests import AnalysisCreateRequest
-from app.dto.responses import AnalysisResponse, DetailedAnalysisResponse
-from app.data.sql_repository import AnalysisRepository, ResumeRepository
-from app.data.mongo_repository import AnalysisMongoRepository, AIAnalysisCacheRepository, ActivityLogMongoRepository
-from app.services.ai_service import AIService
-from app.services.file_service import FileService
+from core.config import settings, ai_settings
+from core.metrics import metrics
+from core.shared_cache import TieredCache
+from domain.entities.domain import CompatibilityAnalysis, AnalysisStatus
+from domain.factories.analysis_factory import AnalysisFactory
+from schemas.requests.requests import AnalysisCreateRequest, BulkAnalysisRequest
+from schemas.responses.analysis_responses import AnalysisResponse, DetailedAnalysisResponse
+from data.sql_repository import AnalysisRepository, ResumeRepository
+from data.mongo_repository import (
+    AnalysisMongoRepository, AIAnalysisCacheRepository, ActivityLogMongoRepository,
+    StageAnalysisCacheRepository, AnalysisLeaseMongoRepository, ResumeFingerprintRepository, LEASE_OWNER
+)
+from services.ai_service import AIService
+from services.llm_governor import current_priority, use_priority, PRIORITY_BULK
+from services.model_router import get_model_route
+from services.llm_usage import track_llm_usage, record_cache
+from services.pre_scorer import CompatibilityPreScorer, PreScore
+from services.resume_fingerprint import ResumeFingerprint, compute_fingerprint
+from services.analysis_queue import get_analysis_queue, NonRetryableJobError
+from services.job_warmer import get_job_warmer
+from services.file_service import FileService
+from services.stage_executor import StageGraphExecutor, Stage
+from services.text_normalizer import canonicalize_text, canonicalize_job_record, content_hash
+from services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Análises em andamento no processo, por chave de cache
+_analysis_flights = SingleFlight()
+_job_analysis_flights = SingleFlight()
+
+# Recálculos em background de análises servidas após o TTL suave, por chave de cache
+_analysis_refreshes: Dict[str, asyncio.Task] = {}
+
+# Caches compartilhados entre processos; estatísticas por usuário com as chaves
+# "analysis:<userId>" (este serviço), "user:<userId>" (UserService) e
+# "dashboard:<userId>" (DashboardRepository)
+_job_content_cache = TieredCache("job_content")
+
+# Conteúdo da vaga (e hash SHA-256 das colunas usadas, versão da entrada em cache)
+_JOB_CONTENT_FROM = """
+    FROM JobDescriptions jd
+    LEFT JOIN Companies c ON jd.CompanyId = c.CompanyId
+    WHERE jd.JobId = :job_id
+"""
+_JOB_CONTENT_VERSION = """
+    CONVERT(varchar(64), HASHBYTES('SHA2_256', CONCAT_WS(CHAR(31),
+        jd.Title, jd.Description, jd.Requirements, jd.Benefits, c.Name, c.Industry)), 2)
+"""
+_dashboard_stats_cache = TieredCache("dashboard_stats")
+
+near_duplicate_counter = metrics.counter(
+    "resume_near_duplicate_hits_total", "Análises de currículo reaproveitadas de quase duplicados"
+)
+stale_refresh_counter = metrics.counter(
+    "analysis_cache_stale_refreshes_total", "Recálculos em background de análises após o TTL suave"
+)
+
 
 class AnalysisService:
     """Serviço de análises de compatibilidade"""
@@ -29,8 +77,12 @@ class AnalysisService:
         self.resume_repo = ResumeRepository()
         self.mongo_repo = AnalysisMongoRepository()
         self.cache_repo = AIAnalysisCacheRepository()
+        self.stage_cache_repo = StageAnalysisCacheRepository()
+        self.lease_repo = AnalysisLeaseMongoRepository()
+        self.fingerprint_repo = ResumeFingerprintRepository()
         self.activity_repo = ActivityLogMongoRepository()
         self.ai_service = AIService()
+        self.pre_scorer = CompatibilityPreScorer()
         self.file_service = FileService()
     
     async def create_analysis(self, user_id: UUID, request: AnalysisCreateRequest) -> AnalysisResponse:
@@ -67,8 +119,8 @@ class AnalysisService:
                 }
             })
             
-            # Processar análise em background (simulado)
-            await self._process_analysis_async(created_analysis, request.job_description)
+            # Enfileirar processamento em background
+            await self._enqueue_analysis(created_analysis, request.job_description)
             
             return AnalysisResponse(
                 analysis_id=created_analysis.analysis_id,
@@ -173,95 +225,315 @@ class AnalysisService:
             logger.error(f"Error getting user analyses: {e}")
             return []
     
+    async def get_stage_analyses(self, user_id: UUID, resume_id: UUID, job_id: Optional[UUID],
+                                 job_description: Optional[str] = None
+                                 ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Obter análises (em cache quando possível) do currículo e da vaga (None sem vaga informada)"""
+        resume = await self.resume_repo.get_resume_by_id(resume_id)
+        if not resume or resume.user_id != user_id:
+            raise ValueError("Resume not found or access denied")
+        
+        resume_content = await self._get_resume_content(resume_id)
+        if not resume_content:
+            raise ValueError("Failed to extract resume content")
+        
+        if job_id is None and not job_description:
+            resume_analysis, _ = await self._get_resume_analysis(resume_content, str(user_id))
+            return resume_analysis, None
+        
+        job_content = await self._get_job_content(job_id, job_description)
+        if not job_content:
+            raise ValueError("Failed to get job description")
+        
+        (resume_analysis, _), (job_analysis, _) = await asyncio.gather(
+            self._get_resume_analysis(resume_content, str(user_id)),
+            self._get_job_analysis(job_content)
+        )
+        
+        return resume_analysis, job_analysis
+    
+    async def stream_bulk_analysis(self, user_id: UUID,
+                                   request: BulkAnalysisRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Analisar vários currículos contra uma vaga, emitindo cada resultado ao concluir"""
+        started_at = datetime.utcnow()
+        resume_ids = list(dict.fromkeys(request.resume_ids))
+        
+        # Verificar se os currículos existem e pertencem ao usuário (uma consulta)
+        resumes = await self.resume_repo.get_resumes_by_ids(resume_ids)
+        owned_ids = {resume.resume_id for resume in resumes if resume.user_id == user_id}
+        if any(resume_id not in owned_ids for resume_id in resume_ids):
+            raise ValueError("Resume not found or access denied")
+        
+        job_content = await self._get_job_content(request.job_id, None)
+        if not job_content:
+            raise ValueError("Failed to get job description")
+        
+        analyses = AnalysisFactory.make_bulk_analysis(
+            {"resume_ids": resume_ids, "job_id": request.job_id}, user_id
+        )
+        await self.analysis_repo.create_analyses_bulk(analyses)
+        
+        try:
+            yield {
+                "event": "started",
+                "data": {
+                    "job_id": str(request.job_id),
+                    "total": len(analyses),
+                    "analyses": [
+                        {"analysis_id": str(analysis.analysis_id), "resume_id": str(analysis.resume_id)}
+                        for analysis in analyses
+                    ]
+                }
+            }
+            
+            with use_priority(PRIORITY_BULK):
+                # Vaga analisada uma única vez para todo o lote
+                job_analysis, _ = await self._get_job_analysis(job_content)
+        except BaseException as e:
+            # Falha da vaga ou cliente desconectado antes do início: nenhuma análise fica pendente
+            message = str(e) if isinstance(e, Exception) else "Bulk analysis cancelled"
+            for analysis in analyses:
+                await self._handle_analysis_error(analysis.analysis_id, message)
+            raise
+        
+        semaphore = asyncio.Semaphore(ai_settings.BULK_ANALYSIS_CONCURRENCY)
+        
+        with use_priority(PRIORITY_BULK):
+            async def run_one(analysis: CompatibilityAnalysis) -> Dict[str, Any]:
+                async with semaphore:
+                    try:
+                        detailed_analysis = await self._run_analysis(analysis, job_content, job_analysis)
+                        return {
+                            "event": "result",
+                            "data": {
+                                "analysis_id": str(analysis.analysis_id),
+                                "resume_id": str(analysis.resume_id),
+                                "status": AnalysisStatus.COMPLETED.value,
+                                "match_score": detailed_analysis["matchScore"],
+                                "screened_out": detailed_analysis.get("screenedOut", False)
+                            }
+                        }
+                    except Exception as e:
+                        await self._handle_analysis_error(analysis.analysis_id, str(e))
+                        return {
+                            "event": "error",
+                            "data": {
+                                "analysis_id": str(analysis.analysis_id),
+                                "resume_id": str(analysis.resume_id),
+                                "status": AnalysisStatus.FAILED.value,
+                                "message": str(e)
+                            }
+                        }
+            
+            tasks = [asyncio.create_task(run_one(analysis)) for analysis in analyses]
+        
+        counts = {"completed": 0, "failed": 0, "screened_out": 0}
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                event = await next_result
+                if event["event"] == "result":
+                    counts["completed"] += 1
+                    counts["screened_out"] += int(event["data"]["screened_out"])
+                else:
+                    counts["failed"] += 1
+                yield event
+        finally:
+            # Cliente desconectou: cancelar o restante do lote
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            for analysis, task in zip(analyses, tasks):
+                if task in pending:
+                    await self._handle_analysis_error(analysis.analysis_id, "Bulk analysis cancelled")
+        
+        # Log da atividade
+        await self.activity_repo.log_activity({
+            "userId": str(user_id),
+            "action": "bulk_analysis_completed",
+            "resource": "job",
+            "resourceId": str(request.job_id),
+            "details": {
+                "total": len(analyses),
+                "completed": counts["completed"],
+                "failed": counts["failed"],
+                "screened_out": counts["screened_out"]
+            }
+        })
+        
+        yield {
+            "event": "complete",
+            "data": {
+                "job_id": str(request.job_id),
+                "total": len(analyses),
+                **counts,
+                "processing_time_ms": int((datetime.utcnow() - started_at).total_seconds() * 1000)
+            }
+        }
+    
+    async def _enqueue_analysis(self, analysis: CompatibilityAnalysis,
+                                job_description: Optional[str] = None) -> None:
+        """Enfileirar análise para processamento pelos workers"""
+        queue = get_analysis_queue()
+        if not queue:
+            # Sem fila configurada (scripts, testes): processar inline
+            await self._process_analysis_async(analysis, job_description)
+            return
+        
+        await queue.enqueue(str(analysis.user_id), {
+            "analysis_id": str(analysis.analysis_id),
+            "user_id": str(analysis.user_id),
+            "resume_id": str(analysis.resume_id),
+            "job_id": str(analysis.job_id) if analysis.job_id else None,
+            "analysis_type": analysis.analysis_type,
+            "job_description": job_description
+        })
+        
+        # Estágio da vaga calculado enquanto a análise aguarda um worker
+        warmer = get_job_warmer()
+        if warmer and analysis.job_id and not job_description:
+            warmer.schedule(analysis.job_id)
+    
+    async def process_queued_analysis(self, payload: Dict[str, Any]) -> None:
+        """Handler da fila: processar análise enfileirada (erros propagam para retentativa)"""
+        analysis = CompatibilityAnalysis(
+            analysis_id=UUID(payload["analysis_id"]),
+            user_id=UUID(payload["user_id"]),
+            resume_id=UUID(payload["resume_id"]),
+            job_id=UUID(payload["job_id"]) if payload.get("job_id") else None,
+            match_score=0.0,
+            status=AnalysisStatus.PROCESSING,
+            analysis_type=payload.get("analysis_type", "job_match")
+        )
+        
+        await self._run_analysis(analysis, payload.get("job_description"))
+    
+    async def handle_queued_analysis_failure(self, payload: Dict[str, Any], error_message: str) -> None:
+        """Handler da fila: análise esgotou as retentativas"""
+        await self._handle_analysis_error(UUID(payload["analysis_id"]), error_message)
+    
+    async def warm_job_analysis(self, job_id: UUID) -> bool:
+        """Calcular e cachear a análise da vaga antes das análises (True se calculada agora)"""
+        job_content = await self._get_job_content(job_id, None)
+        if not job_content:
+            return False
+        
+        cache_key = self._generate_stage_cache_key(
+            "job_analysis", job_content, ai_settings.JOB_PROMPT_VERSION
+        )
+        if await self.stage_cache_repo.get_stage_analysis("job_analysis", cache_key):
+            return False
+        
+        with use_priority(PRIORITY_BULK):
+            await self._get_job_analysis(job_content)
+        return True
+    
     async def _process_analysis_async(self, analysis: CompatibilityAnalysis, 
                                     job_description: Optional[str] = None) -> None:
         """Processar análise de forma assíncrona"""
         try:
-            start_time = datetime.utcnow()
-            
-            # Atualizar status para processando
-            await self.analysis_repo.update_analysis_status(
-                analysis.analysis_id, 
-                AnalysisStatus.PROCESSING.value
-            )
-            
-            # Obter conteúdo do currículo
-            resume_content = await self._get_resume_content(analysis.resume_id)
-            if not resume_content:
-                await self._handle_analysis_error(analysis.analysis_id, "Failed to extract resume content")
-                return
-            
-            # Obter descrição da vaga
-            job_content = await self._get_job_content(analysis.job_id, job_description)
-            if not job_content:
-                await self._handle_analysis_error(analysis.analysis_id, "Failed to get job description")
-                return
+            await self._run_analysis(analysis, job_description)
             
+        except Exception as e:
+            logger.error(f"Error processing analysis: {e}")
+            await self._handle_analysis_error(analysis.analysis_id, str(e))
+    
+    async def _run_analysis(self, analysis: CompatibilityAnalysis,
+                            job_description: Optional[str] = None,
+                            job_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Executar pipeline da análise (job_analysis: análise da vaga já calculada, ex: lote)"""
+        start_time = datetime.utcnow()
+        
+        # Atualizar status para processando
+        await self.analysis_repo.update_analysis_status(
+            analysis.analysis_id, 
+            AnalysisStatus.PROCESSING.value
+        )
+        
+        # Obter conteúdo do currículo
+        resume_content = await self._get_resume_content(analysis.resume_id)
+        if not resume_content:
+            raise NonRetryableJobError("Failed to extract resume content")
+        
+        # Obter descrição da vaga
+        job_content = await self._get_job_content(analysis.job_id, job_description)
+        if not job_content:
+            raise NonRetryableJobError("Failed to get job description")
+        
+        with track_llm_usage() as llm_usage:
             # Verificar cache
             cache_key = self._generate_cache_key(resume_content, job_content)
             cached_result = await self.cache_repo.get_cached_analysis(cache_key)
             
             if cached_result:
-                detailed_analysis = cached_result["result"]
+                detailed_analysis = dict(cached_result["result"])
+                
+                # Após o TTL suave: servir o resultado e recalcular em background
+                if not self.cache_repo.is_stale(cached_result):
+                    record_cache("analysis", "hit")
+                else:
+                    record_cache("analysis", "stale")
+                    self._schedule_analysis_refresh(
+                        cache_key, resume_content, job_content, job_analysis, str(analysis.user_id)
+                    )
             else:
-                # Processar com IA
-                detailed_analysis = await self._analyze_with_ai(resume_content, job_content)
+                record_cache("analysis", "miss")
                 
-                # Armazenar em cache
-                await self.cache_repo.cache_analysis(cache_key, detailed_analysis, ttl_hours=24)
-            
-            # Salvar análise detalhada no MongoDB
-            detailed_analysis["analysisId"] = str(analysis.analysis_id)
-            detailed_analysis["userId"] = str(analysis.user_id)
-            detailed_analysis["resumeId"] = str(analysis.resume_id)
-            detailed_analysis["jobId"] = str(analysis.job_id) if analysis.job_id else None
-            
-            mongo_id = await self.mongo_repo.create_detailed_analysis(detailed_analysis)
-            
-            # Calcular tempo de processamento
-            processing_time = int((datetime.utcnow() - start_time).total_seconds() * 1000)
-            
-            # Atualizar análise no SQL
-            await self.analysis_repo.execute_query(
-                """
-                UPDATE CompatibilityAnalyses 
-                SET MatchScore = :match_score,
-                    Status = 'completed',
-                    ProcessingTimeMs = :processing_time,
-                    CompletedAt = GETUTCDATE(),
-                    MongoAnalysisId = :mongo_id
-                WHERE AnalysisId = :analysis_id
-                """,
-                {
-                    "analysis_id": str(analysis.analysis_id),
-                    "match_score": detailed_analysis["compatibilityReport"]["overallScore"],
-                    "processing_time": processing_time,
-                    "mongo_id": mongo_id
-                }
-            )
-            
-            # Atualizar estatísticas do currículo
-            await self.resume_repo.update_resume_analysis_stats(
-                analysis.resume_id,
-                detailed_analysis["compatibilityReport"]["overallScore"]
-            )
-            
-            # Log da atividade
-            await self.activity_repo.log_activity({
-                "userId": str(analysis.user_id),
-                "action": "analysis_completed",
-                "resource": "analysis",
-                "resourceId": str(analysis.analysis_id),
-                "details": {
-                    "match_score": detailed_analysis["compatibilityReport"]["overallScore"],
-                    "processing_time_ms": processing_time,
-                    "ai_model": detailed_analysis.get("aiModel", "unknown")
-                }
-            })
-            
-        except Exception as e:
-            logger.error(f"Error processing analysis: {e}")
-            await self._handle_analysis_error(analysis.analysis_id, str(e))
+                # Processar com IA (chamadas idênticas concorrentes compartilham o resultado)
+                shared_result = await _analysis_flights.do(
+                    cache_key,
+                    lambda: self._compute_analysis(
+                        cache_key, resume_content, job_content, job_analysis, str(analysis.user_id)
+                    )
+                )
+                detailed_analysis = dict(shared_result)
+        
+        # Resumo de uso do LLM desta análise (tokens, latência, custo, cache)
+        detailed_analysis["llmUsage"] = llm_usage.to_dict()
+        
+        # Salvar análise detalhada no MongoDB
+        detailed_analysis["analysisId"] = str(analysis.analysis_id)
+        detailed_analysis["userId"] = str(analysis.user_id)
+        detailed_analysis["resumeId"] = str(analysis.resume_id)
+        detailed_analysis["jobId"] = str(analysis.job_id) if analysis.job_id else None
+        
+        mongo_id = await self.mongo_repo.create_detailed_analysis(detailed_analysis)
+        
+        # Calcular tempo de processamento
+        processing_time = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        
+        # Atualizar análise no SQL
+        await self.analysis_repo.complete_analysis(
+            analysis.analysis_id,
+            detailed_analysis["compatibilityReport"]["overallScore"],
+            processing_time,
+            mongo_id
+        )
+        
+        # Atualizar estatísticas do currículo
+        await self.resume_repo.update_resume_analysis_stats(
+            analysis.resume_id,
+            detailed_analysis["compatibilityReport"]["overallScore"]
+        )
+        
+        # Estatísticas do usuário mudaram com a nova análise
+        await _dashboard_stats_cache.invalidate(
+            f"analysis:{analysis.user_id}", f"user:{analysis.user_id}", f"dashboard:{analysis.user_id}"
+        )
+        
+        # Log da atividade
+        await self.activity_repo.log_activity({
+            "userId": str(analysis.user_id),
+            "action": "analysis_completed",
+            "resource": "analysis",
+            "resourceId": str(analysis.analysis_id),
+            "details": {
+                "match_score": detailed_analysis["compatibilityReport"]["overallScore"],
+                "processing_time_ms": processing_time,
+                "ai_model": detailed_analysis.get("aiModel", "unknown")
+            }
+        })
+        
+        return detailed_analysis
     
     async def _get_resume_content(self, resume_id: UUID) -> Optional[str]:
         """Obter conteúdo do currículo"""
@@ -272,7 +544,7 @@ class AnalysisService:
             
             # Extrair texto do arquivo
             content = await self.file_service.extract_text_from_file(resume.data_lake_file_id)
-            return content
+            return canonicalize_text(content) if content else None
             
         except Exception as e:
             logger.error(f"Error getting resume content: {e}")
@@ -282,36 +554,35 @@ class AnalysisService:
         """Obter descrição da vaga"""
         try:
             if job_description:
-                return job_description
+                return canonicalize_text(job_description)
             
             if job_id:
+                # Chave com o hash do conteúdo atual: edições na vaga ou empresa geram outra entrada
+                version = await self.analysis_repo.execute_scalar(
+                    f"SELECT {_JOB_CONTENT_VERSION} {_JOB_CONTENT_FROM}",
+                    {"job_id": str(job_id)}
+                )
+                if version is None:
+                    return None
+                
+                cache_key = f"{job_id}:{version}"
+                cached = await _job_content_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                
                 result = await self.analysis_repo.execute_query(
-                    """
+                    f"""
                     SELECT jd.Title, jd.Description, jd.Requirements, jd.Benefits,
                            c.Name as CompanyName, c.Industry
-                    FROM JobDescriptions jd
-                    LEFT JOIN Companies c ON jd.CompanyId = c.CompanyId
-                    WHERE jd.JobId = :job_id
+                    {_JOB_CONTENT_FROM}
                     """,
                     {"job_id": str(job_id)}
                 )
                 
                 if result:
-                    job_data = result[0]
-                    return f"""
-                    Company: {job_data['CompanyName'] or 'Not specified'}
-                    Industry: {job_data['Industry'] or 'Not specified'}
-                    Position: {job_data['Title']}
-                    
-                    Description:
-                    {job_data['Description'] or 'Not provided'}
-                    
-                    Requirements:
-                    {job_data['Requirements'] or 'Not provided'}
-                    
-                    Benefits:
-                    {job_data['Benefits'] or 'Not provided'}
-                    """
+                    job_content = canonicalize_job_record(result[0])
+                    await _job_content_cache.set(cache_key, job_content)
+                    return job_content
             
             return None
             
@@ -319,39 +590,301 @@ class AnalysisService:
             logger.error(f"Error getting job content: {e}")
             return None
     
-    async def _analyze_with_ai(self, resume_content: str, job_content: str) -> Dict[str, Any]:
+    async def _compute_analysis(self, cache_key: str, resume_content: str, job_content: str,
+                                job_analysis: Optional[Dict[str, Any]] = None,
+                                user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Calcular análise e armazenar em cache (com lease opcional entre workers)"""
+        if not ai_settings.ANALYSIS_LEASE_ENABLED:
+            return await self._analyze_and_cache(
+                cache_key, resume_content, job_content, job_analysis, user_id
+            )
+        
+        deadline = asyncio.get_running_loop().time() + ai_settings.ANALYSIS_LEASE_TTL_SECONDS
+        
+        while True:
+            if await self.lease_repo.acquire_lease(
+                cache_key, LEASE_OWNER, ai_settings.ANALYSIS_LEASE_TTL_SECONDS
+            ):
+                try:
+                    # Outro worker pode ter concluído enquanto aguardávamos
+                    cached_result = await self.cache_repo.get_cached_analysis(cache_key, use_local=False)
+                    if cached_result and not self.cache_repo.is_stale(cached_result):
+                        return cached_result["result"]
+                    
+                    return await self._analyze_and_cache(
+                        cache_key, resume_content, job_content, job_analysis, user_id
+                    )
+                finally:
+                    await self.lease_repo.release_lease(cache_key, LEASE_OWNER)
+            
+            # Lease de outro worker: aguardar o resultado aparecer no cache
+            await asyncio.sleep(ai_settings.ANALYSIS_LEASE_POLL_SECONDS)
+            
+            cached_result = await self.cache_repo.get_cached_analysis(cache_key, use_local=False)
+            if cached_result and not self.cache_repo.is_stale(cached_result):
+                return cached_result["result"]
+            
+            if asyncio.get_running_loop().time() >= deadline:
+                logger.warning(f"Lease wait timed out for {cache_key}, computing locally")
+                return await self._analyze_and_cache(
+                    cache_key, resume_content, job_content, job_analysis, user_id
+                )
+    
+    def _schedule_analysis_refresh(self, cache_key: str, resume_content: str, job_content: str,
+                                   job_analysis: Optional[Dict[str, Any]] = None,
+                                   user_id: Optional[str] = None) -> None:
+        """Recalcular em background uma análise servida após o TTL suave (uma vez por chave)"""
+        if cache_key in _analysis_refreshes:
+            return
+        
+        async def refresh() -> None:
+            try:
+                # Outro processo pode já ter renovado a entrada
+                latest = await self.cache_repo.get_cached_analysis(cache_key, use_local=False)
+                if latest and not self.cache_repo.is_stale(latest):
+                    return
+                
+                # Uso de LLM do recálculo não entra no resumo da análise que serviu o valor antigo
+                with use_priority(PRIORITY_BULK), track_llm_usage():
+                    await _analysis_flights.do(
+                        cache_key,
+                        lambda: self._compute_analysis(
+                            cache_key, resume_content, job_content, job_analysis, user_id
+                        )
+                    )
+                stale_refresh_counter.inc(result="success")
+            except Exception as e:
+                stale_refresh_counter.inc(result="error")
+                logger.warning(f"Background refresh of analysis {cache_key} failed: {e}")
+            finally:
+                _analysis_refreshes.pop(cache_key, None)
+        
+        _analysis_refreshes[cache_key] = asyncio.create_task(refresh())
+    
+    async def _analyze_and_cache(self, cache_key: str, resume_content: str, job_content: str,
+                                 job_analysis: Optional[Dict[str, Any]] = None,
+                                 user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Processar com IA e armazenar em cache"""
+        detailed_analysis = await self._analyze_with_ai(resume_content, job_content, job_analysis, user_id)
+        
+        # Resultados de fallback e de triagem (sem LLM) não são cacheados
+        if not detailed_analysis.get("isFallback") and not detailed_analysis.get("screenedOut"):
+            await self.cache_repo.cache_analysis(cache_key, detailed_analysis, operation="compatibility")
+        
+        return detailed_analysis
+    
+    async def _analyze_with_ai(self, resume_content: str, job_content: str,
+                               job_analysis: Optional[Dict[str, Any]] = None,
+                               user_id: Optional[str] = None) -> Dict[str, Any]:
         """Analisar compatibilidade usando IA"""
         try:
-            # Análise do currículo
-            resume_analysis = await self.ai_service.analyze_resume(resume_content)
+            timeouts = ai_settings.STAGE_TIMEOUT_SECONDS
+            
+            async def get_job_analysis(_: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+                if job_analysis is not None:
+                    return job_analysis, self._stage_model("job_analysis", job_analysis)
+                return await self._get_job_analysis(job_content)
+            
+            # Currículo e vaga são independentes; compatibilidade depende de ambos
+            executor = StageGraphExecutor([
+                Stage(
+                    name="resume_analysis",
+                    func=lambda _: self._get_resume_analysis(resume_content, user_id),
+                    timeout=timeouts.get("resume_analysis")
+                ),
+                Stage(
+                    name="job_analysis",
+                    func=get_job_analysis,
+                    timeout=timeouts.get("job_analysis")
+                ),
+                Stage(
+                    name="pre_score",
+                    func=lambda deps: self._get_pre_score(
+                        deps["resume_analysis"][0], deps["job_analysis"][0]
+                    ),
+                    depends_on=["resume_analysis", "job_analysis"]
+                ),
+                Stage(
+                    name="compatibility",
+                    func=lambda deps: self._get_compatibility_analysis(
+                        deps["resume_analysis"][0], deps["job_analysis"][0], deps["pre_score"]
+                    ),
+                    depends_on=["resume_analysis", "job_analysis", "pre_score"],
+                    timeout=timeouts.get("compatibility")
+                )
+            ])
             
-            # Análise da vaga
-            job_analysis = await self.ai_service.analyze_job_description(job_content)
+            results, stage_timings = await executor.run()
+            pre_score = results.pop("pre_score")
             
-            # Análise de compatibilidade
-            compatibility_report = await self.ai_service.analyze_compatibility(
-                resume_analysis, job_analysis
-            )
+            # Modelo que atendeu cada estágio (None: resultado padrão; "local": triagem sem LLM)
+            stage_models = {name: model for name, (_, model) in results.items()}
+            analyses = {name: result for name, (result, _) in results.items()}
+            compatibility_report = analyses["compatibility"]
+            is_fallback = any(self.ai_service.is_fallback_result(result) for result in analyses.values())
             
             return {
                 "matchScore": compatibility_report["overallScore"],
-                "jobAnalysis": job_analysis,
-                "resumeAnalysis": resume_analysis,
+                "jobAnalysis": analyses["job_analysis"],
+                "resumeAnalysis": analyses["resume_analysis"],
                 "compatibilityReport": compatibility_report,
+                "preScore": pre_score.to_dict(),
+                "screenedOut": bool(compatibility_report.get("screenedOut")),
                 "processingTime": 0,  # Será calculado externamente
-                "aiModel": settings.OPENAI_MODEL,
-                "version": "1.0"
+                "stageTimings": stage_timings,
+                "stageModels": stage_models,
+                "aiModel": stage_models["compatibility"] or settings.OPENAI_MODEL,
+                "version": "1.0",
+                "isFallback": is_fallback
             }
             
         except Exception as e:
             logger.error(f"Error analyzing with AI: {e}")
             raise
     
-    def _generate_cache_key(self, resume_content: str, job_content: str) -> str:
-        """Gerar chave de cache para análise"""
-        combined_content = f"{resume_content}|{job_content}"
+    async def _get_pre_score(self, resume_analysis: Dict[str, Any],
+                             job_analysis: Dict[str, Any]) -> PreScore:
+        """Pré-score local (sem LLM)"""
+        return self.pre_scorer.score(resume_analysis, job_analysis)
+    
+    async def _get_compatibility_analysis(self, resume_analysis: Dict[str, Any],
+                                          job_analysis: Dict[str, Any],
+                                          pre_score: PreScore) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Compatibilidade via LLM (relatório e modelo); em lote, pré-score baixo é triado localmente"""
+        if current_priority() == PRIORITY_BULK:
+            # Pré-score sobre análises padrão não reflete o currículo: falhar (e retentar) em vez de triar
+            if (self.ai_service.is_fallback_result(resume_analysis)
+                    or self.ai_service.is_fallback_result(job_analysis)):
+                raise RuntimeError("Resume or job analysis unavailable, cannot screen compatibility")
+            if pre_score.match_score < ai_settings.BULK_PRE_SCORE_THRESHOLD:
+                return self.pre_scorer.build_screening_report(pre_score), "local"
+        
+        compatibility_report, model = await self.ai_service.analyze_compatibility(resume_analysis, job_analysis)
+        
+        if self.ai_service.is_fallback_result(compatibility_report):
+            # LLM indisponível: usar o score provisório em vez de zeros
+            compatibility_report["overallScore"] = pre_score.match_score
+            compatibility_report["categoryScores"] = dict(pre_score.category_scores)
+        else:
+            category_scores = compatibility_report.setdefault("categoryScores", {})
+            for category, score in pre_score.category_scores.items():
+                category_scores.setdefault(category, score)
+        
+        return compatibility_report, model
+    
+    async def _get_resume_analysis(self, resume_content: str,
+                                   user_id: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Análise do currículo (e modelo) com cache por conteúdo e por quase duplicado do mesmo usuário"""
+        cache_key = self._generate_stage_cache_key(
+            "resume_analysis", resume_content, ai_settings.RESUME_PROMPT_VERSION
+        )
+        
+        cached = await self.stage_cache_repo.get_stage_analysis("resume_analysis", cache_key)
+        if cached:
+            record_cache("resume_analysis", "hit")
+            return cached, self._stage_model("resume_analysis", cached)
+        
+        fingerprint = None
+        if user_id and ai_settings.RESUME_NEAR_DUPLICATE_ENABLED:
+            fingerprint = compute_fingerprint(resume_content)
+            if fingerprint.token_count < ai_settings.RESUME_NEAR_DUPLICATE_MIN_TOKENS:
+                fingerprint = None
+        
+        if fingerprint:
+            near_duplicate = await self._get_near_duplicate_resume_analysis(user_id, fingerprint)
+            if near_duplicate:
+                record_cache("resume_analysis", "near_duplicate")
+                return near_duplicate, self._stage_model("resume_analysis", near_duplicate)
+        
+        record_cache("resume_analysis", "miss")
+        resume_analysis, model = await self.ai_service.analyze_resume(resume_content)
+        if not self.ai_service.is_fallback_result(resume_analysis):
+            await self.stage_cache_repo.cache_stage_analysis(
+                "resume_analysis", cache_key, resume_analysis,
+                ttl_hours=ai_settings.RESUME_ANALYSIS_CACHE_TTL_HOURS
+            )
+            if fingerprint:
+                await self.fingerprint_repo.save_fingerprint(
+                    user_id, self._resume_fingerprint_scope(), fingerprint.hex,
+                    fingerprint.bands(), cache_key,
+                    ttl_hours=ai_settings.RESUME_ANALYSIS_CACHE_TTL_HOURS
+                )
+        
+        return resume_analysis, model
+    
+    async def _get_near_duplicate_resume_analysis(self, user_id: str,
+                                                  fingerprint: ResumeFingerprint) -> Optional[Dict[str, Any]]:
+        """Análise em cache do currículo mais próximo (SimHash) dentro da distância máxima"""
+        candidates = await self.fingerprint_repo.find_candidates(
+            user_id, self._resume_fingerprint_scope(), fingerprint.bands()
+        )
+        
+        ranked = sorted(
+            (fingerprint.distance(int(candidate["fingerprint"], 16)), candidate["cacheKey"])
+            for candidate in candidates
+        )
+        
+        for distance, cache_key in ranked:
+            if distance > ai_settings.RESUME_NEAR_DUPLICATE_MAX_DISTANCE:
+                break
+            
+            cached = await self.stage_cache_repo.get_stage_analysis("resume_analysis", cache_key)
+            if cached:
+                near_duplicate_counter.inc()
+                logger.info(f"Reusing resume analysis of near-duplicate (distance {distance})")
+                return cached
+        
+        return None
+    
+    def _resume_fingerprint_scope(self) -> str:
+        """Escopo das impressões digitais (versão do prompt + modelo, como na chave de estágio)"""
+        model = get_model_route("resume_analysis").model
+        return f"resume_analysis|{ai_settings.RESUME_PROMPT_VERSION}|{model}"
+    
+    async def _get_job_analysis(self, job_content: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Análise da vaga (e modelo) com cache por conteúdo"""
+        cache_key = self._generate_stage_cache_key(
+            "job_analysis", job_content, ai_settings.JOB_PROMPT_VERSION
+        )
+        
+        cached = await self.stage_cache_repo.get_stage_analysis("job_analysis", cache_key)
+        record_cache("job_analysis", "hit" if cached else "miss")
+        if cached:
+            return cached, self._stage_model("job_analysis", cached)
+        
+        # Aquecimento e análises da mesma vaga no processo compartilham a chamada
+        return await _job_analysis_flights.do(
+            cache_key, lambda: self._compute_job_analysis(cache_key, job_content)
+        )
+    
+    async def _compute_job_analysis(self, cache_key: str,
+                                    job_content: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        job_analysis, model = await self.ai_service.analyze_job_description(job_content)
+        if not self.ai_service.is_fallback_result(job_analysis):
+            await self.stage_cache_repo.cache_stage_analysis(
+                "job_analysis", cache_key, job_analysis,
+                ttl_hours=ai_settings.JOB_ANALYSIS_CACHE_TTL_HOURS
+            )
+        
+        return job_analysis, model
+    
+    def _stage_model(self, stage: str, result: Dict[str, Any]) -> Optional[str]:
+        """Modelo de um resultado já calculado (cache/lote): o modelo roteado da chave do estágio"""
+        if self.ai_service.is_fallback_result(result):
+            return None
+        return get_model_route(stage).model
+    
+    def _generate_stage_cache_key(self, stage: str, content: str, prompt_version: str) -> str:
+        """Gerar chave de cache de estágio (conteúdo canônico + versão do prompt + modelo roteado)"""
+        normalized_content = canonicalize_text(content)
+        model = get_model_route(stage).model
+        combined_content = f"{stage}|{prompt_version}|{model}|{normalized_content}"
         return hashlib.sha256(combined_content.encode()).hexdigest()
     
+    def _generate_cache_key(self, resume_content: str, job_content: str) -> str:
+        """Gerar chave de cache para análise (conteúdo canônico)"""
+        return content_hash(resume_content, job_content)
+    
     async def _handle_analysis_error(self, analysis_id: UUID, error_message: str) -> None:
         """Tratar erro na análise"""
         try:
@@ -396,32 +929,39 @@ class AnalysisService:
     async def get_analysis_statistics(self, user_id: UUID) -> Dict[str, Any]:
         """Obter estatísticas de análises do usuário"""
         try:
-            # Estatísticas do SQL
-            sql_stats = await self.analysis_repo.execute_query(
-                """
-                SELECT 
-                    COUNT(*) as total_analyses,
-                    COUNT(CASE WHEN Status = 'completed' THEN 1 END) as completed_analyses,
-                    COUNT(CASE WHEN Status = 'pending' THEN 1 END) as pending_analyses,
-                    COUNT(CASE WHEN Status = 'failed' THEN 1 END) as failed_analyses,
-                    AVG(CASE WHEN Status = 'completed' THEN MatchScore END) as average_score,
-                    MAX(CASE WHEN Status = 'completed' THEN MatchScore END) as best_score,
-                    AVG(CASE WHEN Status = 'completed' THEN ProcessingTimeMs END) as avg_processing_time
-                FROM CompatibilityAnalyses 
-                WHERE UserId = :user_id
-                """,
-                {"user_id": str(user_id)}
+            # Valor antigo servido enquanto uma recarga roda em background (stale-while-revalidate)
+            return await _dashboard_stats_cache.get_or_load(
+                f"analysis:{user_id}", lambda: self._load_analysis_statistics(user_id)
             )
             
-            # Estatísticas do MongoDB
-            mongo_stats = await self.mongo_repo.get_analysis_statistics(str(user_id))
-            
-            return {
-                "sql_stats": sql_stats[0] if sql_stats else {},
-                "mongo_stats": mongo_stats,
-                "generated_at": datetime.utcnow()
-            }
-            
         except Exception as e:
             logger.error(f"Error getting analysis statistics: {e}")
             return {}
+    
+    async def _load_analysis_statistics(self, user_id: UUID) -> Dict[str, Any]:
+        """Calcular estatísticas de análises do usuário (sem cache)"""
+        # Estatísticas do SQL
+        sql_stats = await self.analysis_repo.execute_query(
+            """
+            SELECT 
+                COUNT(*) as total_analyses,
+                COUNT(CASE WHEN Status = 'completed' THEN 1 END) as completed_analyses,
+                COUNT(CASE WHEN Status = 'pending' THEN 1 END) as pending_analyses,
+                COUNT(CASE WHEN Status = 'failed' THEN 1 END) as failed_analyses,
+                AVG(CASE WHEN Status = 'completed' THEN MatchScore END) as average_score,
+                MAX(CASE WHEN Status = 'completed' THEN MatchScore END) as best_score,
+                AVG(CASE WHEN Status = 'completed' THEN ProcessingTimeMs END) as avg_processing_time
+            FROM CompatibilityAnalyses 
+            WHERE UserId = :user_id
+            """,
+            {"user_id": str(user_id)}
+        )
+        
+        # Estatísticas do MongoDB
+        mongo_stats = await self.mongo_repo.get_analysis_statistics(str(user_id))
+        
+        return {
+            "sql_stats": sql_stats[0] if sql_stats else {},
+            "mongo_stats": mongo_stats,
+            "generated_at": datetime.utcnow()
+        }
@@ -0,0 +1,92 @@
+"""
+Manutenção do cache de análises
+Loop periódico que grava os hits acumulados pelo AIAnalysisCacheRepository
+(write-behind) e aplica o limite de capacidade, com flush final no encerramento
+"""
+from typing import Optional, Dict, Any
+import asyncio
+import logging
+
+from core.config import ai_settings
+from core.metrics import metrics
+from data.mongo_repository import AIAnalysisCacheRepository
+
+logger = logging.getLogger(__name__)
+
+pending_hits_gauge = metrics.gauge("ai_cache_pending_hit_keys", "Chaves com hits ainda não gravados")
+flushed_keys_counter = metrics.counter("ai_cache_hit_flushed_keys_total", "Chaves gravadas pelo flush de hits")
+evictions_counter = metrics.counter("ai_cache_evictions_total", "Entradas removidas pelo limite de capacidade")
+
+
+class CacheMaintenance:
+    """Flush dos hits e remoção LRU do cache de análises"""
+
+    def __init__(self, cache_repo: AIAnalysisCacheRepository,
+                 interval_seconds: float = ai_settings.CACHE_HIT_FLUSH_INTERVAL_SECONDS,
+                 max_entries: int = ai_settings.ANALYSIS_CACHE_MAX_ENTRIES):
+        self.cache_repo = cache_repo
+        self.interval_seconds = interval_seconds
+        self.max_entries = max_entries
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintenance_loop())
+
+    async def stop(self) -> None:
+        """Parar o loop e gravar os hits pendentes"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await self.flush_hits()
+
+    async def flush_hits(self) -> int:
+        flushed = await self.cache_repo.flush_hits()
+        flushed_keys_counter.inc(flushed)
+        pending_hits_gauge.set(AIAnalysisCacheRepository.pending_hit_keys())
+        return flushed
+
+    async def enforce_capacity(self) -> int:
+        """Remover entradas menos usadas acima de max_entries (0 = sem limite)"""
+        if self.max_entries <= 0:
+            return 0
+
+        evicted = await self.cache_repo.enforce_capacity(self.max_entries)
+        if evicted:
+            evictions_counter.inc(evicted)
+            logger.info(f"Evicted {evicted} least recently used analysis cache entries")
+        return evicted
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "pending_hit_keys": AIAnalysisCacheRepository.pending_hit_keys(),
+            "interval_seconds": self.interval_seconds,
+            "max_entries": self.max_entries
+        }
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                # Hits antes da remoção, para que lastUsedAt esteja atualizado
+                await self.flush_hits()
+                await self.enforce_capacity()
+            except Exception as e:
+                logger.error(f"Error in analysis cache maintenance: {e}")
+
+
+# Instância global (configurada no startup da aplicação)
+_cache_maintenance: Optional[CacheMaintenance] = None
+
+
+def get_cache_maintenance() -> Optional[CacheMaintenance]:
+    """Obter manutenção do cache do processo"""
+    return _cache_maintenance
+
+
+def set_cache_maintenance(maintenance: Optional[CacheMaintenance]) -> None:
+    """Registrar manutenção do cache do processo"""
+    global _cache_maintenance
+    _cache_maintenance = maintenance
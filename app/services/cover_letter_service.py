@@ -0,0 +1,96 @@
+"""
+Serviço de Cartas de Apresentação
+Lógica de negócio para geração de cartas de apresentação
+"""
+from typing import Dict, Any, AsyncIterator
+from uuid import UUID, uuid4
+from datetime import datetime
+import logging
+
+from schemas.requests.requests import CoverLetterCreateRequest
+from data.mongo_repository import CoverLetterMongoRepository, ActivityLogMongoRepository
+from services.ai_service import AIService
+from services.analysis_service import AnalysisService
+from services.model_router import get_model_route
+
+logger = logging.getLogger(__name__)
+
+
+class CoverLetterService:
+    """Serviço de cartas de apresentação"""
+
+    def __init__(self):
+        self.cover_letter_repo = CoverLetterMongoRepository()
+        self.activity_repo = ActivityLogMongoRepository()
+        self.analysis_service = AnalysisService()
+        self.ai_service = AIService()
+
+    async def stream_cover_letter(self, user_id: UUID,
+                                  request: CoverLetterCreateRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Gerar carta em streaming e persistir o documento final"""
+        resume_analysis, job_analysis = await self.analysis_service.get_stage_analyses(
+            user_id, request.resume_id, request.job_id
+        )
+
+        customizations = {
+            "tone": request.tone,
+            "length": request.length,
+            "focus_areas": request.focus_areas,
+            "custom_instructions": request.custom_instructions
+        }
+
+        content = None
+        async for event in self.ai_service.stream_cover_letter(
+            resume_analysis, job_analysis, customizations
+        ):
+            if event["event"] == "complete":
+                content = event["data"]
+                break
+
+            yield event
+
+        cover_letter_id = str(uuid4())
+        document = {
+            "coverLetterId": cover_letter_id,
+            "userId": str(user_id),
+            "resumeId": str(request.resume_id),
+            "jobId": str(request.job_id) if request.job_id else None,
+            "title": request.title,
+            "content": content,
+            "customizations": {
+                "tone": request.tone,
+                "length": request.length,
+                "focusAreas": request.focus_areas,
+                "companyResearch": {}
+            },
+            "editHistory": [],
+            "generatedBy": "ai",
+            "aiModel": get_model_route("cover_letter_stream").model,
+            "language": "pt-BR",
+            "wordCount": len(content.get("fullText", "").split())
+        }
+
+        await self.cover_letter_repo.create_cover_letter(document)
+
+        # Log da atividade
+        await self.activity_repo.log_activity({
+            "userId": str(user_id),
+            "action": "cover_letter_generated",
+            "resource": "cover_letter",
+            "resourceId": cover_letter_id,
+            "details": {
+                "resume_id": str(request.resume_id),
+                "job_id": str(request.job_id) if request.job_id else None,
+                "streamed": True
+            }
+        })
+
+        yield {
+            "event": "complete",
+            "data": {
+                "cover_letter_id": cover_letter_id,
+                "content": content,
+                "word_count": document["wordCount"],
+                "generated_at": datetime.utcnow().isoformat()
+            }
+        }
@@ -0,0 +1,107 @@
+"""
+Serviço de Arquivos
+Leitura de arquivos do Data Lake (Azure Blob Storage) e extração de texto
+"""
+from typing import Optional
+from uuid import UUID
+from xml.etree import ElementTree
+import asyncio
+import io
+import logging
+import os
+import zipfile
+
+from core.config import settings
+from data.sql_repository import DataLakeRepository
+from domain.entities.domain import DataLakeFile
+
+try:
+    from azure.storage.blob import BlobServiceClient
+except ImportError:  # pragma: no cover - dependência opcional
+    BlobServiceClient = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - dependência opcional
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+_DOCX_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def extract_text(data: bytes, filename: str) -> Optional[str]:
+    """Extrair texto do conteúdo do arquivo conforme a extensão (None se não suportado)"""
+    extension = os.path.splitext(filename)[1].lower()
+
+    if extension == ".txt":
+        return data.decode("utf-8", errors="replace")
+
+    if extension == ".docx":
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            document = ElementTree.fromstring(archive.read("word/document.xml"))
+        paragraphs = [
+            "".join(node.text or "" for node in paragraph.iter(f"{_DOCX_NAMESPACE}t"))
+            for paragraph in document.iter(f"{_DOCX_NAMESPACE}p")
+        ]
+        return "\n".join(paragraphs)
+
+    if extension == ".pdf":
+        if PdfReader is None:
+            raise RuntimeError("pypdf is required to extract text from PDF files")
+        reader = PdfReader(io.BytesIO(data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+    logger.warning(f"Text extraction not supported for {filename}")
+    return None
+
+
+class FileService:
+    """Serviço de arquivos do Data Lake"""
+
+    def __init__(self):
+        self.data_lake_repo = DataLakeRepository()
+        self._blob_client = None
+
+    def _get_blob_client(self):
+        if self._blob_client is None:
+            if BlobServiceClient is None:
+                raise RuntimeError("azure-storage-blob is required to read Data Lake files")
+            self._blob_client = BlobServiceClient.from_connection_string(settings.azure_connection_string)
+        return self._blob_client
+
+    def _download_sync(self, container: str, blob_path: str) -> bytes:
+        blob = self._get_blob_client().get_blob_client(container=container, blob=blob_path)
+        return blob.download_blob().readall()
+
+    async def _download(self, file_ref: DataLakeFile) -> bytes:
+        if file_ref.file_size and file_ref.file_size > settings.MAX_FILE_SIZE:
+            raise ValueError(f"File {file_ref.file_id} exceeds the maximum file size")
+
+        # SDK síncrono: download fora do event loop
+        data = await asyncio.to_thread(
+            self._download_sync,
+            file_ref.bucket_name or settings.AZURE_CONTAINER_NAME,
+            file_ref.storage_path
+        )
+        await self.data_lake_repo.record_file_access(file_ref.file_id)
+        return data
+
+    async def download_file(self, file_id: UUID) -> Optional[bytes]:
+        """Baixar conteúdo do arquivo (None se não encontrado)"""
+        file_ref = await self.data_lake_repo.get_file_reference(file_id)
+        if not file_ref:
+            return None
+        return await self._download(file_ref)
+
+    async def extract_text_from_file(self, file_id: UUID) -> Optional[str]:
+        """Baixar arquivo do Data Lake e extrair o texto"""
+        file_ref = await self.data_lake_repo.get_file_reference(file_id)
+        if not file_ref:
+            logger.warning(f"Data Lake file not found: {file_id}")
+            return None
+
+        data = await self._download(file_ref)
+
+        # Parsing de PDF/DOCX é CPU-bound
+        return await asyncio.to_thread(extract_text, data, file_ref.filename)
@@ -0,0 +1,142 @@
+"""
+Pré-aquecimento da análise de vagas
+Calcula e cacheia o estágio de vaga enquanto uma análise da vaga aguarda na fila e,
+periodicamente, para as vagas mais analisadas, para que as análises paguem só os
+estágios de currículo e compatibilidade. No ciclo periódico, um lease no MongoDB
+por vaga garante que um único processo a aqueça
+"""
+from typing import Optional, Dict, Any, List, Set, TYPE_CHECKING
+from uuid import UUID
+import asyncio
+import logging
+
+from core.config import ai_settings
+from core.metrics import metrics
+from data.mongo_repository import AnalysisLeaseMongoRepository, LEASE_OWNER
+from data.sql_repository import AnalysisRepository
+
+if TYPE_CHECKING:  # AnalysisService agenda o aquecimento (import circular em runtime)
+    from services.analysis_service import AnalysisService
+
+logger = logging.getLogger(__name__)
+
+warmed_counter = metrics.counter("job_warming_total", "Vagas pré-aquecidas por origem e resultado")
+
+
+class JobAnalysisWarmer:
+    """Aquecimento do cache de análise de vagas com orçamento de concorrência"""
+
+    def __init__(self, analysis_service: "AnalysisService",
+                 interval_seconds: float = ai_settings.JOB_WARMING_INTERVAL_SECONDS,
+                 top_n: int = ai_settings.JOB_WARMING_TOP_N,
+                 lookback_hours: int = ai_settings.JOB_WARMING_LOOKBACK_HOURS,
+                 concurrency: int = ai_settings.JOB_WARMING_CONCURRENCY):
+        self.analysis_service = analysis_service
+        self.analysis_repo = AnalysisRepository()
+        self.lease_repo = AnalysisLeaseMongoRepository()
+        self.interval_seconds = interval_seconds
+        self.top_n = top_n
+        self.lookback_hours = lookback_hours
+        self.concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._task: Optional[asyncio.Task] = None
+        # Vagas agendadas ou em aquecimento (evita trabalho duplicado)
+        self._pending: Set[UUID] = set()
+        self._scheduled: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._warming_loop())
+
+    async def stop(self) -> None:
+        tasks = [task for task in [self._task, *self._scheduled] if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._scheduled.clear()
+        self._pending.clear()
+
+    def schedule(self, job_id: UUID) -> None:
+        """Aquecer a vaga em background (ex: análise da vaga enfileirada)"""
+        if job_id in self._pending:
+            return
+
+        task = asyncio.create_task(self.warm_job(job_id, source="event"))
+        self._scheduled.add(task)
+        task.add_done_callback(self._scheduled.discard)
+
+    async def warm_job(self, job_id: UUID, source: str = "event") -> bool:
+        """Aquecer uma vaga dentro do orçamento de concorrência (True se calculada agora)"""
+        if job_id in self._pending:
+            return False
+
+        self._pending.add(job_id)
+        try:
+            async with self._semaphore:
+                warmed = await self.analysis_service.warm_job_analysis(job_id)
+            warmed_counter.inc(source=source, result="computed" if warmed else "cached")
+            return warmed
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            warmed_counter.inc(source=source, result="error")
+            logger.warning(f"Failed to warm job analysis for {job_id}: {e}")
+            return False
+        finally:
+            self._pending.discard(job_id)
+
+    async def warm_trending_jobs(self) -> int:
+        """Aquecer as top-N vagas por volume recente de análises; retorna as calculadas agora"""
+        job_ids: List[UUID] = await self.analysis_repo.get_trending_job_ids(self.lookback_hours, self.top_n)
+        results = await asyncio.gather(*(self._warm_trending_job(job_id) for job_id in job_ids))
+
+        warmed = sum(results)
+        if warmed:
+            logger.info(f"Warmed job analysis for {warmed} of {len(job_ids)} trending jobs")
+        return warmed
+
+    async def _warm_trending_job(self, job_id: UUID) -> bool:
+        """Aquecer a vaga se este processo obtiver o lease dela no ciclo"""
+        # Lease mantido até expirar (um ciclo): os demais processos pulam a vaga neste ciclo
+        lease_key = f"job_warming:{job_id}"
+        if not await self.lease_repo.acquire_lease(lease_key, LEASE_OWNER, int(self.interval_seconds)):
+            warmed_counter.inc(source="trending", result="leased")
+            return False
+
+        warmed = await self.warm_job(job_id, source="trending")
+        if not warmed:
+            # Já em cache ou falha: liberar para outro processo tentar no ciclo
+            await self.lease_repo.release_lease(lease_key, LEASE_OWNER)
+        return warmed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "pending_jobs": len(self._pending),
+            "interval_seconds": self.interval_seconds,
+            "top_n": self.top_n,
+            "concurrency": self.concurrency
+        }
+
+    async def _warming_loop(self) -> None:
+        while True:
+            try:
+                await self.warm_trending_jobs()
+            except Exception as e:
+                logger.error(f"Error warming trending job analyses: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Instância global (configurada no startup da aplicação)
+_job_warmer: Optional[JobAnalysisWarmer] = None
+
+
+def get_job_warmer() -> Optional[JobAnalysisWarmer]:
+    """Obter aquecedor de vagas do processo"""
+    return _job_warmer
+
+
+def set_job_warmer(warmer: Optional[JobAnalysisWarmer]) -> None:
+    """Registrar aquecedor de vagas do processo"""
+    global _job_warmer
+    _job_warmer = warmer
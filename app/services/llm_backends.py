@@ -0,0 +1,404 @@
+"""
+Backends de LLM
+Interface comum para provedores de LLM, implementação OpenAI e um backend
+local determinístico (latência configurável, injeção de erros/429 e contagem
+de tokens) para benchmarks e testes de carga sem chamadas externas
+"""
+from typing import Optional, List, Dict, Any, AsyncIterator
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+
+import openai
+
+from core.config import settings, ai_settings
+from services.prompt_builder import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMResponse:
+    """Resposta de uma chamada ao LLM"""
+    content: str
+    model: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+
+
+class LLMBackend(ABC):
+    """Interface dos provedores de LLM"""
+
+    name: str = "base"
+
+    @abstractmethod
+    async def complete(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                       temperature: float, top_p: float, operation: str = "default") -> LLMResponse:
+        """Gerar resposta completa"""
+
+    @abstractmethod
+    def stream(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+               temperature: float, top_p: float, operation: str = "default") -> AsyncIterator[str]:
+        """Gerar resposta em trechos de texto"""
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class OpenAIBackend(LLMBackend):
+    """Backend OpenAI (ChatCompletion)"""
+
+    name = "openai"
+
+    def __init__(self):
+        openai.api_key = settings.OPENAI_API_KEY
+
+    async def complete(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                       temperature: float, top_p: float, operation: str = "default") -> LLMResponse:
+        response = await openai.ChatCompletion.acreate(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p
+        )
+
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            content=response.choices[0].message.content.strip(),
+            model=getattr(response, "model", None) or model,
+            prompt_tokens=getattr(usage, "prompt_tokens", None) if usage else None,
+            completion_tokens=getattr(usage, "completion_tokens", None) if usage else None,
+            total_tokens=getattr(usage, "total_tokens", None) if usage else None
+        )
+
+    async def stream(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                     temperature: float, top_p: float, operation: str = "default") -> AsyncIterator[str]:
+        stream = await openai.ChatCompletion.acreate(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stream=True
+        )
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+
+            content = getattr(chunk.choices[0].delta, "content", None)
+            if content:
+                yield content
+
+
+class FakeLLMError(Exception):
+    """Erro injetado pelo backend local"""
+
+    def __init__(self, message: str, http_status: int = 500, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.http_status = http_status
+        self.headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+
+
+@dataclass
+class LatencyProfile:
+    """Distribuição log-normal da latência (mediana e dispersão)"""
+    median_seconds: float
+    sigma: float = 0.5
+    max_seconds: float = 120.0
+
+    def sample(self, rng: random.Random, scale: float = 1.0) -> float:
+        if self.median_seconds <= 0:
+            return 0.0
+        value = rng.lognormvariate(math.log(self.median_seconds * scale), self.sigma)
+        return min(value, self.max_seconds)
+
+
+LATENCY_PROFILES: Dict[str, LatencyProfile] = {
+    "instant": LatencyProfile(0.0),
+    "fast": LatencyProfile(0.05, sigma=0.3),
+    "realistic": LatencyProfile(4.0, sigma=0.6),
+    "slow": LatencyProfile(15.0, sigma=0.8)
+}
+
+# Latência relativa por operação (proporcional ao tamanho típico da resposta)
+_OPERATION_LATENCY_SCALE: Dict[str, float] = {
+    "resume_analysis": 2.0,
+    "job_analysis": 1.0,
+    "compatibility": 2.0,
+    "cover_letter": 2.5,
+    "cover_letter_stream": 2.5,
+    "skill_extraction": 0.5,
+    "improvement_suggestions": 0.8,
+    "market_trends": 1.5,
+    "interview_questions": 1.5
+}
+
+_SKILL_POOL = [
+    ("Python", "Programming Languages"), ("JavaScript", "Programming Languages"),
+    ("TypeScript", "Programming Languages"), ("Java", "Programming Languages"),
+    ("C#", "Programming Languages"), ("SQL", "Databases"), ("PostgreSQL", "Databases"),
+    ("MongoDB", "Databases"), ("React", "Frontend"), ("Node.js", "Backend"),
+    ("FastAPI", "Backend"), ("Docker", "DevOps"), ("Kubernetes", "DevOps"), ("AWS", "Cloud"),
+    ("Azure", "Cloud"), ("Git", "Tools"), ("Scrum", "Methodologies"),
+    ("Gestão de Projetos", "Soft Skills"), ("Comunicação", "Soft Skills"), ("Liderança", "Soft Skills")
+]
+
+
+class FakeLLMBackend(LLMBackend):
+    """Backend local determinístico: respostas JSON válidas por tipo de prompt"""
+
+    name = "fake"
+
+    def __init__(self, latency_profile: Optional[LatencyProfile] = None,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after_seconds: float = 1.0, seed: int = 0):
+        self.latency_profile = latency_profile or LATENCY_PROFILES["fast"]
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+    async def complete(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                       temperature: float, top_p: float, operation: str = "default") -> LLMResponse:
+        prompt = "\n".join(message["content"] for message in messages)
+        await self._simulate(operation)
+
+        content = self._render(operation, prompt)
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = min(count_tokens(content), max_tokens)
+        self._record(operation, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+        return LLMResponse(
+            content=content,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens
+        )
+
+    async def stream(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                     temperature: float, top_p: float, operation: str = "default") -> AsyncIterator[str]:
+        prompt = "\n".join(message["content"] for message in messages)
+        latency = self._sample_latency(operation)
+        self._maybe_fail(operation)
+
+        content = self._render(operation, prompt)
+        chunks = [content[i:i + 40] for i in range(0, len(content), 40)] or [""]
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            yield chunk
+
+        self._record(operation, prompt_tokens=count_tokens(prompt),
+                     completion_tokens=min(count_tokens(content), max_tokens))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"backend": self.name, "usage": self.usage}
+
+    async def _simulate(self, operation: str) -> None:
+        """Aguardar latência sorteada e injetar falhas"""
+        await asyncio.sleep(self._sample_latency(operation))
+        self._maybe_fail(operation)
+
+    def _sample_latency(self, operation: str) -> float:
+        return self.latency_profile.sample(self._rng, _OPERATION_LATENCY_SCALE.get(operation, 1.0))
+
+    def _maybe_fail(self, operation: str) -> None:
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            self._record(operation, rate_limited=1)
+            raise FakeLLMError("Rate limit exceeded", http_status=429, retry_after=self.retry_after_seconds)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self._record(operation, errors=1)
+            raise FakeLLMError("Injected backend error", http_status=500)
+
+    def _record(self, operation: str, **counts: int) -> None:
+        usage = self.usage.setdefault(operation, {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "errors": 0, "rate_limited": 0
+        })
+        if "prompt_tokens" in counts:
+            usage["calls"] += 1
+        for key, value in counts.items():
+            usage[key] += value
+
+    def _render(self, operation: str, prompt: str) -> str:
+        """Resposta determinística (mesmo prompt, mesma resposta)"""
+        digest = hashlib.sha256(f"{self.seed}|{operation}|{prompt}".encode()).hexdigest()
+        rng = random.Random(int(digest[:16], 16))
+
+        lowered = prompt.lower()
+        mentioned = [skill for skill in _SKILL_POOL if skill[0].lower() in lowered]
+        skills = mentioned or rng.sample(_SKILL_POOL, 5)
+
+        if operation == "cover_letter_stream":
+            return "\n\n".join([
+                "Assunto: Candidatura para a vaga",
+                "Prezados Senhores,",
+                f"Venho manifestar meu interesse na vaga, trazendo experiência com {skills[0][0]}.",
+                f"Atuei em projetos utilizando {', '.join(name for name, _ in skills[:3])}.",
+                "Fico à disposição para uma conversa.",
+                "Atenciosamente,\nCandidato"
+            ])
+
+        renderer = {
+            "resume_analysis": self._resume_analysis,
+            "job_analysis": self._job_analysis,
+            "compatibility": self._compatibility,
+            "cover_letter": self._cover_letter,
+            "skill_extraction": self._skill_extraction,
+            "improvement_suggestions": self._improvement_suggestions,
+            "market_trends": self._market_trends,
+            "interview_questions": self._interview_questions
+        }.get(operation)
+
+        payload = renderer(rng, skills) if renderer else {"result": "ok"}
+        return json.dumps(payload, ensure_ascii=False)
+
+    @staticmethod
+    def _resume_analysis(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        return {
+            "extractedSkills": [
+                {"name": name, "confidence": round(rng.uniform(0.6, 0.99), 2), "matched": True, "category": category}
+                for name, category in skills
+            ],
+            "experience": [
+                {
+                    "company": f"Empresa {rng.randint(1, 99)}",
+                    "position": rng.choice(["Desenvolvedor Junior", "Desenvolvedor Pleno", "Desenvolvedor Senior"]),
+                    "duration": f"{rng.randint(1, 6)} anos",
+                    "description": "Desenvolvimento de sistemas",
+                    "relevanceScore": round(rng.uniform(0.4, 0.95), 2)
+                }
+                for _ in range(rng.randint(1, 3))
+            ],
+            "education": [
+                {"institution": "Universidade ABC", "degree": "Bacharelado",
+                 "field": "Ciência da Computação", "year": str(rng.randint(2005, 2022))}
+            ],
+            "languages": ["Português", "Inglês"],
+            "certifications": rng.sample(["AWS Certified", "Scrum Master", "Azure Fundamentals"], 1)
+        }
+
+    @staticmethod
+    def _job_analysis(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        return {
+            "keyRequirements": [name for name, _ in skills[:5]],
+            "requiredSkills": sorted({category for _, category in skills}),
+            "experienceLevel": rng.choice(["Junior", "Pleno", "Senior"]),
+            "education": "Superior Completo",
+            "benefits": ["Vale Refeição", "Plano de Saúde"],
+            "companyInfo": {"name": "Empresa Exemplo", "industry": "Tecnologia", "size": "Médio Porte"}
+        }
+
+    @staticmethod
+    def _compatibility(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        scores = {key: round(rng.uniform(40, 95), 1) for key in ("skills", "experience", "education", "cultural")}
+        return {
+            "overallScore": round(sum(scores.values()) / len(scores), 1),
+            "categoryScores": scores,
+            "strengths": [f"Experiência com {skills[0][0]}"],
+            "weaknesses": [f"Pouca experiência com {skills[-1][0]}"],
+            "recommendations": [f"Destacar projetos com {skills[0][0]}"],
+            "improvementAreas": [
+                {"area": skills[-1][1], "priority": "medium", "suggestions": [f"Estudar {skills[-1][0]}"]}
+            ]
+        }
+
+    @staticmethod
+    def _cover_letter(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        body = [f"Atuei em projetos utilizando {', '.join(name for name, _ in skills[:3])}."]
+        return {
+            "subject": "Candidatura para a vaga",
+            "greeting": "Prezados Senhores,",
+            "introduction": "Venho manifestar meu interesse na vaga.",
+            "body": body,
+            "conclusion": "Fico à disposição para uma conversa.",
+            "signature": "Atenciosamente,\nCandidato",
+            "fullText": "\n\n".join(["Prezados Senhores,", "Venho manifestar meu interesse na vaga."] + body)
+        }
+
+    @staticmethod
+    def _skill_extraction(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        return {
+            "skills": [
+                {"name": name, "category": category, "confidence": round(rng.uniform(0.6, 0.99), 2)}
+                for name, category in skills
+            ]
+        }
+
+    @staticmethod
+    def _improvement_suggestions(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        return {"suggestions": [f"Adicionar mais detalhes sobre projetos com {name}" for name, _ in skills[:3]]}
+
+    @staticmethod
+    def _market_trends(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        return {
+            "marketDemand": {
+                name: {
+                    "demand": rng.choice(["low", "medium", "high"]),
+                    "growth": rng.choice(["stable", "increasing"]),
+                    "salaryRange": "R$ 8.000 - R$ 15.000",
+                    "opportunities": rng.randint(100, 2000)
+                }
+                for name, _ in skills[:3]
+            },
+            "emergingSkills": ["Docker", "Kubernetes", "Machine Learning"],
+            "industryInsights": ["Demanda crescente por automação"],
+            "recommendations": ["Desenvolver conhecimentos em cloud computing"]
+        }
+
+    @staticmethod
+    def _interview_questions(rng: random.Random, skills: List[tuple]) -> Dict[str, Any]:
+        return {
+            "questions": [
+                {
+                    "category": "Technical",
+                    "question": f"Como você utilizou {name} em um projeto recente?",
+                    "difficulty": rng.choice(["easy", "medium", "hard"]),
+                    "expectedAnswer": f"Exemplo prático com {name}"
+                }
+                for name, _ in skills[:3]
+            ]
+        }
+
+
+# Backend do processo (compartilhado por todas as instâncias de AIService)
+_llm_backend: Optional[LLMBackend] = None
+
+
+def create_llm_backend(name: Optional[str] = None) -> LLMBackend:
+    """Criar backend a partir da configuração (LLM_BACKEND)"""
+    name = name or ai_settings.LLM_BACKEND
+    if name == "fake":
+        return FakeLLMBackend(
+            latency_profile=LATENCY_PROFILES.get(ai_settings.LLM_FAKE_LATENCY_PROFILE, LATENCY_PROFILES["fast"]),
+            error_rate=ai_settings.LLM_FAKE_ERROR_RATE,
+            rate_limit_rate=ai_settings.LLM_FAKE_RATE_LIMIT_RATE,
+            seed=ai_settings.LLM_FAKE_SEED
+        )
+    if name != "openai":
+        logger.warning(f"Unknown LLM backend '{name}', using openai")
+    return OpenAIBackend()
+
+
+def get_llm_backend() -> LLMBackend:
+    """Obter backend do processo"""
+    global _llm_backend
+    if _llm_backend is None:
+        _llm_backend = create_llm_backend()
+    return _llm_backend
+
+
+def set_llm_backend(backend: Optional[LLMBackend]) -> None:
+    """Substituir backend do processo (benchmarks, testes)"""
+    global _llm_backend
+    _llm_backend = backend
@@ -0,0 +1,261 @@
+"""
+Governador de chamadas ao LLM
+Limites de requisições/tokens por minuto, concorrência adaptativa (AIMD)
+e filas de prioridade (interativo vs. lote)
+"""
+from typing import Optional, Dict, Any, Iterator
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import logging
+import time
+
+from core.config import ai_settings
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+_llm_priority: ContextVar[str] = ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+queue_depth_gauge = metrics.gauge("llm_governor_queue_depth", "Chamadas aguardando vaga por prioridade")
+in_flight_gauge = metrics.gauge("llm_governor_in_flight", "Chamadas ao LLM em andamento")
+concurrency_limit_gauge = metrics.gauge("llm_governor_concurrency_limit", "Limite atual de concorrência")
+wait_time_histogram = metrics.histogram("llm_governor_wait_seconds", "Tempo de espera por vaga")
+rate_limited_counter = metrics.counter("llm_rate_limited_total", "Respostas 429 do provedor")
+
+
+class LLMRateLimitedError(Exception):
+    """Provedor continua limitando após as retentativas (reprocessar mais tarde)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def current_priority() -> str:
+    """Prioridade das chamadas no contexto atual"""
+    return _llm_priority.get()
+
+
+@contextmanager
+def use_priority(priority: str) -> Iterator[None]:
+    """Definir prioridade das chamadas ao LLM no contexto (ex: análises em lote)"""
+    token = _llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        _llm_priority.reset(token)
+
+
+class TokenBucket:
+    """Bucket reabastecido continuamente a partir de um limite por minuto"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos até haver saldo para consumir amount"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def adjust(self, delta: float) -> None:
+        """Corrigir consumo estimado com o consumo real (pode gerar saldo negativo)"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class _Ticket:
+    """Pedido de vaga aguardando no governador"""
+
+    def __init__(self, priority: str, tokens: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+
+
+class LLMGovernor:
+    """Controle compartilhado de vazão e concorrência das chamadas ao LLM"""
+
+    def __init__(self,
+                 requests_per_minute: int = ai_settings.LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = ai_settings.LLM_TOKENS_PER_MINUTE,
+                 min_concurrency: int = ai_settings.LLM_MIN_CONCURRENCY,
+                 max_concurrency: int = ai_settings.LLM_MAX_CONCURRENCY,
+                 initial_concurrency: int = ai_settings.LLM_INITIAL_CONCURRENCY,
+                 latency_target: float = ai_settings.LLM_LATENCY_TARGET_SECONDS,
+                 interactive_weight: int = ai_settings.LLM_INTERACTIVE_WEIGHT):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(initial_concurrency)
+        self.latency_target = latency_target
+        self.interactive_weight = interactive_weight
+        self.in_flight = 0
+        self._lanes: Dict[str, deque] = {
+            PRIORITY_INTERACTIVE: deque(),
+            PRIORITY_BULK: deque()
+        }
+        self._interactive_streak = 0
+        self._cooldown_until = 0.0
+        self._condition = asyncio.Condition()
+        self._publish_metrics()
+
+    async def acquire(self, estimated_tokens: int, priority: Optional[str] = None) -> _Ticket:
+        """Aguardar vaga respeitando prioridade, concorrência e limites por minuto"""
+        priority = priority or current_priority()
+        if priority not in self._lanes:
+            priority = PRIORITY_INTERACTIVE
+
+        ticket = _Ticket(priority, estimated_tokens)
+
+        async with self._condition:
+            self._lanes[priority].append(ticket)
+            self._publish_metrics()
+
+            try:
+                while True:
+                    wait = self._wait_time(ticket)
+                    if wait == 0.0:
+                        break
+
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                self._lanes[priority].remove(ticket)
+                self._publish_metrics()
+                self._condition.notify_all()
+                raise
+
+            self._grant(ticket)
+
+        wait_time_histogram.observe(time.monotonic() - ticket.enqueued_at, priority=priority)
+        return ticket
+
+    async def release(self, ticket: _Ticket, latency: Optional[float] = None,
+                      actual_tokens: Optional[int] = None, rate_limited: bool = False,
+                      retry_after: Optional[float] = None) -> None:
+        """Liberar vaga e ajustar concorrência (AIMD) com o resultado da chamada"""
+        async with self._condition:
+            self.in_flight -= 1
+
+            if actual_tokens is not None:
+                self.token_bucket.adjust(actual_tokens - ticket.tokens)
+
+            if rate_limited:
+                self._on_rate_limited(retry_after)
+            elif latency is not None:
+                self._on_success(latency)
+
+            self._publish_metrics()
+            self._condition.notify_all()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Estado atual do governador"""
+        return {
+            "queue_depth": {lane: len(tickets) for lane, tickets in self._lanes.items()},
+            "in_flight": self.in_flight,
+            "concurrency_limit": round(self.concurrency_limit, 2),
+            "cooldown_seconds": max(0.0, round(self._cooldown_until - time.monotonic(), 2))
+        }
+
+    def _wait_time(self, ticket: _Ticket) -> Optional[float]:
+        """0 se o ticket pode ser liberado; senão segundos a aguardar (None = aguardar notificação)"""
+        if self._next_ticket() is not ticket:
+            return None
+        if self.in_flight >= int(self.concurrency_limit):
+            return None
+
+        return max(
+            0.0,
+            self._cooldown_until - time.monotonic(),
+            self.request_bucket.wait_time(1),
+            self.token_bucket.wait_time(ticket.tokens)
+        )
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        """Interativo tem prioridade; lote recebe uma vaga a cada N interativas"""
+        interactive = self._lanes[PRIORITY_INTERACTIVE]
+        bulk = self._lanes[PRIORITY_BULK]
+
+        if bulk and (not interactive or self._interactive_streak >= self.interactive_weight):
+            return bulk[0]
+        if interactive:
+            return interactive[0]
+        return None
+
+    def _grant(self, ticket: _Ticket) -> None:
+        self._lanes[ticket.priority].popleft()
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(ticket.tokens)
+        self.in_flight += 1
+
+        if ticket.priority == PRIORITY_INTERACTIVE:
+            self._interactive_streak += 1
+        else:
+            self._interactive_streak = 0
+
+        self._publish_metrics()
+        self._condition.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            # Latência alta: redução suave
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.9)
+        else:
+            # Aumento aditivo: +1 a cada "limite" sucessos
+            self.concurrency_limit = min(
+                self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit
+            )
+
+    def _on_rate_limited(self, retry_after: Optional[float]) -> None:
+        rate_limited_counter.inc()
+        # Redução multiplicativa
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+
+        if retry_after:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+
+        logger.warning(
+            f"LLM rate limited; concurrency limit reduced to {self.concurrency_limit:.1f}"
+            + (f", cooling down {retry_after:.1f}s" if retry_after else "")
+        )
+
+    def _publish_metrics(self) -> None:
+        for lane, tickets in self._lanes.items():
+            queue_depth_gauge.set(len(tickets), priority=lane)
+        in_flight_gauge.set(self.in_flight)
+        concurrency_limit_gauge.set(self.concurrency_limit)
+
+
+# Instância global do governador (compartilhada por todas as instâncias de AIService)
+_llm_governor: Optional[LLMGovernor] = None
+
+
+def get_llm_governor() -> LLMGovernor:
+    """Obter governador do processo"""
+    global _llm_governor
+    if _llm_governor is None:
+        _llm_governor = LLMGovernor()
+    return _llm_governor
@@ -0,0 +1,159 @@
+"""
+Resiliência das chamadas ao LLM
+Circuit breaker com sondagem half-open e latências por operação para hedging
+"""
+from typing import Optional, Dict, Any
+from collections import deque
+import logging
+import time
+
+from core.config import ai_settings
+from core.metrics import metrics
+from services.llm_governor import LLMRateLimitedError
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_HALF_OPEN = "half_open"
+CIRCUIT_OPEN = "open"
+
+_STATE_VALUES = {CIRCUIT_CLOSED: 0, CIRCUIT_HALF_OPEN: 1, CIRCUIT_OPEN: 2}
+
+circuit_state_gauge = metrics.gauge("llm_circuit_state", "Estado do circuito (0 fechado, 1 half-open, 2 aberto)")
+circuit_opened_counter = metrics.counter("llm_circuit_opened_total", "Aberturas do circuito")
+circuit_rejected_counter = metrics.counter("llm_circuit_rejected_total", "Chamadas recusadas com o circuito aberto")
+
+
+class CircuitOpenError(LLMRateLimitedError):
+    """Circuito aberto: provedor indisponível, reprocessar após retry_after"""
+
+
+class CircuitBreaker:
+    """Circuit breaker das chamadas ao provedor"""
+
+    def __init__(self,
+                 failure_threshold: int = ai_settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                 open_seconds: float = ai_settings.LLM_CIRCUIT_OPEN_SECONDS,
+                 half_open_probes: int = ai_settings.LLM_CIRCUIT_HALF_OPEN_PROBES):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._publish_state()
+
+    def before_call(self) -> bool:
+        """Autorizar chamada (CircuitOpenError se aberto); retorna True se for uma sondagem"""
+        if self.state == CIRCUIT_OPEN:
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                circuit_rejected_counter.inc()
+                raise CircuitOpenError("LLM circuit open", retry_after=remaining)
+            self._set_state(CIRCUIT_HALF_OPEN)
+
+        if self.state == CIRCUIT_HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                circuit_rejected_counter.inc()
+                raise CircuitOpenError("LLM circuit half-open, probe in flight", retry_after=1.0)
+            self._probes_in_flight += 1
+            return True
+
+        return False
+
+    def record_success(self, probe: bool = False) -> None:
+        """Chamada concluída: fecha o circuito após sondagem bem-sucedida"""
+        self._end_probe(probe)
+        self.consecutive_failures = 0
+        if self.state != CIRCUIT_CLOSED:
+            self._set_state(CIRCUIT_CLOSED)
+            logger.info("LLM circuit closed")
+
+    def record_failure(self, probe: bool = False) -> None:
+        """Falha do provedor (erro ou timeout); abre o circuito no limite ou na sondagem"""
+        self._end_probe(probe)
+        self.consecutive_failures += 1
+        if self.state == CIRCUIT_HALF_OPEN or (
+            self.state == CIRCUIT_CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._open()
+
+    def record_neutral(self, probe: bool = False) -> None:
+        """Chamada sem veredito (429, cancelamento): apenas libera a sondagem"""
+        self._end_probe(probe)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Estado atual do circuito"""
+        remaining = 0.0
+        if self.state == CIRCUIT_OPEN:
+            remaining = max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_seconds_remaining": round(remaining, 2)
+        }
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._set_state(CIRCUIT_OPEN)
+        circuit_opened_counter.inc()
+        logger.warning(
+            f"LLM circuit opened after {self.consecutive_failures} consecutive failures, "
+            f"failing fast for {self.open_seconds:.0f}s"
+        )
+
+    def _end_probe(self, probe: bool) -> None:
+        if probe:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        self._publish_state()
+
+    def _publish_state(self) -> None:
+        circuit_state_gauge.set(_STATE_VALUES[self.state])
+
+
+class LatencyTracker:
+    """Janela das últimas latências bem-sucedidas por operação"""
+
+    def __init__(self, window: int = ai_settings.LLM_HEDGE_WINDOW,
+                 min_samples: int = ai_settings.LLM_HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+
+    def observe(self, operation: str, latency: float) -> None:
+        self._samples.setdefault(operation, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, operation: str, quantile: float) -> Optional[float]:
+        """Percentil da operação (None enquanto não houver amostras suficientes)"""
+        samples = self._samples.get(operation)
+        if not samples or len(samples) < self.min_samples:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(quantile * len(ordered)))
+        return ordered[index]
+
+
+# Instâncias globais (compartilhadas por todas as instâncias de AIService)
+_circuit_breaker: Optional[CircuitBreaker] = None
+_latency_tracker: Optional[LatencyTracker] = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Obter circuit breaker do processo"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Obter janela de latências do processo"""
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = LatencyTracker()
+    return _latency_tracker
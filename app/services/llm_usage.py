@@ -0,0 +1,164 @@
+"""
+Uso do LLM
+Tokens, latência, custo, retentativas, falhas de parse e cache por operação:
+métricas do processo e resumo por análise (registrado no contexto da execução)
+"""
+from typing import Optional, Dict, Any, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from core.config import ai_settings
+from core.metrics import metrics
+
+call_latency_histogram = metrics.histogram(
+    "llm_call_latency_seconds", "Latência das chamadas ao LLM",
+    buckets=[0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0]
+)
+completion_tokens_histogram = metrics.histogram(
+    "llm_completion_tokens", "Tokens gerados por chamada",
+    buckets=[50, 100, 250, 500, 1000, 2000, 4000]
+)
+calls_counter = metrics.counter("llm_calls_total", "Chamadas ao LLM por resultado")
+tokens_counter = metrics.counter("llm_tokens_total", "Tokens consumidos (prompt/completion)")
+cost_counter = metrics.counter("llm_cost_usd_total", "Custo estimado em USD")
+retries_counter = metrics.counter("llm_retries_total", "Retentativas de chamadas ao LLM")
+parse_failures_counter = metrics.counter("llm_parse_failures_total", "Respostas com JSON inválido")
+cache_counter = metrics.counter("llm_cache_requests_total", "Consultas ao cache de análises por estágio")
+
+_current_usage: ContextVar[Optional["LLMUsageSummary"]] = ContextVar("llm_usage", default=None)
+
+
+@dataclass
+class OperationUsage:
+    """Uso acumulado de uma operação"""
+    calls: int = 0
+    failed_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: int = 0
+    cost_usd: float = 0.0
+    retries: int = 0
+    parse_failures: int = 0
+    models: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failedCalls": self.failed_calls,
+            "promptTokens": self.prompt_tokens,
+            "completionTokens": self.completion_tokens,
+            "latencyMs": self.latency_ms,
+            "costUsd": round(self.cost_usd, 6),
+            "retries": self.retries,
+            "parseFailures": self.parse_failures,
+            "models": dict(self.models)
+        }
+
+
+@dataclass
+class LLMUsageSummary:
+    """Resumo de uso do LLM de uma análise"""
+    operations: Dict[str, OperationUsage] = field(default_factory=dict)
+    cache: Dict[str, str] = field(default_factory=dict)
+
+    def operation(self, name: str) -> OperationUsage:
+        return self.operations.setdefault(name, OperationUsage())
+
+    def to_dict(self) -> Dict[str, Any]:
+        totals = OperationUsage()
+        for usage in self.operations.values():
+            totals.calls += usage.calls
+            totals.failed_calls += usage.failed_calls
+            totals.prompt_tokens += usage.prompt_tokens
+            totals.completion_tokens += usage.completion_tokens
+            totals.latency_ms += usage.latency_ms
+            totals.cost_usd += usage.cost_usd
+            totals.retries += usage.retries
+            totals.parse_failures += usage.parse_failures
+
+        summary = totals.to_dict()
+        summary.pop("models")
+        summary["cache"] = dict(self.cache)
+        summary["operations"] = {name: usage.to_dict() for name, usage in self.operations.items()}
+        return summary
+
+
+@contextmanager
+def track_llm_usage() -> Iterator[LLMUsageSummary]:
+    """Acumular o uso do LLM das chamadas feitas no contexto (inclui tarefas filhas)"""
+    summary = LLMUsageSummary()
+    token = _current_usage.set(summary)
+    try:
+        yield summary
+    finally:
+        _current_usage.reset(token)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Custo estimado em USD (LLM_MODEL_PRICES, por 1M de tokens; modelos sem preço custam 0)"""
+    prices = ai_settings.LLM_MODEL_PRICES.get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * prices["prompt"] + completion_tokens * prices["completion"]) / 1_000_000
+
+
+def record_call(operation: str, model: str, outcome: str, latency: Optional[float] = None,
+                prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None) -> None:
+    """Registrar uma chamada ao LLM (outcome: success, error, timeout, rate_limited, cancelled, circuit_open)"""
+    calls_counter.inc(operation=operation, model=model, outcome=outcome)
+
+    prompt_tokens = prompt_tokens or 0
+    completion_tokens = completion_tokens or 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    if latency is not None:
+        call_latency_histogram.observe(latency, operation=operation, model=model)
+    if outcome == "success":
+        completion_tokens_histogram.observe(completion_tokens, operation=operation, model=model)
+    if prompt_tokens:
+        tokens_counter.inc(prompt_tokens, operation=operation, model=model, kind="prompt")
+    if completion_tokens:
+        tokens_counter.inc(completion_tokens, operation=operation, model=model, kind="completion")
+    if cost:
+        cost_counter.inc(cost, operation=operation, model=model)
+
+    summary = _current_usage.get()
+    if summary is None:
+        return
+
+    usage = summary.operation(operation)
+    usage.calls += 1
+    usage.failed_calls += int(outcome != "success")
+    usage.prompt_tokens += prompt_tokens
+    usage.completion_tokens += completion_tokens
+    usage.latency_ms += int((latency or 0.0) * 1000)
+    usage.cost_usd += cost
+    usage.models[model] = usage.models.get(model, 0) + 1
+
+
+def record_retry(operation: str, reason: str) -> None:
+    """Registrar retentativa (reason: rate_limited, invalid_json)"""
+    retries_counter.inc(operation=operation, reason=reason)
+
+    summary = _current_usage.get()
+    if summary is not None:
+        summary.operation(operation).retries += 1
+
+
+def record_parse_failure(operation: str, model: str) -> None:
+    """Registrar resposta com JSON inválido"""
+    parse_failures_counter.inc(operation=operation, model=model)
+
+    summary = _current_usage.get()
+    if summary is not None:
+        summary.operation(operation).parse_failures += 1
+
+
+def record_cache(stage: str, result: str) -> None:
+    """Registrar consulta ao cache (result: hit, stale, miss, near_duplicate)"""
+    cache_counter.inc(stage=stage, result=result)
+
+    summary = _current_usage.get()
+    if summary is not None:
+        summary.cache[stage] = result
@@ -0,0 +1,54 @@
+"""
+Roteamento de Modelos
+Modelo, limite de tokens e temperatura por operação de IA
+"""
+from typing import Optional, Dict, Any
+from dataclasses import dataclass, replace
+
+from core.config import settings, ai_settings
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Parâmetros de chamada de uma operação"""
+    operation: str
+    model: str
+    max_tokens: int
+    temperature: float
+    fallback_model: Optional[str] = None
+    fallback_max_tokens: Optional[int] = None
+
+    def fallback(self) -> Optional["ModelRoute"]:
+        """Rota de nova tentativa (ex: resposta JSON inválida do modelo rápido ou cortada
+        pelo limite de tokens); None quando não mudaria nem o modelo nem o orçamento"""
+        model = self.fallback_model or self.model
+        max_tokens = max(self.max_tokens, self.fallback_max_tokens or 0)
+        if model == self.model and max_tokens == self.max_tokens:
+            return None
+        return replace(self, model=model, max_tokens=max_tokens,
+                       fallback_model=None, fallback_max_tokens=None)
+
+
+def _resolve_model(name: Optional[str]) -> str:
+    """Traduzir aliases ("default", "fast") para o nome do modelo"""
+    aliases = {
+        None: settings.OPENAI_MODEL,
+        "default": settings.OPENAI_MODEL,
+        "fast": ai_settings.LLM_FAST_MODEL
+    }
+    return aliases.get(name, name)
+
+
+def get_model_route(operation: str) -> ModelRoute:
+    """Rota configurada para a operação (LLM_MODEL_ROUTES), com padrões globais"""
+    config: Dict[str, Any] = ai_settings.LLM_MODEL_ROUTES.get(operation, {})
+    model = _resolve_model(config.get("model"))
+
+    return ModelRoute(
+        operation=operation,
+        model=model,
+        max_tokens=config.get("max_tokens", ai_settings.MAX_TOKENS),
+        temperature=config.get("temperature", ai_settings.TEMPERATURE),
+        fallback_model=_resolve_model(config.get("fallback_model", "default")),
+        fallback_max_tokens=config.get("fallback_max_tokens", ai_settings.MAX_TOKENS)
+    )
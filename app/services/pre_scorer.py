@@ -0,0 +1,305 @@
+"""
+Pré-score de Compatibilidade
+Score determinístico e vetorizado (NumPy) calculado a partir das análises de
+currículo e vaga, usado como score provisório e para triagem em lote
+"""
+from typing import Optional, List, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+import re
+
+import numpy as np
+
+from core.config import ai_settings
+from services.text_normalizer import normalize_skill_name
+
+logger = logging.getLogger(__name__)
+
+PRE_SCORE_VERSION = "1"
+
+# Níveis de senioridade (ordem crescente; termos já normalizados)
+EXPERIENCE_LEVELS: List[Tuple[int, Tuple[str, ...]]] = [
+    (5, ("gerente", "manager", "head", "diretor", "director")),
+    (4, ("especialista", "specialist", "lead", "lider", "staff", "principal", "arquiteto", "architect")),
+    (3, ("senior", "sr")),
+    (2, ("pleno", "mid", "middle", "intermediate")),
+    (1, ("junior", "jr", "entry")),
+    (0, ("estagio", "estagiario", "intern", "internship", "trainee", "aprendiz")),
+]
+
+# Níveis de escolaridade (ordem crescente; termos já normalizados)
+EDUCATION_LEVELS: List[Tuple[int, Tuple[str, ...]]] = [
+    (6, ("doutorado", "doutor", "phd", "doctorate")),
+    (5, ("mestrado", "mestre", "master", "msc", "mba")),
+    (4, ("pos-graduacao", "pos graduacao", "especializacao", "postgraduate")),
+    (3, ("superior", "graduacao", "graduado", "bacharel", "bacharelado", "licenciatura", "tecnologo",
+         "bachelor", "engenharia", "degree")),
+    (2, ("tecnico", "technical")),
+    (1, ("ensino medio", "high school")),
+]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9#+]+(?:\.[a-z0-9#+]+)*")
+_TOKEN_STOPWORDS = {"de", "da", "do", "e", "em", "com", "para", "and", "or", "of", "the", "with", "a", "o"}
+_YEARS_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:anos?|years?|yrs?)")
+_MONTHS_PATTERN = re.compile(r"(\d+)\s*(?:mes|meses|months?)")
+_YEAR_RANGE_PATTERN = re.compile(
+    r"((?:19|20)\d{2})\s*(?:-|–|a|ate|to)\s*((?:19|20)\d{2}|atual|presente|present|current|hoje)"
+)
+
+
+@dataclass
+class PreScore:
+    """Pré-score de compatibilidade"""
+    match_score: float
+    category_scores: Dict[str, float]
+    matched_requirements: List[str] = field(default_factory=list)
+    missing_requirements: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "matchScore": self.match_score,
+            "categoryScores": self.category_scores,
+            "matchedRequirements": self.matched_requirements,
+            "missingRequirements": self.missing_requirements,
+            "version": PRE_SCORE_VERSION
+        }
+
+
+class CompatibilityPreScorer:
+    """Pré-score vetorizado: cobertura de requisitos, senioridade e escolaridade"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = weights or ai_settings.PRE_SCORE_WEIGHTS
+
+    def score(self, resume_analysis: Dict[str, Any], job_analysis: Dict[str, Any]) -> PreScore:
+        """Pré-score de um currículo"""
+        return self.score_many([resume_analysis], job_analysis)[0]
+
+    def score_many(self, resume_analyses: List[Dict[str, Any]],
+                   job_analysis: Dict[str, Any]) -> List[PreScore]:
+        """Pré-score de vários currículos contra a mesma vaga"""
+        if not resume_analyses:
+            return []
+
+        requirements, weights = self._job_requirements(job_analysis)
+        skills, coverage = self._skill_scores(resume_analyses, requirements, weights)
+        experience = self._experience_scores(resume_analyses, job_analysis)
+        education = self._education_scores(resume_analyses, job_analysis)
+
+        overall = (
+            self.weights.get("skills", 0.0) * skills
+            + self.weights.get("experience", 0.0) * experience
+            + self.weights.get("education", 0.0) * education
+        ) / max(sum(self.weights.values()), 1e-9)
+
+        results = []
+        for index in range(len(resume_analyses)):
+            matched = [requirements[j] for j in np.flatnonzero(coverage[index] >= 1.0)]
+            missing = [requirements[j] for j in np.flatnonzero(coverage[index] < 1.0)]
+            results.append(PreScore(
+                match_score=round(float(overall[index]), 1),
+                category_scores={
+                    "skills": round(float(skills[index]), 1),
+                    "experience": round(float(experience[index]), 1),
+                    "education": round(float(education[index]), 1),
+                    # Aderência cultural não é estimável localmente (valor neutro)
+                    "cultural": 50.0
+                },
+                matched_requirements=matched,
+                missing_requirements=missing
+            ))
+
+        return results
+
+    def build_screening_report(self, pre_score: PreScore) -> Dict[str, Any]:
+        """Relatório de compatibilidade a partir do pré-score (triagem sem LLM)"""
+        strengths = []
+        if pre_score.matched_requirements:
+            strengths.append(f"Requisitos atendidos: {', '.join(pre_score.matched_requirements)}")
+
+        weaknesses = []
+        if pre_score.missing_requirements:
+            weaknesses.append(f"Requisitos não atendidos: {', '.join(pre_score.missing_requirements)}")
+
+        return {
+            "overallScore": pre_score.match_score,
+            "categoryScores": pre_score.category_scores,
+            "strengths": strengths,
+            "weaknesses": weaknesses,
+            "recommendations": [],
+            "improvementAreas": [
+                {"area": requirement, "priority": "high", "suggestions": []}
+                for requirement in pre_score.missing_requirements[:5]
+            ],
+            "screenedOut": True
+        }
+
+    def _job_requirements(self, job_analysis: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+        """Requisitos da vaga com pesos (principais decrescem de 1.0 a 0.6; demais 0.5)"""
+        requirements: List[str] = []
+        weights: List[float] = []
+        seen: set = set()
+
+        key_requirements = [r for r in job_analysis.get("keyRequirements", []) if isinstance(r, str)]
+        for position, requirement in enumerate(key_requirements):
+            key = normalize_skill_name(requirement)
+            if key and key not in seen:
+                seen.add(key)
+                requirements.append(requirement)
+                weights.append(1.0 - 0.4 * position / max(len(key_requirements), 1))
+
+        for requirement in job_analysis.get("requiredSkills", []):
+            if not isinstance(requirement, str):
+                continue
+            key = normalize_skill_name(requirement)
+            if key and key not in seen:
+                seen.add(key)
+                requirements.append(requirement)
+                weights.append(0.5)
+
+        return requirements, np.array(weights, dtype=np.float64)
+
+    def _skill_scores(self, resume_analyses: List[Dict[str, Any]], requirements: List[str],
+                      weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Cobertura ponderada e sobreposição de habilidades (matrizes currículo x token)"""
+        count = len(resume_analyses)
+        if not requirements:
+            # Vaga sem requisitos extraídos: score neutro
+            return np.full(count, 50.0), np.zeros((count, 0))
+
+        vocabulary: Dict[str, int] = {}
+        requirement_tokens = [self._tokens(requirement) for requirement in requirements]
+        for tokens in requirement_tokens:
+            for token in tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+
+        # Requisitos x tokens (linhas normalizadas pela quantidade de tokens)
+        requirement_matrix = np.zeros((len(requirements), len(vocabulary)))
+        for row, tokens in enumerate(requirement_tokens):
+            for token in tokens:
+                requirement_matrix[row, vocabulary[token]] = 1.0
+        token_counts = requirement_matrix.sum(axis=1, keepdims=True)
+        requirement_matrix = np.divide(
+            requirement_matrix, token_counts, out=np.zeros_like(requirement_matrix), where=token_counts > 0
+        )
+
+        # Currículos x tokens (maior confiança da habilidade que contém o token)
+        resume_matrix = np.zeros((count, len(vocabulary)))
+        for row, resume_analysis in enumerate(resume_analyses):
+            for skill in resume_analysis.get("extractedSkills", []):
+                if not isinstance(skill, dict) or not skill.get("name"):
+                    continue
+                confidence = skill.get("confidence")
+                confidence = 1.0 if confidence is None else float(confidence)
+                for token in self._tokens(skill["name"]):
+                    column = vocabulary.get(token)
+                    if column is not None:
+                        resume_matrix[row, column] = max(resume_matrix[row, column], confidence)
+
+        # Cobertura de cada requisito (média da confiança dos seus tokens)
+        coverage = resume_matrix @ requirement_matrix.T
+        presence = (resume_matrix > 0).astype(np.float64) @ requirement_matrix.T
+
+        weighted_coverage = np.clip(coverage, 0.0, 1.0) @ weights / weights.sum()
+        overlap = (presence >= 0.999).mean(axis=1)
+
+        scores = 100.0 * (0.7 * weighted_coverage + 0.3 * overlap)
+        return scores, np.where(presence >= 0.999, 1.0, presence)
+
+    def _experience_scores(self, resume_analyses: List[Dict[str, Any]],
+                           job_analysis: Dict[str, Any]) -> np.ndarray:
+        """Distância de senioridade (abaixo do exigido penaliza mais que acima)"""
+        job_level = self._match_level(job_analysis.get("experienceLevel"), EXPERIENCE_LEVELS)
+        resume_levels = np.array(
+            [self._resume_experience_level(resume) for resume in resume_analyses], dtype=np.float64
+        )
+
+        if job_level is None:
+            return np.full(len(resume_analyses), 70.0)
+
+        distance = resume_levels - job_level
+        scores = np.where(distance >= 0, 100.0 - 10.0 * distance, 100.0 + 30.0 * distance)
+        scores = np.where(np.isnan(resume_levels), 40.0, scores)
+        return np.clip(scores, 0.0, 100.0)
+
+    def _education_scores(self, resume_analyses: List[Dict[str, Any]],
+                          job_analysis: Dict[str, Any]) -> np.ndarray:
+        """Escolaridade exigida vs. maior escolaridade do currículo"""
+        job_level = self._match_level(job_analysis.get("education"), EDUCATION_LEVELS)
+        if job_level is None:
+            return np.full(len(resume_analyses), 100.0)
+
+        resume_levels = np.array([
+            max(
+                (level for level in (
+                    self._match_level(f"{item.get('degree', '')} {item.get('field', '')}", EDUCATION_LEVELS)
+                    for item in resume.get("education", []) if isinstance(item, dict)
+                ) if level is not None),
+                default=np.nan
+            )
+            for resume in resume_analyses
+        ], dtype=np.float64)
+
+        gap = job_level - resume_levels
+        scores = np.where(gap <= 0, 100.0, 100.0 - 25.0 * gap)
+        scores = np.where(np.isnan(resume_levels), 40.0, scores)
+        return np.clip(scores, 0.0, 100.0)
+
+    def _resume_experience_level(self, resume_analysis: Dict[str, Any]) -> float:
+        """Nível estimado pelos anos de experiência e pelos cargos"""
+        experience = [item for item in resume_analysis.get("experience", []) if isinstance(item, dict)]
+        if not experience:
+            return np.nan
+
+        years = sum(self._duration_years(item.get("duration", "")) for item in experience)
+        if years < 1:
+            level = 0
+        elif years < 3:
+            level = 1
+        elif years < 6:
+            level = 2
+        elif years < 10:
+            level = 3
+        else:
+            level = 4
+
+        title_levels = [
+            self._match_level(item.get("position"), EXPERIENCE_LEVELS) for item in experience
+        ]
+        return float(max([level] + [title for title in title_levels if title is not None]))
+
+    @staticmethod
+    def _duration_years(duration: Any) -> float:
+        """Converter duração textual ("2 anos", "6 meses", "2019 - atual") em anos"""
+        if not isinstance(duration, str):
+            return 0.0
+
+        text = normalize_skill_name(duration)
+        years = sum(float(value.replace(",", ".")) for value in _YEARS_PATTERN.findall(text))
+        years += sum(int(value) for value in _MONTHS_PATTERN.findall(text)) / 12.0
+
+        if not years:
+            current_year = datetime.utcnow().year
+            for start, end in _YEAR_RANGE_PATTERN.findall(text):
+                end_year = int(end) if end.isdigit() else current_year
+                years += max(0, end_year - int(start))
+
+        return years
+
+    @staticmethod
+    def _match_level(value: Any, levels: List[Tuple[int, Tuple[str, ...]]]) -> Optional[int]:
+        """Maior nível cujo termo aparece no texto"""
+        if not isinstance(value, str) or not value:
+            return None
+
+        text = f" {normalize_skill_name(value)} "
+        for level, terms in levels:
+            if any(re.search(rf"(?<![a-z0-9]){re.escape(term)}(?![a-z0-9])", text) for term in terms):
+                return level
+        return None
+
+    @staticmethod
+    def _tokens(value: str) -> List[str]:
+        tokens = _TOKEN_PATTERN.findall(normalize_skill_name(value))
+        return [token for token in tokens if token not in _TOKEN_STOPWORDS]
@@ -0,0 +1,277 @@
+"""
+Montagem de Prompts
+Serialização compacta, normalização de espaços, contagem de tokens e corte
+por seções de documentos longos dentro de um orçamento de tokens
+"""
+from typing import Optional, List, Dict, Any, Tuple
+from dataclasses import dataclass, field
+import json
+import logging
+import re
+
+from core.config import settings, ai_settings
+from core.metrics import metrics
+from services.text_normalizer import canonicalize_text, normalize_skill_name
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - dependência opcional
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+prompt_tokens_histogram = metrics.histogram(
+    "llm_prompt_tokens", "Tokens dos prompts enviados ao LLM",
+    buckets=[250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000]
+)
+prompt_trimmed_counter = metrics.counter("llm_prompt_trimmed_total", "Prompts com documentos cortados")
+
+TRIM_MARKER = "[...]"
+
+# Chaves internas que não devem ser enviadas ao LLM
+_INTERNAL_KEYS = {"isFallback", "stageTimings", "screenedOut", "preScore"}
+
+# Títulos de seção de currículos/vagas (normalizados, sem acentos) e prioridade no corte
+_SECTION_PRIORITIES: Dict[str, int] = {
+    "experiencia": 3, "experiencia profissional": 3, "experience": 3, "work experience": 3,
+    "habilidades": 3, "competencias": 3, "skills": 3, "requisitos": 3, "requirements": 3,
+    "qualificacoes": 3, "qualifications": 3, "responsabilidades": 3, "responsibilities": 3,
+    "description": 3, "descricao": 3,
+    "formacao": 2, "formacao academica": 2, "educacao": 2, "education": 2,
+    "certificacoes": 2, "certifications": 2, "idiomas": 2, "languages": 2,
+    "resumo": 2, "summary": 2, "objetivo": 2, "perfil": 2, "profile": 2,
+    "projetos": 2, "projects": 2, "position": 2,
+    "cursos": 1, "courses": 1, "beneficios": 1, "benefits": 1, "diferenciais": 1,
+    "atividades": 1, "voluntariado": 1, "volunteer": 1, "publicacoes": 1,
+    "interesses": 0, "hobbies": 0, "referencias": 0, "references": 0,
+}
+_DEFAULT_SECTION_PRIORITY = 2
+_SMALL_SECTION_TOKENS = 32
+
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder():
+    """Tokenizer do modelo configurado (None se tiktoken não estiver instalado ou não carregar)"""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded and tiktoken is not None:
+        _encoder_loaded = True
+        try:
+            try:
+                _encoder = tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+            except KeyError:
+                _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # Vocabulário baixado sob demanda; sem rede, usar a estimativa por caracteres
+            logger.warning(f"Tokenizer unavailable, estimating token counts: {e}")
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Contar tokens (tiktoken quando disponível; senão ~4 caracteres por token)"""
+    if not text:
+        return 0
+
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def normalize_whitespace(text: str) -> str:
+    """Remover indentação e espaços redundantes, mantendo quebras de parágrafo"""
+    lines = [re.sub(r"[ \t ]+", " ", line).strip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def compact_json(value: Any) -> str:
+    """JSON sem indentação e sem chaves internas"""
+    return json.dumps(_strip_internal_keys(value), ensure_ascii=False, separators=(",", ":"))
+
+
+def _strip_internal_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _strip_internal_keys(item)
+            for key, item in value.items() if key not in _INTERNAL_KEYS
+        }
+    if isinstance(value, list):
+        return [_strip_internal_keys(item) for item in value]
+    return value
+
+
+def trim_document(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Cortar documento por seções até caber no orçamento; retorna (texto, cortado)"""
+    if count_tokens(text) <= max_tokens:
+        return text, False
+
+    sections = _split_sections(text)
+
+    # 1. Descartar seções de menor prioridade enquanto não couber
+    for priority in range(0, 2):
+        if _sections_tokens(sections) <= max_tokens:
+            break
+        remaining = [
+            section for index, section in enumerate(sections)
+            if index == 0 or section["priority"] > priority
+        ]
+        if len(remaining) < len(sections):
+            sections = remaining
+
+    # 2. Cortar seções grandes proporcionalmente (seções curtas são mantidas inteiras)
+    total = _sections_tokens(sections)
+    if total > max_tokens:
+        small_tokens = sum(
+            section["tokens"] for section in sections if section["tokens"] <= _SMALL_SECTION_TOKENS
+        )
+        ratio = max(max_tokens - small_tokens, 0) / max(total - small_tokens, 1)
+        for section in sections:
+            if section["tokens"] > _SMALL_SECTION_TOKENS:
+                section["lines"] = _trim_lines(section["lines"], int(section["tokens"] * ratio))
+
+    result = "\n".join(line for section in sections for line in section["lines"])
+
+    # 3. Garantia final (documentos sem estrutura de seções)
+    while count_tokens(result) > max_tokens and len(result) > len(TRIM_MARKER):
+        cut = int(len(result) * max_tokens / count_tokens(result) * 0.95)
+        result = result[:max(cut, 0)].rstrip() + f"\n{TRIM_MARKER}"
+        if cut <= 0:
+            break
+
+    return result, True
+
+
+def _split_sections(text: str) -> List[Dict[str, Any]]:
+    """Dividir documento em seções pelos títulos reconhecidos"""
+    sections: List[Dict[str, Any]] = [{"priority": 3, "lines": []}]
+
+    for line in text.splitlines():
+        heading = _heading_priority(line)
+        if heading is not None:
+            sections.append({"priority": heading, "lines": [line]})
+        else:
+            sections[-1]["lines"].append(line)
+
+    for section in sections:
+        section["tokens"] = count_tokens("\n".join(section["lines"]))
+
+    return [section for section in sections if section["lines"]]
+
+
+def _heading_priority(line: str) -> Optional[int]:
+    """Prioridade se a linha for um título de seção"""
+    candidate = line.strip().rstrip(":").strip()
+    if not candidate or len(candidate) > 40:
+        return None
+
+    key = normalize_skill_name(candidate)
+    if key in _SECTION_PRIORITIES:
+        return _SECTION_PRIORITIES[key]
+
+    # Títulos em caixa alta curtos (ex: "CURSOS COMPLEMENTARES")
+    if candidate.isupper() and len(candidate.split()) <= 4:
+        first_word = key.split()[0] if key else ""
+        return _SECTION_PRIORITIES.get(first_word, _DEFAULT_SECTION_PRIORITY)
+    return None
+
+
+def _sections_tokens(sections: List[Dict[str, Any]]) -> int:
+    return sum(section["tokens"] for section in sections)
+
+
+def _trim_lines(lines: List[str], budget: int) -> List[str]:
+    """Manter linhas do início até o orçamento da seção"""
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        tokens = count_tokens(line) + 1
+        if kept and used + tokens > budget:
+            kept.append(TRIM_MARKER)
+            break
+        kept.append(line)
+        used += tokens
+    return kept
+
+
+@dataclass
+class BuiltPrompt:
+    """Prompt montado e contagem de tokens por parte"""
+    text: str
+    operation: str
+    token_counts: Dict[str, int] = field(default_factory=dict)
+    total_tokens: int = 0
+    trimmed: bool = False
+
+
+class PromptBuilder:
+    """Montagem de prompts com orçamento de tokens"""
+
+    def __init__(self, operation: str, budget_tokens: Optional[int] = None):
+        self.operation = operation
+        self.budget_tokens = budget_tokens or ai_settings.PROMPT_TOKEN_BUDGET
+        self._parts: List[Dict[str, Any]] = []
+
+    def add_text(self, text: str, name: str = "instructions") -> "PromptBuilder":
+        """Instruções (espaços normalizados)"""
+        self._parts.append({"name": name, "text": normalize_whitespace(text)})
+        return self
+
+    def add_json(self, label: str, value: Any, name: Optional[str] = None) -> "PromptBuilder":
+        """Dados estruturados em JSON compacto"""
+        self._parts.append({"name": name or label, "text": f"{label}:\n{compact_json(value)}"})
+        return self
+
+    def add_document(self, label: str, text: str, max_tokens: Optional[int] = None,
+                     name: Optional[str] = None) -> "PromptBuilder":
+        """Documento do usuário (currículo, vaga), cortado por seções se exceder o orçamento"""
+        self._parts.append({
+            "name": name or label,
+            "label": label,
+            "text": canonicalize_text(text),
+            "max_tokens": max_tokens,
+            "trimmable": True
+        })
+        return self
+
+    def build(self) -> BuiltPrompt:
+        """Montar prompt respeitando o orçamento total e os limites por documento"""
+        fixed_tokens = sum(count_tokens(part["text"]) for part in self._parts if not part.get("trimmable"))
+        documents = [part for part in self._parts if part.get("trimmable")]
+        available = max(self.budget_tokens - fixed_tokens, 0)
+        document_tokens = {id(part): count_tokens(part["text"]) for part in documents}
+        total_document_tokens = sum(document_tokens.values())
+        trimmed = False
+
+        for part in documents:
+            limit = part["max_tokens"] or available
+            if total_document_tokens > available:
+                # Orçamento dividido proporcionalmente ao tamanho de cada documento
+                share = int(available * document_tokens[id(part)] / max(total_document_tokens, 1))
+                limit = min(limit, share)
+
+            part["text"], was_trimmed = trim_document(part["text"], limit)
+            trimmed = trimmed or was_trimmed
+
+        texts = []
+        token_counts: Dict[str, int] = {}
+        for part in self._parts:
+            text = f"{part['label']}:\n{part['text']}" if part.get("trimmable") else part["text"]
+            texts.append(text)
+            token_counts[part["name"]] = token_counts.get(part["name"], 0) + count_tokens(text)
+
+        prompt_text = "\n\n".join(texts)
+        total_tokens = count_tokens(prompt_text)
+
+        prompt_tokens_histogram.observe(total_tokens, operation=self.operation)
+        if trimmed:
+            prompt_trimmed_counter.inc(operation=self.operation)
+            logger.info(f"Prompt for {self.operation} trimmed to {total_tokens} tokens")
+
+        return BuiltPrompt(
+            text=prompt_text,
+            operation=self.operation,
+            token_counts=token_counts,
+            total_tokens=total_tokens,
+            trimmed=trimmed
+        )
@@ -0,0 +1,90 @@
+"""
+Impressão Digital de Currículos
+SimHash de 64 bits sobre o texto normalizado, para reaproveitar análises de
+currículos quase duplicados (datas alteradas, pequenas correções)
+"""
+from typing import Optional, List
+from dataclasses import dataclass
+import hashlib
+import re
+
+import numpy as np
+
+from core.config import ai_settings
+from services.text_normalizer import fold_text
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9#+]+")
+_DIGITS_PATTERN = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class ResumeFingerprint:
+    """SimHash do currículo e número de tokens considerados"""
+    value: int
+    token_count: int
+
+    @property
+    def hex(self) -> str:
+        return f"{self.value:016x}"
+
+    def bands(self, band_count: Optional[int] = None) -> List[str]:
+        """Faixas do hash para busca de candidatos ("índice:valor")
+
+        Com distância máxima d e d + 1 faixas, dois hashes a até d bits de
+        distância coincidem em pelo menos uma faixa.
+        """
+        band_count = band_count or ai_settings.RESUME_NEAR_DUPLICATE_MAX_DISTANCE + 1
+        width = SIMHASH_BITS // band_count
+        bands = []
+        for index in range(band_count):
+            bits = width if index < band_count - 1 else SIMHASH_BITS - width * index
+            band = (self.value >> (width * index)) & ((1 << bits) - 1)
+            bands.append(f"{index}:{band:x}")
+        return bands
+
+    def distance(self, other: int) -> int:
+        """Distância de Hamming para outro hash"""
+        return bin(self.value ^ other).count("1")
+
+
+def normalize_resume_text(text: str) -> List[str]:
+    """Tokens do currículo sem acentos/caixa e com números mascarados (datas, telefones)"""
+    folded, _ = fold_text(text)
+    return _TOKEN_PATTERN.findall(_DIGITS_PATTERN.sub("0", folded))
+
+
+def compute_fingerprint(text: str) -> ResumeFingerprint:
+    """SimHash ponderado pelos shingles de palavras do currículo"""
+    tokens = normalize_resume_text(text)
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [
+            " ".join(tokens[index:index + SHINGLE_SIZE])
+            for index in range(len(tokens) - SHINGLE_SIZE + 1)
+        ]
+
+    if not shingles:
+        return ResumeFingerprint(value=0, token_count=0)
+
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+            for shingle in shingles
+        ),
+        dtype=np.dtype("<u8"),
+        count=len(shingles)
+    )
+
+    # Matriz shingles x 64 bits; cada bit do SimHash é o voto majoritário
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+
+    value = 0
+    for bit in np.flatnonzero(votes > 0):
+        value |= 1 << int(bit)
+
+    return ResumeFingerprint(value=value, token_count=len(tokens))
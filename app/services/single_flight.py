@@ -0,0 +1,54 @@
+"""
+Single-flight
+Coalesce chamadas concorrentes com a mesma chave em uma única execução
+"""
+from typing import Dict, Any, Callable, Awaitable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Registro em processo de execuções em andamento por chave"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Quantidade de chaves em execução"""
+        return len(self._calls)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Executar func uma única vez por chave; chamadores concorrentes aguardam o mesmo resultado"""
+        future = self._calls.get(key)
+        while future is not None:
+            logger.debug(f"Joining in-flight call for key {key}")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Cancelamento do líder não é do seguidor: assumir a chave (ou aguardar o novo líder)
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                logger.debug(f"Leader cancelled for key {key}, retrying")
+            future = self._calls.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        # Evitar aviso de exceção não recuperada quando não há outros chamadores
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+
+        try:
+            result = await func()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
@@ -0,0 +1,404 @@
+"""
+Extrator Local de Habilidades
+Reconhece habilidades do catálogo (nomes e aliases) com um autômato
+Aho-Corasick, deixando para o LLM apenas os trechos desconhecidos
+"""
+from typing import Optional, List, Dict, Any, Tuple, Iterator
+from dataclasses import dataclass, field
+from collections import deque
+from uuid import UUID, uuid4
+import asyncio
+import logging
+import re
+import time
+
+from core.config import ai_settings
+from domain.entities.domain import Skill, UserSkill
+from data.sql_repository import SkillRepository
+from services.text_normalizer import fold_text, normalize_skill_name
+
+logger = logging.getLogger(__name__)
+
+# Aliases conhecidos (nome normalizado do catálogo -> variações)
+DEFAULT_ALIASES: Dict[str, List[str]] = {
+    "javascript": ["js", "ecmascript"],
+    "typescript": ["ts"],
+    "python": ["python3", "py"],
+    "kubernetes": ["k8s"],
+    "postgresql": ["postgres", "psql"],
+    "sql server": ["mssql", "ms sql server", "microsoft sql server"],
+    "amazon web services": ["aws"],
+    "aws": ["amazon web services"],
+    "google cloud platform": ["gcp", "google cloud"],
+    "microsoft azure": ["azure"],
+    "machine learning": ["ml", "aprendizado de maquina"],
+    "inteligencia artificial": ["ia", "artificial intelligence"],
+    "c#": ["csharp", "c sharp"],
+    "go": ["golang"],
+    "node.js": ["node"],
+    "react": ["react.js", "reactjs"],
+    "vue.js": ["vue"],
+    "angular": ["angularjs", "angular.js"],
+    ".net": ["dotnet", "asp.net"],
+    "gestao de projetos": ["gerenciamento de projetos", "project management"],
+    "metodologias ageis": ["agile", "scrum", "kanban"],
+    "ci/cd": ["continuous integration", "integracao continua"],
+}
+
+_LIST_SEPARATORS = re.compile(r"[,;|•·▪●/]")
+_BULLET_PREFIX = re.compile(r"^\s*[-*•·▪●]\s*")
+_SECTION_HEADER = re.compile(
+    r"^\s*(skills|habilidades|competências|competencias|tecnologias|ferramentas|technologies|tools)\s*:",
+    re.IGNORECASE
+)
+_MIN_VARIANT_LENGTH = 4
+_STOPWORDS = {
+    "e", "de", "da", "do", "em", "com", "para", "and", "or", "the", "with", "etc",
+    "outros", "others", "entre", "outras"
+}
+
+
+@dataclass
+class _PatternEntry:
+    """Padrão reconhecido pelo autômato"""
+    pattern: str
+    skill_id: UUID
+    name: str
+    category: Optional[str]
+    is_canonical: bool
+
+
+class AhoCorasickAutomaton:
+    """Autômato Aho-Corasick sobre caracteres"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[_PatternEntry]] = [[]]
+
+    def add(self, entry: _PatternEntry) -> None:
+        state = 0
+        for char in entry.pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(entry)
+
+    def build(self) -> None:
+        """Calcular links de falha (BFS)"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, _PatternEntry]]:
+        """Gerar (início, fim, entrada) para cada ocorrência"""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            for entry in self._output[state]:
+                yield index - len(entry.pattern) + 1, index + 1, entry
+
+
+@dataclass
+class SkillMatch:
+    """Habilidade do catálogo encontrada no texto"""
+    skill_id: UUID
+    name: str
+    category: Optional[str]
+    confidence: float
+    occurrences: int
+    spans: List[Tuple[int, int]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "category": self.category or "Uncategorized",
+            "confidence": round(self.confidence, 2),
+            "skillId": str(self.skill_id),
+            "source": "catalog"
+        }
+
+
+@dataclass
+class SkillExtractionResult:
+    """Resultado da extração local"""
+    matches: List[SkillMatch]
+    unknown_spans: List[str]
+
+
+class SkillExtractor:
+    """Extrator de habilidades baseado no catálogo"""
+
+    def __init__(self, skills: List[Skill], version: str = "",
+                 aliases: Optional[Dict[str, List[str]]] = None):
+        self.version = version
+        self.automaton = AhoCorasickAutomaton()
+
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+        catalog = [(normalize_skill_name(skill.name), skill) for skill in skills]
+        catalog = [(canonical, skill) for canonical, skill in catalog if canonical]
+        self.skill_count = len(catalog)
+
+        # Nomes canônicos primeiro: um alias ("scrum" de metodologias ágeis) não toma o nome de outra habilidade
+        seen: set = set()
+        for canonical, skill in catalog:
+            if canonical not in seen:
+                seen.add(canonical)
+                self._add_pattern(canonical, skill, is_canonical=True)
+
+        for canonical, skill in catalog:
+            variants = self._derived_variants(canonical)
+            variants += [normalize_skill_name(alias) for alias in aliases.get(canonical, [])]
+            for pattern in variants:
+                if pattern and pattern not in seen:
+                    seen.add(pattern)
+                    self._add_pattern(pattern, skill, is_canonical=False)
+
+        self.automaton.build()
+
+    def _add_pattern(self, pattern: str, skill: Skill, is_canonical: bool) -> None:
+        self.automaton.add(_PatternEntry(
+            pattern=pattern,
+            skill_id=skill.skill_id,
+            name=skill.name,
+            category=skill.category,
+            is_canonical=is_canonical
+        ))
+
+    def extract(self, text: str) -> SkillExtractionResult:
+        """Extrair habilidades conhecidas e trechos candidatos desconhecidos"""
+        folded, positions = fold_text(text)
+        list_lines = self._skill_list_lines(text)
+
+        # Ocorrências com fronteira de palavra
+        candidates = [
+            (start, end, entry)
+            for start, end, entry in self.automaton.iter_matches(folded)
+            if self._is_word_boundary(folded, start - 1) and self._is_word_boundary(folded, end)
+        ]
+
+        # Resolver sobreposições: mais à esquerda e mais longa
+        candidates.sort(key=lambda item: (item[0], -(item[1] - item[0])))
+        selected = []
+        last_end = -1
+        for start, end, entry in candidates:
+            if start >= last_end:
+                selected.append((start, end, entry))
+                last_end = end
+
+        matches: Dict[UUID, SkillMatch] = {}
+        for start, end, entry in selected:
+            original_start = positions[start]
+            original_end = positions[end - 1] + 1
+            in_skill_list = any(start <= original_start < end for start, end in list_lines)
+            confidence = self._confidence(entry, text[original_start:original_end], in_skill_list)
+
+            match = matches.get(entry.skill_id)
+            if match is None:
+                match = SkillMatch(
+                    skill_id=entry.skill_id,
+                    name=entry.name,
+                    category=entry.category,
+                    confidence=confidence,
+                    occurrences=0
+                )
+                matches[entry.skill_id] = match
+
+            match.occurrences += 1
+            match.confidence = max(match.confidence, confidence)
+            match.spans.append((original_start, original_end))
+
+        results = []
+        for match in matches.values():
+            # Bônus por repetição
+            match.confidence = min(0.99, match.confidence + 0.02 * (match.occurrences - 1))
+            if match.confidence >= ai_settings.SKILL_EXTRACTOR_MIN_CONFIDENCE:
+                results.append(match)
+
+        results.sort(key=lambda match: (-match.confidence, match.name))
+        covered = [span for match in results for span in match.spans]
+
+        return SkillExtractionResult(
+            matches=results,
+            unknown_spans=self._find_unknown_spans(text, covered)
+        )
+
+    def to_user_skills(self, user_id: UUID, matches: List[SkillMatch]) -> List[UserSkill]:
+        """Converter habilidades encontradas em UserSkill (origem: análise de currículo)"""
+        return [
+            UserSkill(
+                user_skill_id=uuid4(),
+                user_id=user_id,
+                skill_id=match.skill_id,
+                proficiency_level=ai_settings.SKILL_EXTRACTOR_DEFAULT_PROFICIENCY,
+                source="resume_analysis"
+            )
+            for match in matches
+        ]
+
+    @staticmethod
+    def _derived_variants(name: str) -> List[str]:
+        """Variações automáticas (node.js -> nodejs, node js; ci/cd -> ci cd)"""
+        variants: List[str] = []
+        if "." in name:
+            variants.append(name.replace(".", ""))
+            variants.append(name.replace(".", " ").strip())
+            if name.endswith(".js"):
+                variants.append(name[:-3])
+        if "-" in name or "/" in name:
+            variants.append(re.sub(r"[-/]", " ", name))
+            variants.append(re.sub(r"[-/]", "", name))
+        # Variações curtas são palavras comuns (".net" -> "net")
+        return [
+            variant for variant in variants
+            if len(variant) >= _MIN_VARIANT_LENGTH and variant not in _STOPWORDS
+        ]
+
+    @staticmethod
+    def _is_word_boundary(text: str, index: int) -> bool:
+        if index < 0 or index >= len(text):
+            return True
+        return not text[index].isalnum()
+
+    @staticmethod
+    def _confidence(entry: _PatternEntry, original: str, in_skill_list: bool = False) -> float:
+        """Heurística: nome canônico > alias; termos curtos exigem grafia compatível ou lista de habilidades"""
+        confidence = 0.92 if entry.is_canonical else 0.8
+
+        if len(entry.pattern) <= 2:
+            # "R", "Go", "JS": ambíguos quando em minúsculas ("I go to work")
+            if not original.islower():
+                confidence -= 0.1
+            elif in_skill_list:
+                confidence -= 0.45 if len(entry.pattern) == 1 else 0.35
+            else:
+                confidence = 0.3
+
+        return confidence
+
+    @staticmethod
+    def _split_list_line(line: str) -> Optional[List[Tuple[int, int]]]:
+        """Itens (início, fim) se a linha é uma lista ou seção de habilidades; None para prosa"""
+        content_start = 0
+        header = _SECTION_HEADER.match(line)
+        if header:
+            content_start = header.end()
+        elif not _LIST_SEPARATORS.search(line) and not _BULLET_PREFIX.match(line):
+            return None
+
+        bullet = _BULLET_PREFIX.match(line, content_start)
+        if bullet:
+            content_start = bullet.end()
+
+        items = []
+        item_start = content_start
+        for separator in list(_LIST_SEPARATORS.finditer(line, content_start)) + [None]:
+            item_end = separator.start() if separator else len(line)
+            items.append((item_start, item_end))
+            if separator:
+                item_start = separator.end()
+
+        # Linhas em prosa têm itens longos: ignorar
+        short_items = [item for item in items if len(line[item[0]:item[1]].split()) <= 4]
+        if not header and len(short_items) < 0.6 * len(items):
+            return None
+        return short_items
+
+    @classmethod
+    def _skill_list_lines(cls, text: str) -> List[Tuple[int, int]]:
+        """Intervalos das linhas que são listas ou seções de habilidades"""
+        ranges = []
+        offset = 0
+        for line in text.splitlines(keepends=True):
+            if cls._split_list_line(line) is not None:
+                ranges.append((offset, offset + len(line)))
+            offset += len(line)
+        return ranges
+
+    @classmethod
+    def _find_unknown_spans(cls, text: str, covered: List[Tuple[int, int]]) -> List[str]:
+        """Itens de listas/seções de habilidades não reconhecidos pelo catálogo"""
+        spans: List[str] = []
+        seen: set = set()
+        offset = 0
+
+        for line in text.splitlines(keepends=True):
+            line_start = offset
+            offset += len(line)
+
+            items = cls._split_list_line(line)
+            if items is None:
+                continue
+
+            for item_start, item_end in items:
+                raw = line[item_start:item_end]
+                candidate = raw.strip(" \t\r\n.:-()")
+                if not (2 <= len(candidate) <= 40) or not any(c.isalpha() for c in candidate):
+                    continue
+                if candidate.lower() in _STOPWORDS:
+                    continue
+
+                absolute_start = line_start + item_start
+                absolute_end = line_start + item_end
+                if any(start < absolute_end and end > absolute_start for start, end in covered):
+                    continue
+
+                key = candidate.casefold()
+                if key not in seen:
+                    seen.add(key)
+                    spans.append(candidate)
+
+                if len(spans) >= ai_settings.SKILL_EXTRACTOR_MAX_UNKNOWN_SPANS:
+                    return spans
+
+        return spans
+
+
+# Instância global (reconstruída quando o catálogo muda)
+_skill_extractor: Optional[SkillExtractor] = None
+_catalog_checked_at: float = 0.0
+_catalog_lock: Optional[asyncio.Lock] = None
+
+
+async def get_skill_extractor() -> SkillExtractor:
+    """Obter extrator do processo, reconstruindo se a versão do catálogo mudou"""
+    global _skill_extractor, _catalog_checked_at, _catalog_lock
+
+    now = time.monotonic()
+    if _skill_extractor and now - _catalog_checked_at < ai_settings.SKILL_CATALOG_REFRESH_SECONDS:
+        return _skill_extractor
+
+    if _catalog_lock is None:
+        _catalog_lock = asyncio.Lock()
+
+    async with _catalog_lock:
+        if _skill_extractor and time.monotonic() - _catalog_checked_at < ai_settings.SKILL_CATALOG_REFRESH_SECONDS:
+            return _skill_extractor
+
+        skill_repo = SkillRepository()
+        version = await skill_repo.get_catalog_version()
+
+        if _skill_extractor is None or _skill_extractor.version != version:
+            skills = await skill_repo.get_active_skills()
+            _skill_extractor = SkillExtractor(skills, version=version)
+            logger.info(f"Skill extractor built with {_skill_extractor.skill_count} skills (version {version})")
+
+        _catalog_checked_at = time.monotonic()
+        return _skill_extractor
@@ -0,0 +1,138 @@
+"""
+Normalização de Texto
+Forma canônica de currículos e vagas, usada nas chaves de cache e nos prompts
+(mesmo conteúdo, mesma chave; menos tokens sem perda de informação)
+"""
+from typing import List, Dict, Any, Tuple
+import hashlib
+import re
+import unicodedata
+
+# Caracteres invisíveis ou de formatação (zero-width, BOM, hífen condicional)
+_INVISIBLE_CHARS = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff\u00ad"), None)
+
+# Espaços Unicode (NBSP, thin space etc.) tratados como espaço simples
+_SPACE_PATTERN = re.compile(r"[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]+")
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+# Linhas sem conteúdo informativo: paginação e títulos genéricos do documento
+_BOILERPLATE_PATTERNS = [
+    re.compile(r"^(?:p[áa]gina|page|p[áa]g\.?)\s*\d+(?:\s*(?:de|of|/)\s*\d+)?$", re.IGNORECASE),
+    re.compile(r"^(?:[-–—]\s*\d{1,3}\s*[-–—]|\d{1,3}\s*/\s*\d{1,3})$"),
+    re.compile(r"^(?:curriculum\s+vitae|curr[íi]culo(?:\s+vitae)?|r[ée]sum[ée]|cv)$", re.IGNORECASE),
+]
+
+# Campos da vaga em ordem estável (coluna, rótulo, bloco)
+JOB_RECORD_FIELDS: List[Tuple[str, str, bool]] = [
+    ("CompanyName", "Company", False),
+    ("Industry", "Industry", False),
+    ("Title", "Position", False),
+    ("Description", "Description", True),
+    ("Requirements", "Requirements", True),
+    ("Benefits", "Benefits", True),
+]
+
+
+def canonicalize_text(text: str) -> str:
+    """Forma canônica: NFC, quebras de linha e espaços unificados, sem cabeçalhos/rodapés
+
+    A função é idempotente: aplicá-la a um texto já canônico não o altera.
+    """
+    if not text:
+        return ""
+
+    text = unicodedata.normalize("NFC", text).translate(_INVISIBLE_CHARS)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    pages = [_normalize_lines(page) for page in text.split("\f")]
+    lines = _strip_page_furniture(pages)
+    lines = [line for line in lines if not _is_boilerplate(line)]
+
+    return _BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip()
+
+
+def canonicalize_job_record(job: Dict[str, Any]) -> str:
+    """Texto canônico da vaga com campos em ordem fixa (campos vazios omitidos)"""
+    inline: List[str] = []
+    blocks: List[str] = []
+
+    for column, label, is_block in JOB_RECORD_FIELDS:
+        value = canonicalize_text(str(job.get(column) or ""))
+        if not value:
+            continue
+        if is_block:
+            blocks.append(f"{label}:\n{value}")
+        else:
+            inline.append(f"{label}: {value}")
+
+    return "\n\n".join(part for part in ["\n".join(inline), *blocks] if part)
+
+
+def content_hash(*parts: str) -> str:
+    """SHA-256 do conteúdo canônico das partes"""
+    combined = "|".join(canonicalize_text(part) for part in parts)
+    return hashlib.sha256(combined.encode()).hexdigest()
+
+
+def fold_text(text: str) -> Tuple[str, List[int]]:
+    """Minúsculas, sem acentos e com espaços colapsados; retorna também o mapa de posições"""
+    chars: List[str] = []
+    positions: List[int] = []
+    previous_space = True
+
+    for index, char in enumerate(text):
+        if char.isspace():
+            if previous_space:
+                continue
+            chars.append(" ")
+            positions.append(index)
+            previous_space = True
+            continue
+
+        decomposed = unicodedata.normalize("NFKD", char)
+        base = next((c for c in decomposed if not unicodedata.combining(c)), char)
+        chars.append(base.lower()[0])
+        positions.append(index)
+        previous_space = False
+
+    return "".join(chars), positions
+
+
+def normalize_skill_name(name: str) -> str:
+    """Forma normalizada de um nome de habilidade"""
+    return fold_text(name)[0].strip()
+
+
+def _normalize_lines(page: str) -> List[str]:
+    return [_SPACE_PATTERN.sub(" ", line).strip() for line in page.split("\n")]
+
+
+def _strip_page_furniture(pages: List[List[str]]) -> List[str]:
+    """Remover cabeçalhos/rodapés repetidos entre páginas (mantém a primeira ocorrência)"""
+    if len(pages) < 2:
+        return pages[0] if pages else []
+
+    edge_counts: Dict[str, int] = {}
+    for page in pages:
+        content = [line for line in page if line]
+        for line in {*content[:2], *content[-2:]}:
+            edge_counts[line] = edge_counts.get(line, 0) + 1
+
+    repeated = {line for line, count in edge_counts.items() if count >= 2}
+
+    lines: List[str] = []
+    seen = set()
+    for page in pages:
+        for line in page:
+            if line in repeated:
+                if line in seen:
+                    continue
+                seen.add(line)
+            lines.append(line)
+        lines.append("")
+
+    return lines
+
+
+def _is_boilerplate(line: str) -> bool:
+    return bool(line) and any(pattern.match(line) for pattern in _BOILERPLATE_PATTERNS)
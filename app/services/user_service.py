@@ -5,11 +5,13 @@ Lógica de negócio para gerenciamento de usuários
 from typing import Optional, Dict, Any
 from uuid import UUID, uuid4
 from datetime import datetime, timedelta
+from dataclasses import asdict
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import logging
 
 from core.config import settings
+from core.shared_cache import TieredCache
 from domain.entities.domain import User, SubscriptionType
 from schemas.requests.requests import UserRegisterRequest, UserLoginRequest, UserUpdateRequest
 from schemas.responses.responses import UserProfileResponse, TokenResponse
@@ -18,6 +20,10 @@ from data.mongo_repository import UserPreferencesMongoRepository, ActivityLogMon
 
 logger = logging.getLogger(__name__)
 
+# Perfis de usuários ativos (sem o hash da senha) e estatísticas, compartilhados entre processos
+_user_cache = TieredCache("user")
+_dashboard_stats_cache = TieredCache("dashboard_stats")
+
 
 class UserService:
     """Serviço de usuários"""
@@ -130,6 +136,7 @@ class UserService:
             
             # Atualizar último login
             await self.user_repo.update_last_login(user.user_id)
+            await _user_cache.invalidate(str(user.user_id))
             
             # Criar tokens
             access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -168,7 +175,7 @@ class UserService:
     async def get_user_profile(self, user_id: UUID) -> Optional[UserProfileResponse]:
         """Obter perfil do usuário"""
         try:
-            user = await self.user_repo.get_user_by_id(user_id)
+            user = await self._get_active_user(user_id)
             if not user:
                 return None
             
@@ -209,6 +216,8 @@ class UserService:
             success = await self.user_repo.update_user(user_id, updates)
             
             if success:
+                await _user_cache.invalidate(str(user_id))
+                
                 # Log da atividade
                 await self.activity_repo.log_activity({
                     "userId": str(user_id),
@@ -235,7 +244,8 @@ class UserService:
             if user_id is None:
                 return None
             
-            # Verificar se usuário ainda existe e está ativo
+            # Verificar se usuário ainda existe e está ativo (sempre no banco: desativações
+            # valem na hora em todos os workers)
             user = await self.user_repo.get_user_by_id(UUID(user_id))
             if not user or not user.is_active:
                 return None
@@ -266,7 +276,8 @@ class UserService:
             if user_id is None or email is None:
                 return None
             
-            # Verificar se usuário ainda existe e está ativo
+            # Verificar se usuário ainda existe e está ativo (sempre no banco: desativações
+            # valem na hora em todos os workers)
             user = await self.user_repo.get_user_by_id(UUID(user_id))
             if not user or not user.is_active:
                 return None
@@ -315,6 +326,8 @@ class UserService:
             })
             
             if success:
+                await _user_cache.invalidate(str(user_id))
+                
                 # Log da atividade
                 await self.activity_repo.log_activity({
                     "userId": str(user_id),
@@ -330,6 +343,20 @@ class UserService:
             logger.error(f"Error changing password: {e}")
             raise
     
+    async def _get_active_user(self, user_id: UUID) -> Optional[User]:
+        """Buscar usuário ativo para exibição (cache compartilhado; o hash da senha não é armazenado)
+
+        Não usar para autenticação: o L1 de outros workers pode servir o usuário até o TTL
+        """
+        cached = await _user_cache.get(str(user_id))
+        if cached is not None:
+            return User(**{**cached, "subscription_type": SubscriptionType(cached["subscription_type"])})
+        
+        user = await self.user_repo.get_user_by_id(user_id)
+        if user:
+            await _user_cache.set(str(user_id), {**asdict(user), "password_hash": ""})
+        return user
+    
     async def _create_default_preferences(self, user_id: str) -> None:
         """Criar preferências padrão para novo usuário"""
         try:
@@ -381,27 +408,34 @@ class UserService:
     async def get_user_statistics(self, user_id: UUID) -> Dict[str, Any]:
         """Obter estatísticas do usuário"""
         try:
-            # Estatísticas de atividade
-            activity_stats = await self.activity_repo.get_activity_statistics(str(user_id))
-            
-            # Estatísticas básicas do SQL
-            basic_stats = await self.user_repo.execute_query(
-                """
-                SELECT 
-                    (SELECT COUNT(*) FROM Resumes WHERE UserId = :user_id) as total_resumes,
-                    (SELECT COUNT(*) FROM CompatibilityAnalyses WHERE UserId = :user_id) as total_analyses,
-                    (SELECT COUNT(*) FROM CoverLetters WHERE UserId = :user_id) as total_cover_letters,
-                    (SELECT AVG(MatchScore) FROM CompatibilityAnalyses WHERE UserId = :user_id) as avg_match_score
-                """,
-                {"user_id": str(user_id)}
+            # Valor antigo servido enquanto uma recarga roda em background (stale-while-revalidate)
+            return await _dashboard_stats_cache.get_or_load(
+                f"user:{user_id}", lambda: self._load_user_statistics(user_id)
             )
             
-            return {
-                "basic_stats": basic_stats[0] if basic_stats else {},
-                "activity_stats": activity_stats,
-                "generated_at": datetime.utcnow()
-            }
-            
         except Exception as e:
             logger.error(f"Error getting user statistics: {e}")
             return {}
+    
+    async def _load_user_statistics(self, user_id: UUID) -> Dict[str, Any]:
+        """Calcular estatísticas do usuário (sem cache)"""
+        # Estatísticas de atividade
+        activity_stats = await self.activity_repo.get_activity_statistics(str(user_id))
+        
+        # Estatísticas básicas do SQL
+        basic_stats = await self.user_repo.execute_query(
+            """
+            SELECT 
+                (SELECT COUNT(*) FROM Resumes WHERE UserId = :user_id) as total_resumes,
+                (SELECT COUNT(*) FROM CompatibilityAnalyses WHERE UserId = :user_id) as total_analyses,
+                (SELECT COUNT(*) FROM CoverLetters WHERE UserId = :user_id) as total_cover_letters,
+                (SELECT AVG(MatchScore) FROM CompatibilityAnalyses WHERE UserId = :user_id) as avg_match_score
+            """,
+            {"user_id": str(user_id)}
+        )
+        
+        return {
+            "basic_stats": basic_stats[0] if basic_stats else {},
+            "activity_stats": activity_stats,
+            "generated_at": datetime.utcnow()
+        }
@@ -0,0 +1,85 @@
+"""
+Conexões do processo
+Registro de um engine do SQL Server e um cliente do MongoDB por processo,
+criados no lifespan e compartilhados por todos os repositórios
+"""
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+import logging
+
+from core.config import settings, db_settings
+from data.payload_codec import validate_codec_settings
+
+logger = logging.getLogger(__name__)
+
+_sql_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_mongo_client: Optional[AsyncIOMotorClient] = None
+
+
+def get_sql_engine() -> Engine:
+    """Engine do processo (criado sob demanda fora do lifespan, ex: scripts)"""
+    global _sql_engine
+    if _sql_engine is None:
+        _sql_engine = create_engine(
+            settings.sql_connection_string,
+            pool_size=db_settings.SQL_POOL_SIZE,
+            max_overflow=db_settings.SQL_MAX_OVERFLOW,
+            pool_timeout=db_settings.SQL_POOL_TIMEOUT,
+            pool_recycle=db_settings.SQL_POOL_RECYCLE,
+            echo=settings.DEBUG
+        )
+    return _sql_engine
+
+
+def get_session_factory() -> sessionmaker:
+    """Fábrica de sessões ligada ao engine do processo"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_sql_engine())
+    return _session_factory
+
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    """Cliente MongoDB do processo (pool dimensionado por DatabaseSettings)"""
+    global _mongo_client
+    if _mongo_client is None:
+        _mongo_client = AsyncIOMotorClient(
+            settings.MONGO_URL,
+            minPoolSize=db_settings.MONGO_MIN_POOL_SIZE,
+            maxPoolSize=db_settings.MONGO_MAX_POOL_SIZE,
+            maxIdleTimeMS=db_settings.MONGO_MAX_IDLE_TIME
+        )
+    return _mongo_client
+
+
+async def init_connections() -> None:
+    """Criar engine e cliente do processo (startup) e testar o MongoDB"""
+    validate_codec_settings()
+    get_sql_engine()
+    get_session_factory()
+
+    try:
+        await get_mongo_client().admin.command('ping')
+        logger.info("Connected to MongoDB successfully")
+    except Exception as e:
+        logger.error(f"Failed to connect to MongoDB: {e}")
+        raise
+
+
+async def close_connections() -> None:
+    """Fechar cliente e pool do processo (shutdown)"""
+    global _sql_engine, _session_factory, _mongo_client
+
+    if _mongo_client is not None:
+        _mongo_client.close()
+        _mongo_client = None
+        logger.info("Disconnected from MongoDB")
+
+    if _sql_engine is not None:
+        _sql_engine.dispose()
+        _sql_engine = None
+        _session_factory = None
@@ -4,12 +4,19 @@ Camada de acesso a dados para MongoDB
 """
 from typing import List, Optional, Dict, Any
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
-from pymongo.errors import PyMongoError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError, DuplicateKeyError
 import logging
+import os
+import socket
 
-from core.config import settings
+from core.config import settings, ai_settings
+from core.local_cache import get_local_cache
+from core.shared_cache import get_shared_cache
+from data.connections import get_mongo_client
+from data.payload_codec import encode_fields, decode_fields, LazyDocument
 from domain.entities.domain import (
     DetailedAnalysis, CoverLetterDocument, UserPreferences
 )
@@ -25,33 +32,29 @@ class MongoRepository:
         self.database: AsyncIOMotorDatabase = None
     
     async def connect(self):
-        """Conectar ao MongoDB"""
-        try:
-            self.client = AsyncIOMotorClient(settings.MONGO_URL)
-            self.database = self.client[settings.MONGO_DATABASE]
-            
-            # Testar conexão
-            await self.client.admin.command('ping')
-            logger.info("Connected to MongoDB successfully")
-            
-        except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
-            raise
+        """Usar o cliente MongoDB do processo (criado e testado no lifespan)"""
+        self.client = get_mongo_client()
+        self.database = self.client[settings.MONGO_DATABASE]
     
     async def disconnect(self):
-        """Desconectar do MongoDB"""
-        if self.client:
-            self.client.close()
-            logger.info("Disconnected from MongoDB")
+        """Liberar a referência ao cliente (fechado por close_connections no encerramento)"""
+        self.client = None
+        self.database = None
     
     def get_collection(self, collection_name: str) -> AsyncIOMotorCollection:
         """Obter coleção do MongoDB"""
+        if self.database is None:
+            self.client = get_mongo_client()
+            self.database = self.client[settings.MONGO_DATABASE]
         return self.database[collection_name]
 
 
 class AnalysisMongoRepository(MongoRepository):
     """Repositório MongoDB para análises detalhadas"""
     
+    # Campos volumosos gravados comprimidos (matchScore, userId etc. continuam consultáveis)
+    COMPRESSED_FIELDS = ("resumeAnalysis", "jobAnalysis", "compatibilityReport")
+    
     def __init__(self):
         super().__init__()
         self.collection_name = "compatibility_analyses"
@@ -65,7 +68,7 @@ class AnalysisMongoRepository(MongoRepository):
             analysis["createdAt"] = datetime.utcnow()
             analysis["updatedAt"] = datetime.utcnow()
             
-            result = await collection.insert_one(analysis)
+            result = await collection.insert_one(encode_fields(analysis, self.COMPRESSED_FIELDS))
             return str(result.inserted_id)
             
         except PyMongoError as e:
@@ -78,7 +81,7 @@ class AnalysisMongoRepository(MongoRepository):
             collection = self.get_collection(self.collection_name)
             
             result = await collection.find_one({"analysisId": analysis_id})
-            return result
+            return LazyDocument(result) if result else None
             
         except PyMongoError as e:
             logger.error(f"Error getting detailed analysis: {e}")
@@ -93,7 +96,7 @@ class AnalysisMongoRepository(MongoRepository):
                 {"userId": user_id}
             ).sort("createdAt", -1).limit(limit)
             
-            return await cursor.to_list(length=limit)
+            return [LazyDocument(analysis) for analysis in await cursor.to_list(length=limit)]
             
         except PyMongoError as e:
             logger.error(f"Error getting user analyses: {e}")
@@ -388,12 +391,35 @@ class ActivityLogMongoRepository(MongoRepository):
 class AIAnalysisCacheRepository(MongoRepository):
     """Repositório MongoDB para cache de análises de IA"""
     
+    # Hits acumulados no processo (cacheKey -> contagem e último uso), gravados em lote
+    _pending_hits: Dict[str, Dict[str, Any]] = {}
+    
     def __init__(self):
         super().__init__()
         self.collection_name = "ai_analysis_cache"
+        self.local_cache = get_local_cache(self.collection_name)
     
-    async def get_cached_analysis(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Buscar análise em cache"""
+    async def ensure_indexes(self) -> None:
+        """Criar índices de chave, expiração (TTL) e último uso (remoção LRU)"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            await collection.create_index("cacheKey", unique=True)
+            await collection.create_index("expiresAt", expireAfterSeconds=0)
+            await collection.create_index("lastUsedAt")
+            
+        except PyMongoError as e:
+            logger.error(f"Error creating analysis cache indexes: {e}")
+    
+    async def get_cached_analysis(self, cache_key: str, use_local: bool = True) -> Optional[Dict[str, Any]]:
+        """Buscar análise em cache (L1 local, depois MongoDB)"""
+        if use_local:
+            found, cached = self.local_cache.get(cache_key)
+            if found:
+                if cached:
+                    self.record_hit(cache_key)
+                return cached
+        
         try:
             collection = self.get_collection(self.collection_name)
             
@@ -403,15 +429,15 @@ class AIAnalysisCacheRepository(MongoRepository):
                 "expiresAt": {"$gt": datetime.utcnow()}
             })
             
-            if result:
-                # Atualizar contador de hits e último uso
-                await collection.update_one(
-                    {"_id": result["_id"]},
-                    {
-                        "$inc": {"hitCount": 1},
-                        "$set": {"lastUsedAt": datetime.utcnow()}
-                    }
+            if not result:
+                self.local_cache.set_negative(cache_key)
+            else:
+                # O L1 guarda o documento já descomprimido
+                decode_fields(result, ("result",))
+                self.local_cache.set(
+                    cache_key, result, (result["expiresAt"] - datetime.utcnow()).total_seconds()
                 )
+                self.record_hit(cache_key)
             
             return result
             
@@ -420,20 +446,28 @@ class AIAnalysisCacheRepository(MongoRepository):
             return None
     
     async def cache_analysis(self, cache_key: str, result: Dict[str, Any], 
-                           ttl_hours: int = 24) -> str:
-        """Armazenar análise em cache"""
+                           ttl_hours: Optional[int] = None, operation: str = "compatibility") -> str:
+        """Armazenar análise em cache (TTL da operação quando ttl_hours não é informado)"""
         try:
             collection = self.get_collection(self.collection_name)
             
-            expires_at = datetime.utcnow().replace(
-                hour=datetime.utcnow().hour + ttl_hours
-            )
+            ttl_hours = ttl_hours or ai_settings.CACHE_TTL_HOURS.get(operation, 24)
+            now = datetime.utcnow()
+            expires_at = now + timedelta(hours=ttl_hours)
+            
+            # Após staleAt a entrada ainda é servida, com recálculo em background
+            stale_at = expires_at
+            soft_ttl_hours = ai_settings.COMPATIBILITY_CACHE_SOFT_TTL_HOURS if operation == "compatibility" else 0
+            if 0 < soft_ttl_hours < ttl_hours:
+                stale_at = now + timedelta(hours=soft_ttl_hours)
             
             cache_entry = {
                 "cacheKey": cache_key,
+                "operation": operation,
                 "result": result,
-                "createdAt": datetime.utcnow(),
-                "lastUsedAt": datetime.utcnow(),
+                "createdAt": now,
+                "lastUsedAt": now,
+                "staleAt": stale_at,
                 "expiresAt": expires_at,
                 "hitCount": 0
             }
@@ -441,18 +475,104 @@ class AIAnalysisCacheRepository(MongoRepository):
             # Upsert para evitar duplicatas
             await collection.update_one(
                 {"cacheKey": cache_key},
-                {"$set": cache_entry},
+                {"$set": encode_fields(cache_entry, ("result",))},
                 upsert=True
             )
             
+            self.local_cache.set(cache_key, cache_entry, ttl_hours * 3600)
             return cache_key
             
         except PyMongoError as e:
             logger.error(f"Error caching analysis: {e}")
             raise
     
+    @staticmethod
+    def is_stale(entry: Dict[str, Any]) -> bool:
+        """Entrada após o TTL suave (ainda válida até expiresAt)"""
+        stale_at = entry.get("staleAt")
+        return stale_at is not None and stale_at <= datetime.utcnow()
+    
+    def record_hit(self, cache_key: str) -> None:
+        """Acumular hit em memória (gravado por flush_hits, sem escrita na leitura)"""
+        pending = self._pending_hits.get(cache_key)
+        if pending is None:
+            if len(self._pending_hits) >= ai_settings.CACHE_HIT_MAX_PENDING_KEYS:
+                return
+            pending = self._pending_hits[cache_key] = {"count": 0, "lastUsedAt": None}
+        
+        pending["count"] += 1
+        pending["lastUsedAt"] = datetime.utcnow()
+    
+    @classmethod
+    def pending_hit_keys(cls) -> int:
+        """Chaves com hits ainda não gravados"""
+        return len(cls._pending_hits)
+    
+    async def flush_hits(self) -> int:
+        """Gravar hits acumulados com um único bulk_write; retorna as chaves gravadas"""
+        if not self._pending_hits:
+            return 0
+        
+        # Trocar o acumulador antes de aguardar: hits durante a escrita vão para o próximo lote
+        pending = dict(self._pending_hits)
+        self._pending_hits.clear()
+        
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            await collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"cacheKey": cache_key},
+                        {
+                            "$inc": {"hitCount": hits["count"]},
+                            "$max": {"lastUsedAt": hits["lastUsedAt"]}
+                        }
+                    )
+                    for cache_key, hits in pending.items()
+                ],
+                ordered=False
+            )
+            
+            return len(pending)
+            
+        except PyMongoError as e:
+            logger.error(f"Error flushing cache hit counts: {e}")
+            
+            # Devolver ao acumulador para a próxima tentativa
+            for cache_key, hits in pending.items():
+                current = self._pending_hits.setdefault(cache_key, {"count": 0, "lastUsedAt": None})
+                current["count"] += hits["count"]
+                current["lastUsedAt"] = max(
+                    filter(None, [current["lastUsedAt"], hits["lastUsedAt"]])
+                )
+            return 0
+    
+    async def enforce_capacity(self, max_entries: int) -> int:
+        """Remover as entradas usadas há mais tempo quando a coleção excede max_entries"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            total = await collection.estimated_document_count()
+            excess = total - max_entries
+            if excess <= 0:
+                return 0
+            
+            cursor = collection.find({}, {"_id": 1, "cacheKey": 1}).sort("lastUsedAt", 1).limit(excess)
+            evicted = await cursor.to_list(length=excess)
+            
+            result = await collection.delete_many({"_id": {"$in": [entry["_id"] for entry in evicted]}})
+            for entry in evicted:
+                self.local_cache.invalidate(entry["cacheKey"])
+            
+            return result.deleted_count
+            
+        except PyMongoError as e:
+            logger.error(f"Error enforcing analysis cache capacity: {e}")
+            return 0
+    
     async def cleanup_expired_cache(self) -> int:
-        """Limpar cache expirado"""
+        """Limpar cache expirado (normalmente feito pelo índice TTL)"""
         try:
             collection = self.get_collection(self.collection_name)
             
@@ -467,6 +587,382 @@ class AIAnalysisCacheRepository(MongoRepository):
             return 0
 
 
+class ResumeFingerprintRepository(MongoRepository):
+    """Repositório MongoDB para impressões digitais (SimHash) de currículos analisados"""
+    
+    def __init__(self):
+        super().__init__()
+        self.collection_name = "resume_fingerprints"
+    
+    async def ensure_indexes(self) -> None:
+        """Criar índices de busca por faixas e de expiração"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            await collection.create_index([("userId", 1), ("scope", 1), ("bands", 1)])
+            await collection.create_index(
+                [("userId", 1), ("scope", 1), ("fingerprint", 1)], unique=True
+            )
+            await collection.create_index("expiresAt", expireAfterSeconds=0)
+        
+        except PyMongoError as e:
+            logger.error(f"Error creating fingerprint indexes: {e}")
+    
+    async def find_candidates(self, user_id: str, scope: str, bands: List[str],
+                              limit: int = 20) -> List[Dict[str, Any]]:
+        """Buscar impressões que compartilham ao menos uma faixa"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            cursor = collection.find(
+                {
+                    "userId": user_id,
+                    "scope": scope,
+                    "bands": {"$in": bands},
+                    "expiresAt": {"$gt": datetime.utcnow()}
+                },
+                {"fingerprint": 1, "cacheKey": 1}
+            ).sort("createdAt", -1).limit(limit)
+            
+            return await cursor.to_list(length=limit)
+        
+        except PyMongoError as e:
+            logger.error(f"Error finding fingerprint candidates: {e}")
+            return []
+    
+    async def save_fingerprint(self, user_id: str, scope: str, fingerprint: str, bands: List[str],
+                               cache_key: str, ttl_hours: int = 24) -> None:
+        """Registrar impressão digital apontando para a análise em cache"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            now = datetime.utcnow()
+            await collection.update_one(
+                {"userId": user_id, "scope": scope, "fingerprint": fingerprint},
+                {
+                    "$set": {
+                        "bands": bands,
+                        "cacheKey": cache_key,
+                        "createdAt": now,
+                        "expiresAt": now + timedelta(hours=ttl_hours)
+                    }
+                },
+                upsert=True
+            )
+        
+        except PyMongoError as e:
+            logger.error(f"Error saving fingerprint: {e}")
+
+
+class StageAnalysisCacheRepository(MongoRepository):
+    """Repositório MongoDB para cache de estágios da análise (currículo, vaga)"""
+    
+    def __init__(self):
+        super().__init__()
+        self.collection_name = "ai_stage_cache"
+        self.local_cache = get_local_cache(self.collection_name)
+    
+    async def ensure_indexes(self) -> None:
+        """Criar índices de chave e expiração (TTL)"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            await collection.create_index([("stage", 1), ("cacheKey", 1)], unique=True)
+            await collection.create_index("expiresAt", expireAfterSeconds=0)
+            
+        except PyMongoError as e:
+            logger.error(f"Error creating stage cache indexes: {e}")
+    
+    async def get_stage_analysis(self, stage: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Buscar resultado de estágio em cache (L1 local, cache compartilhado, depois MongoDB)"""
+        local_key = f"{stage}:{cache_key}"
+        found, cached = self.local_cache.get(local_key)
+        if found:
+            return cached
+        
+        shared = get_shared_cache()
+        if shared is not None:
+            cached = await shared.get("stage_analysis", local_key)
+            if cached is not None:
+                self.local_cache.set(local_key, cached)
+                return cached
+        
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            result = await collection.find_one({
+                "stage": stage,
+                "cacheKey": cache_key,
+                "expiresAt": {"$gt": datetime.utcnow()}
+            })
+            
+            if not result:
+                self.local_cache.set_negative(local_key)
+                return None
+            
+            decode_fields(result, ("result",))
+            remaining_seconds = (result["expiresAt"] - datetime.utcnow()).total_seconds()
+            self.local_cache.set(local_key, result["result"], remaining_seconds)
+            if shared is not None:
+                await shared.set("stage_analysis", local_key, result["result"], remaining_seconds)
+            return result["result"]
+            
+        except PyMongoError as e:
+            logger.error(f"Error getting cached {stage}: {e}")
+            return None
+    
+    async def cache_stage_analysis(self, stage: str, cache_key: str, result: Dict[str, Any],
+                                   ttl_hours: Optional[int] = None,
+                                   metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Armazenar resultado de estágio em cache (TTL do estágio quando ttl_hours não é informado)
+
+        Cache opcional: falhas são registradas e não interrompem a análise (None)
+        """
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            ttl_hours = ttl_hours or ai_settings.CACHE_TTL_HOURS.get(stage, 24)
+            now = datetime.utcnow()
+            cache_entry = {
+                "stage": stage,
+                "cacheKey": cache_key,
+                "result": result,
+                "metadata": metadata or {},
+                "createdAt": now,
+                "expiresAt": now + timedelta(hours=ttl_hours)
+            }
+            
+            await collection.update_one(
+                {"stage": stage, "cacheKey": cache_key},
+                {"$set": encode_fields(cache_entry, ("result",))},
+                upsert=True
+            )
+            
+            local_key = f"{stage}:{cache_key}"
+            self.local_cache.set(local_key, result, ttl_hours * 3600)
+            shared = get_shared_cache()
+            if shared is not None:
+                await shared.set("stage_analysis", local_key, result, ttl_hours * 3600)
+            return cache_key
+            
+        except PyMongoError as e:
+            logger.error(f"Error caching {stage}: {e}")
+            return None
+
+
+# Identificação do processo para leases entre workers
+LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class AnalysisLeaseMongoRepository(MongoRepository):
+    """Repositório MongoDB para leases entre workers (uma chave, um processo)"""
+    
+    def __init__(self):
+        super().__init__()
+        self.collection_name = "analysis_leases"
+    
+    async def ensure_indexes(self) -> None:
+        """Criar índices de unicidade e expiração dos leases"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            await collection.create_index("leaseKey", unique=True)
+            await collection.create_index("expiresAt", expireAfterSeconds=0)
+            
+        except PyMongoError as e:
+            logger.error(f"Error creating lease indexes: {e}")
+    
+    async def acquire_lease(self, lease_key: str, owner: str, ttl_seconds: int) -> bool:
+        """Tentar adquirir lease (livre, expirado ou já pertencente ao owner)"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            now = datetime.utcnow()
+            
+            await collection.find_one_and_update(
+                {
+                    "leaseKey": lease_key,
+                    "$or": [
+                        {"expiresAt": {"$lt": now}},
+                        {"owner": owner}
+                    ]
+                },
+                {
+                    "$set": {
+                        "owner": owner,
+                        "acquiredAt": now,
+                        "expiresAt": now + timedelta(seconds=ttl_seconds)
+                    }
+                },
+                upsert=True
+            )
+            
+            return True
+            
+        except DuplicateKeyError:
+            # Lease ativo de outro worker
+            return False
+        except PyMongoError as e:
+            logger.error(f"Error acquiring lease: {e}")
+            return False
+    
+    async def is_lease_active(self, lease_key: str) -> bool:
+        """Verificar se existe lease válido para a chave"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            result = await collection.find_one({
+                "leaseKey": lease_key,
+                "expiresAt": {"$gt": datetime.utcnow()}
+            })
+            
+            return result is not None
+            
+        except PyMongoError as e:
+            logger.error(f"Error checking lease: {e}")
+            return False
+    
+    async def release_lease(self, lease_key: str, owner: str) -> bool:
+        """Liberar lease do owner"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            result = await collection.delete_one({"leaseKey": lease_key, "owner": owner})
+            return result.deleted_count > 0
+            
+        except PyMongoError as e:
+            logger.error(f"Error releasing lease: {e}")
+            return False
+
+
+class AnalysisJobMongoRepository(MongoRepository):
+    """Repositório MongoDB para a fila persistente de análises"""
+    
+    def __init__(self):
+        super().__init__()
+        self.collection_name = "analysis_jobs"
+    
+    async def ensure_indexes(self) -> None:
+        """Criar índices usados pela fila"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            await collection.create_index("jobId", unique=True)
+            await collection.create_index([("status", 1), ("runAt", 1)])
+            
+        except PyMongoError as e:
+            logger.error(f"Error creating analysis job indexes: {e}")
+    
+    async def save_job(self, job: Dict[str, Any]) -> str:
+        """Persistir novo job"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            job["createdAt"] = datetime.utcnow()
+            job["updatedAt"] = datetime.utcnow()
+            
+            await collection.insert_one(job)
+            return job["jobId"]
+            
+        except PyMongoError as e:
+            logger.error(f"Error saving analysis job: {e}")
+            raise
+    
+    async def claim_job(self, job_id: str, worker_id: str,
+                        locked_until: datetime) -> Optional[Dict[str, Any]]:
+        """Reservar job de forma atômica (pendente ou com lease expirado)"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            now = datetime.utcnow()
+            
+            return await collection.find_one_and_update(
+                {
+                    "jobId": job_id,
+                    "$or": [
+                        {"status": "pending", "runAt": {"$lte": now}},
+                        {"status": "running", "lockedUntil": {"$lt": now}}
+                    ]
+                },
+                {
+                    "$set": {
+                        "status": "running",
+                        "lockedBy": worker_id,
+                        "lockedUntil": locked_until,
+                        "updatedAt": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            
+        except PyMongoError as e:
+            logger.error(f"Error claiming analysis job: {e}")
+            return None
+    
+    async def complete_job(self, job_id: str) -> bool:
+        """Marcar job como concluído"""
+        return await self._update_job(job_id, {
+            "status": "completed",
+            "lockedBy": None,
+            "lockedUntil": None
+        })
+    
+    async def reschedule_job(self, job_id: str, run_at: datetime, error: str) -> bool:
+        """Devolver job para a fila com nova data de execução"""
+        return await self._update_job(job_id, {
+            "status": "pending",
+            "runAt": run_at,
+            "lastError": error,
+            "lockedBy": None,
+            "lockedUntil": None
+        })
+    
+    async def fail_job(self, job_id: str, error: str) -> bool:
+        """Marcar job como falho definitivamente"""
+        return await self._update_job(job_id, {
+            "status": "failed",
+            "lastError": error,
+            "lockedBy": None,
+            "lockedUntil": None
+        })
+    
+    async def get_recoverable_jobs(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Buscar jobs pendentes ou com lease expirado"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            now = datetime.utcnow()
+            
+            cursor = collection.find({
+                "$or": [
+                    {"status": "pending"},
+                    {"status": "running", "lockedUntil": {"$lt": now}}
+                ]
+            }).sort("createdAt", 1).limit(limit)
+            
+            return await cursor.to_list(length=limit)
+            
+        except PyMongoError as e:
+            logger.error(f"Error getting recoverable analysis jobs: {e}")
+            return []
+    
+    async def _update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
+        """Atualizar campos do job"""
+        try:
+            collection = self.get_collection(self.collection_name)
+            
+            updates["updatedAt"] = datetime.utcnow()
+            
+            result = await collection.update_one(
+                {"jobId": job_id},
+                {"$set": updates}
+            )
+            
+            return result.modified_count > 0
+            
+        except PyMongoError as e:
+            logger.error(f"Error updating analysis job: {e}")
+            return False
+
+
 class FeedbackMongoRepository(MongoRepository):
     """Repositório MongoDB para feedback dos usuários"""
     
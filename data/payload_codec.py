@@ -0,0 +1,145 @@
+"""
+Codificação de payloads do MongoDB
+Compressão opcional (zlib ou zstd) dos campos volumosos dos documentos,
+com descompressão sob demanda na leitura
+"""
+from typing import Any, Dict, Iterable, Iterator, Optional
+import logging
+import zlib
+
+import bson
+
+from core.config import db_settings
+from core.metrics import metrics
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_NONE = "none"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+# Envelope gravado no lugar do campo comprimido
+_CODEC_KEY = "_codec"
+_DATA_KEY = "_data"
+_SIZE_KEY = "_size"
+
+payload_bytes_counter = metrics.counter(
+    "mongo_payload_bytes_total", "Bytes dos payloads comprimidos (kind=raw/stored)"
+)
+
+_CODECS = (CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD)
+
+
+def resolve_codec(codec: Optional[str] = None) -> str:
+    """Codec efetivo (configurado quando não informado)"""
+    codec = (codec or db_settings.MONGO_PAYLOAD_COMPRESSION or CODEC_NONE).lower()
+    if codec not in _CODECS:
+        raise ValueError(f"Unknown payload codec: {codec}")
+
+    # Sem fallback silencioso: nós sem zstandard não leriam o que este nó gravasse
+    if codec == CODEC_ZSTD and zstandard is None:
+        raise RuntimeError("zstandard is required for MONGO_PAYLOAD_COMPRESSION=zstd")
+
+    return codec
+
+
+def validate_codec_settings() -> None:
+    """Validar o codec configurado na inicialização (falha antes de gravar qualquer payload)"""
+    codec = resolve_codec()
+    logger.info(f"Mongo payload compression: {codec}")
+
+
+def is_encoded(value: Any) -> bool:
+    return isinstance(value, dict) and _CODEC_KEY in value and _DATA_KEY in value
+
+
+def encode_payload(value: Any, codec: Optional[str] = None) -> Any:
+    """Comprimir valor em um envelope binário (inalterado se desativado ou pequeno)"""
+    codec = resolve_codec(codec)
+    if codec == CODEC_NONE or value is None or is_encoded(value):
+        return value
+
+    # BSON preserva datas e ObjectIds na volta
+    raw = bson.encode({"v": value})
+    if len(raw) < db_settings.MONGO_PAYLOAD_COMPRESSION_MIN_BYTES:
+        return value
+
+    level = db_settings.MONGO_PAYLOAD_COMPRESSION_LEVEL
+    if codec == CODEC_ZSTD:
+        data = zstandard.ZstdCompressor(level=level).compress(raw)
+    else:
+        data = zlib.compress(raw, level)
+
+    payload_bytes_counter.inc(len(raw), codec=codec, kind="raw")
+    payload_bytes_counter.inc(len(data), codec=codec, kind="stored")
+    return {_CODEC_KEY: codec, _DATA_KEY: data, _SIZE_KEY: len(raw)}
+
+
+def decode_payload(value: Any) -> Any:
+    """Descomprimir envelope (valores não comprimidos são retornados como estão)"""
+    if not is_encoded(value):
+        return value
+
+    codec = value[_CODEC_KEY]
+    data = bytes(value[_DATA_KEY])
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed payloads")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(data)
+    else:
+        raise ValueError(f"Unknown payload codec: {codec}")
+
+    return bson.decode(raw)["v"]
+
+
+def encode_fields(document: Dict[str, Any], fields: Iterable[str],
+                  codec: Optional[str] = None) -> Dict[str, Any]:
+    """Cópia rasa do documento com os campos informados comprimidos"""
+    encoded = dict(document)
+    for field in fields:
+        if field in encoded:
+            encoded[field] = encode_payload(encoded[field], codec)
+    return encoded
+
+
+def decode_fields(document: Optional[Dict[str, Any]], fields: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """Descomprimir os campos informados imediatamente (no próprio documento)"""
+    if document is not None:
+        for field in fields:
+            if field in document:
+                document[field] = decode_payload(document[field])
+    return document
+
+
+class LazyDocument(dict):
+    """Documento cujos campos comprimidos são descomprimidos no primeiro acesso"""
+
+    def __getitem__(self, key: str) -> Any:
+        value = super().__getitem__(key)
+        if is_encoded(value):
+            value = decode_payload(value)
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def __iter__(self) -> Iterator[str]:
+        # Iteração própria faz dict(doc) e {**doc} passarem por __getitem__
+        return iter(list(self.keys()))
+
+    def items(self):
+        return [(key, self[key]) for key in list(self.keys())]
+
+    def values(self):
+        return [self[key] for key in list(self.keys())]
+
+    def copy(self) -> "LazyDocument":
+        return LazyDocument(dict.items(self))
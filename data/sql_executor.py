@@ -0,0 +1,68 @@
+"""
+Executor do SQL Server
+Pool de threads limitado onde as sessões síncronas do SQLAlchemy/pyodbc rodam,
+fora do event loop, com métricas de espera e duração
+"""
+from typing import Optional, Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+
+from core.config import db_settings
+from core.metrics import metrics
+
+T = TypeVar("T")
+
+wait_histogram = metrics.histogram(
+    "sql_pool_wait_seconds", "Espera por uma thread livre do pool SQL",
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+)
+duration_histogram = metrics.histogram(
+    "sql_query_seconds", "Duração das operações SQL (na thread)",
+    buckets=[0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+)
+in_flight_gauge = metrics.gauge("sql_pool_in_flight", "Operações SQL em execução ou aguardando thread")
+
+# Pool do processo (criado sob demanda)
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight = 0
+
+
+def get_sql_executor() -> ThreadPoolExecutor:
+    """Obter pool de threads do SQL (SQL_THREAD_POOL_SIZE threads)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=db_settings.SQL_THREAD_POOL_SIZE, thread_name_prefix="sql"
+        )
+    return _executor
+
+
+def shutdown_sql_executor() -> None:
+    """Encerrar o pool (aguarda as operações em andamento)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_in_sql_pool(func: Callable[..., T], *args, operation: str = "query") -> T:
+    """Executar func(*args) no pool de threads do SQL sem bloquear o event loop"""
+    global _in_flight
+    submitted_at = time.monotonic()
+
+    def run() -> T:
+        started_at = time.monotonic()
+        wait_histogram.observe(started_at - submitted_at)
+        try:
+            return func(*args)
+        finally:
+            duration_histogram.observe(time.monotonic() - started_at, operation=operation)
+
+    _in_flight += 1
+    in_flight_gauge.set(_in_flight)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_sql_executor(), run)
+    finally:
+        _in_flight -= 1
+        in_flight_gauge.set(_in_flight)
@@ -5,12 +5,14 @@ Camada de acesso a dados para SQL Server
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy import create_engine, text, and_, or_, desc, asc
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import text, and_, or_, desc, asc
+from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
-from core.config import settings
+from core.shared_cache import TieredCache
+from data.connections import get_sql_engine, get_session_factory
+from data.sql_executor import run_in_sql_pool
 from domain.entities.domain import (
     User, Resume, Company, JobDescription, CompatibilityAnalysis,
     CoverLetter, Skill, UserSkill, Notification, UserSession, DataLakeFile
@@ -18,44 +20,57 @@ from domain.entities.domain import (
 
 logger = logging.getLogger(__name__)
 
+# Agregados do dashboard (chave "dashboard:<userId>"), compartilhados entre processos
+_dashboard_stats_cache = TieredCache("dashboard_stats")
+
 
 class SQLRepository:
     """Repositório base para SQL Server"""
     
     def __init__(self):
-        self.engine = create_engine(
-            settings.sql_connection_string,
-            pool_size=10,
-            max_overflow=20,
-            pool_timeout=30,
-            pool_recycle=3600,
-            echo=settings.DEBUG
-        )
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Engine e pool compartilhados pelo processo (data.connections)
+        self.engine = get_sql_engine()
+        self.SessionLocal = get_session_factory()
     
     def get_session(self) -> Session:
         """Obter sessão do banco"""
         return self.SessionLocal()
     
-    def execute_query(self, query: str, params: Dict[str, Any] = None) -> List[Dict]:
-        """Executar query SQL raw"""
+    async def execute_query(self, query: str, params: Dict[str, Any] = None) -> List[Dict]:
+        """Executar query SQL raw (no pool de threads do SQL)"""
         try:
-            with self.get_session() as session:
-                result = session.execute(text(query), params or {})
-                return [dict(row._mapping) for row in result]
+            return await run_in_sql_pool(self._execute_query_sync, query, params, operation="query")
         except SQLAlchemyError as e:
             logger.error(f"SQL query error: {e}")
             raise
     
-    def execute_scalar(self, query: str, params: Dict[str, Any] = None) -> Any:
-        """Executar query que retorna valor único"""
+    async def execute_scalar(self, query: str, params: Dict[str, Any] = None) -> Any:
+        """Executar query que retorna valor único (no pool de threads do SQL)"""
         try:
-            with self.get_session() as session:
-                result = session.execute(text(query), params or {})
-                return result.scalar()
+            return await run_in_sql_pool(self._execute_scalar_sync, query, params, operation="scalar")
         except SQLAlchemyError as e:
             logger.error(f"SQL scalar query error: {e}")
             raise
+    
+    async def execute_write(self, query: str, params: Any = None) -> int:
+        """Executar comando com commit (params em lista = vários registros); retorna linhas afetadas"""
+        return await run_in_sql_pool(self._execute_write_sync, query, params, operation="write")
+    
+    def _execute_query_sync(self, query: str, params: Optional[Dict[str, Any]]) -> List[Dict]:
+        with self.get_session() as session:
+            result = session.execute(text(query), params or {})
+            return [dict(row._mapping) for row in result]
+    
+    def _execute_scalar_sync(self, query: str, params: Optional[Dict[str, Any]]) -> Any:
+        with self.get_session() as session:
+            result = session.execute(text(query), params or {})
+            return result.scalar()
+    
+    def _execute_write_sync(self, query: str, params: Any) -> int:
+        with self.get_session() as session:
+            result = session.execute(text(query), params or {})
+            session.commit()
+            return result.rowcount
 
 
 class UserRepository(SQLRepository):
@@ -77,7 +92,7 @@ class UserRepository(SQLRepository):
             "phone": user.phone
         }
         
-        result = self.execute_scalar(query, params)
+        result = await self.execute_scalar(query, params)
         user.user_id = result
         return user
     
@@ -91,7 +106,7 @@ class UserRepository(SQLRepository):
         WHERE UserId = :user_id AND IsActive = 1
         """
         
-        result = self.execute_query(query, {"user_id": str(user_id)})
+        result = await self.execute_query(query, {"user_id": str(user_id)})
         if not result:
             return None
         
@@ -122,7 +137,7 @@ class UserRepository(SQLRepository):
         WHERE Email = :email AND IsActive = 1
         """
         
-        result = self.execute_query(query, {"email": email})
+        result = await self.execute_query(query, {"email": email})
         if not result:
             return None
         
@@ -165,10 +180,8 @@ class UserRepository(SQLRepository):
         """
         
         try:
-            with self.get_session() as session:
-                result = session.execute(text(query), params)
-                session.commit()
-                return result.rowcount > 0
+            rowcount = await self.execute_write(query, params)
+            return rowcount > 0
         except SQLAlchemyError as e:
             logger.error(f"Error updating user: {e}")
             return False
@@ -182,10 +195,8 @@ class UserRepository(SQLRepository):
         """
         
         try:
-            with self.get_session() as session:
-                result = session.execute(text(query), {"user_id": str(user_id)})
-                session.commit()
-                return result.rowcount > 0
+            rowcount = await self.execute_write(query, {"user_id": str(user_id)})
+            return rowcount > 0
         except SQLAlchemyError as e:
             logger.error(f"Error updating last login: {e}")
             return False
@@ -215,10 +226,8 @@ class ResumeRepository(SQLRepository):
         }
         
         try:
-            with self.get_session() as session:
-                session.execute(text(query), params)
-                session.commit()
-                return resume
+            await self.execute_write(query, params)
+            return resume
         except SQLAlchemyError as e:
             logger.error(f"Error creating resume: {e}")
             raise
@@ -241,7 +250,7 @@ class ResumeRepository(SQLRepository):
         
         query += " ORDER BY UpdatedAt DESC"
         
-        result = self.execute_query(query, params)
+        result = await self.execute_query(query, params)
         
         resumes = []
         for row in result:
@@ -274,7 +283,7 @@ class ResumeRepository(SQLRepository):
         WHERE ResumeId = :resume_id
         """
         
-        result = self.execute_query(query, {"resume_id": str(resume_id)})
+        result = await self.execute_query(query, {"resume_id": str(resume_id)})
         if not result:
             return None
         
@@ -296,6 +305,42 @@ class ResumeRepository(SQLRepository):
             average_match_score=row["AverageMatchScore"]
         )
     
+    async def get_resumes_by_ids(self, resume_ids: List[UUID]) -> List[Resume]:
+        """Buscar currículos por IDs (uma única consulta)"""
+        if not resume_ids:
+            return []
+        
+        params = {f"resume_id_{index}": str(resume_id) for index, resume_id in enumerate(resume_ids)}
+        query = f"""
+        SELECT ResumeId, UserId, Title, Version, Status, DataLakeFileId,
+               OriginalFileName, FileSize, FileType, CreatedAt, UpdatedAt,
+               LastAnalyzedAt, AnalysisCount, AverageMatchScore
+        FROM Resumes 
+        WHERE ResumeId IN ({", ".join(f":{name}" for name in params)})
+        """
+        
+        result = await self.execute_query(query, params)
+        
+        return [
+            Resume(
+                resume_id=UUID(row["ResumeId"]),
+                user_id=UUID(row["UserId"]),
+                title=row["Title"],
+                version=row["Version"],
+                status=row["Status"],
+                data_lake_file_id=UUID(row["DataLakeFileId"]) if row["DataLakeFileId"] else None,
+                original_filename=row["OriginalFileName"],
+                file_size=row["FileSize"],
+                file_type=row["FileType"],
+                created_at=row["CreatedAt"],
+                updated_at=row["UpdatedAt"],
+                last_analyzed_at=row["LastAnalyzedAt"],
+                analysis_count=row["AnalysisCount"],
+                average_match_score=row["AverageMatchScore"]
+            )
+            for row in result
+        ]
+    
     async def update_resume_analysis_stats(self, resume_id: UUID, match_score: float) -> bool:
         """Atualizar estatísticas de análise do currículo"""
         query = """
@@ -308,13 +353,11 @@ class ResumeRepository(SQLRepository):
         """
         
         try:
-            with self.get_session() as session:
-                result = session.execute(text(query), {
-                    "resume_id": str(resume_id),
-                    "match_score": match_score
-                })
-                session.commit()
-                return result.rowcount > 0
+            rowcount = await self.execute_write(query, {
+                "resume_id": str(resume_id),
+                "match_score": match_score
+            })
+            return rowcount > 0
         except SQLAlchemyError as e:
             logger.error(f"Error updating resume stats: {e}")
             return False
@@ -343,14 +386,45 @@ class AnalysisRepository(SQLRepository):
         }
         
         try:
-            with self.get_session() as session:
-                session.execute(text(query), params)
-                session.commit()
-                return analysis
+            await self.execute_write(query, params)
+            return analysis
         except SQLAlchemyError as e:
             logger.error(f"Error creating analysis: {e}")
             raise
     
+    async def create_analyses_bulk(self, analyses: List[CompatibilityAnalysis]) -> List[CompatibilityAnalysis]:
+        """Criar análises em lote (um único INSERT com vários parâmetros)"""
+        if not analyses:
+            return []
+        
+        query = """
+        INSERT INTO CompatibilityAnalyses (AnalysisId, UserId, ResumeId, JobId,
+                                         MatchScore, Status, AnalysisType, MongoAnalysisId)
+        VALUES (:analysis_id, :user_id, :resume_id, :job_id,
+                :match_score, :status, :analysis_type, :mongo_analysis_id)
+        """
+        
+        params = [
+            {
+                "analysis_id": str(analysis.analysis_id),
+                "user_id": str(analysis.user_id),
+                "resume_id": str(analysis.resume_id),
+                "job_id": str(analysis.job_id) if analysis.job_id else None,
+                "match_score": analysis.match_score,
+                "status": analysis.status.value,
+                "analysis_type": analysis.analysis_type,
+                "mongo_analysis_id": analysis.mongo_analysis_id
+            }
+            for analysis in analyses
+        ]
+        
+        try:
+            await self.execute_write(query, params)
+            return analyses
+        except SQLAlchemyError as e:
+            logger.error(f"Error creating analyses in bulk: {e}")
+            raise
+    
     async def get_user_analyses(self, user_id: UUID, limit: int = 50) -> List[CompatibilityAnalysis]:
         """Buscar análises do usuário"""
         query = """
@@ -362,7 +436,7 @@ class AnalysisRepository(SQLRepository):
         ORDER BY CreatedAt DESC
         """
         
-        result = self.execute_query(query, {"user_id": str(user_id), "limit": limit})
+        result = await self.execute_query(query, {"user_id": str(user_id), "limit": limit})
         
         analyses = []
         for row in result:
@@ -382,6 +456,19 @@ class AnalysisRepository(SQLRepository):
         
         return analyses
     
+    async def get_trending_job_ids(self, hours: int = 24, limit: int = 50) -> List[UUID]:
+        """Vagas com mais análises nas últimas horas"""
+        query = """
+        SELECT TOP (:limit) JobId, COUNT(*) as AnalysisCount
+        FROM CompatibilityAnalyses 
+        WHERE JobId IS NOT NULL AND CreatedAt >= DATEADD(hour, -:hours, GETUTCDATE())
+        GROUP BY JobId
+        ORDER BY COUNT(*) DESC
+        """
+        
+        result = await self.execute_query(query, {"hours": hours, "limit": limit})
+        return [UUID(str(row["JobId"])) for row in result]
+    
     async def update_analysis_status(self, analysis_id: UUID, status: str, 
                                    processing_time_ms: Optional[int] = None) -> bool:
         """Atualizar status da análise"""
@@ -394,29 +481,125 @@ class AnalysisRepository(SQLRepository):
         """
         
         try:
-            with self.get_session() as session:
-                result = session.execute(text(query), {
-                    "analysis_id": str(analysis_id),
-                    "status": status,
-                    "processing_time_ms": processing_time_ms
-                })
-                session.commit()
-                return result.rowcount > 0
+            rowcount = await self.execute_write(query, {
+                "analysis_id": str(analysis_id),
+                "status": status,
+                "processing_time_ms": processing_time_ms
+            })
+            return rowcount > 0
         except SQLAlchemyError as e:
             logger.error(f"Error updating analysis status: {e}")
             return False
+    
+    async def complete_analysis(self, analysis_id: UUID, match_score: float,
+                                processing_time_ms: int, mongo_analysis_id: Optional[str]) -> bool:
+        """Marcar análise como concluída com score, tempo e referência ao MongoDB"""
+        query = """
+        UPDATE CompatibilityAnalyses 
+        SET MatchScore = :match_score,
+            Status = 'completed',
+            ProcessingTimeMs = :processing_time_ms,
+            CompletedAt = GETUTCDATE(),
+            MongoAnalysisId = :mongo_analysis_id
+        WHERE AnalysisId = :analysis_id
+        """
+        
+        rowcount = await self.execute_write(query, {
+            "analysis_id": str(analysis_id),
+            "match_score": match_score,
+            "processing_time_ms": processing_time_ms,
+            "mongo_analysis_id": mongo_analysis_id
+        })
+        return rowcount > 0
+
+
+class SkillRepository(SQLRepository):
+    """Repositório do catálogo de habilidades"""
+    
+    async def get_active_skills(self) -> List[Skill]:
+        """Buscar habilidades ativas do catálogo"""
+        query = """
+        SELECT SkillId, Name, Category, Description, IsActive, CreatedAt
+        FROM Skills 
+        WHERE IsActive = 1
+        """
+        
+        result = await self.execute_query(query)
+        
+        return [
+            Skill(
+                skill_id=UUID(row["SkillId"]),
+                name=row["Name"],
+                category=row["Category"],
+                description=row["Description"],
+                is_active=row["IsActive"],
+                created_at=row["CreatedAt"]
+            )
+            for row in result
+        ]
+    
+    async def get_catalog_version(self) -> str:
+        """Versão do catálogo (muda quando habilidades são criadas, renomeadas, recategorizadas ou desativadas)"""
+        query = """
+        SELECT CONCAT(COUNT(*), ':', CONVERT(varchar(33), MAX(CreatedAt), 126), ':',
+                      CHECKSUM_AGG(CHECKSUM(SkillId, Name, Category)))
+        FROM Skills 
+        WHERE IsActive = 1
+        """
+        
+        return str(await self.execute_scalar(query))
+    
+    async def upsert_user_skills(self, user_skills: List[UserSkill]) -> int:
+        """Inserir ou atualizar habilidades do usuário (sem sobrescrever cadastro manual)"""
+        if not user_skills:
+            return 0
+        
+        query = """
+        MERGE UserSkills AS target
+        USING (SELECT :user_id AS UserId, :skill_id AS SkillId) AS source
+        ON target.UserId = source.UserId AND target.SkillId = source.SkillId
+        WHEN MATCHED AND target.Source = :source THEN
+            UPDATE SET ProficiencyLevel = :proficiency_level, LastUpdated = GETUTCDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (UserSkillId, UserId, SkillId, ProficiencyLevel, YearsOfExperience, LastUpdated, Source)
+            VALUES (NEWID(), :user_id, :skill_id, :proficiency_level, :years_of_experience, GETUTCDATE(), :source);
+        """
+        
+        params = [
+            {
+                "user_id": str(user_skill.user_id),
+                "skill_id": str(user_skill.skill_id),
+                "proficiency_level": user_skill.proficiency_level,
+                "years_of_experience": user_skill.years_of_experience,
+                "source": user_skill.source
+            }
+            for user_skill in user_skills
+        ]
+        
+        try:
+            await self.execute_write(query, params)
+            return len(params)
+        except SQLAlchemyError as e:
+            logger.error(f"Error upserting user skills: {e}")
+            return 0
 
 
 class DashboardRepository(SQLRepository):
     """Repositório para dados do dashboard"""
     
     async def get_dashboard_stats(self, user_id: UUID) -> Dict[str, Any]:
-        """Obter estatísticas do dashboard"""
+        """Obter estatísticas do dashboard (stale-while-revalidate)"""
+        return await _dashboard_stats_cache.get_or_load(
+            f"dashboard:{user_id}", lambda: self._load_dashboard_stats(user_id)
+        )
+    
+    async def _load_dashboard_stats(self, user_id: UUID) -> Dict[str, Any]:
+        """Calcular estatísticas do dashboard (sem cache)"""
         query = """
         EXEC sp_GetDashboardStats @UserId = :user_id
         """
         
-        result = self.execute_query(query, {"user_id": str(user_id)})
+        result = await self.execute_query(query, {"user_id": str(user_id)})
         if not result:
             return {}
         
@@ -435,7 +618,7 @@ class DashboardRepository(SQLRepository):
         ORDER BY ca.CreatedAt DESC
         """
         
-        return self.execute_query(query, {"user_id": str(user_id), "limit": limit})
+        return await self.execute_query(query, {"user_id": str(user_id), "limit": limit})
 
 
 class DataLakeRepository(SQLRepository):
@@ -463,14 +646,38 @@ class DataLakeRepository(SQLRepository):
         }
         
         try:
-            with self.get_session() as session:
-                session.execute(text(query), params)
-                session.commit()
-                return file_ref
+            await self.execute_write(query, params)
+            return file_ref
         except SQLAlchemyError as e:
             logger.error(f"Error creating file reference: {e}")
             raise
     
+    async def get_file_reference(self, file_id: UUID) -> Optional[DataLakeFile]:
+        """Buscar referência de arquivo no Data Lake"""
+        query = """
+        SELECT FileId, UserId, FileName, FileType, FileSize, MimeType,
+               StoragePath, BucketName, StorageProvider
+        FROM DataLakeFiles
+        WHERE FileId = :file_id AND IsDeleted = 0
+        """
+        
+        result = await self.execute_query(query, {"file_id": str(file_id)})
+        if not result:
+            return None
+        
+        row = result[0]
+        return DataLakeFile(
+            file_id=UUID(str(row["FileId"])),
+            user_id=UUID(str(row["UserId"])),
+            filename=row["FileName"],
+            file_type=row["FileType"],
+            file_size=row["FileSize"],
+            mime_type=row["MimeType"],
+            storage_path=row["StoragePath"],
+            bucket_name=row["BucketName"],
+            storage_provider=row["StorageProvider"]
+        )
+    
     async def record_file_access(self, file_id: UUID) -> bool:
         """Registrar acesso ao arquivo"""
         query = """
@@ -478,10 +685,8 @@ class DataLakeRepository(SQLRepository):
         """
         
         try:
-            with self.get_session() as session:
-                session.execute(text(query), {"file_id": str(file_id)})
-                session.commit()
-                return True
+            await self.execute_write(query, {"file_id": str(file_id)})
+            return True
         except SQLAlchemyError as e:
             logger.error(f"Error recording file access: {e}")
             return False
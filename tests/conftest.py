@@ -0,0 +1,39 @@
+"""
+Configuração dos testes
+A aplicação importa a partir de app/ (core, services, ...) e da raiz (data, mappers)
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "app")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import data.connections as connections  # noqa: E402
+
+
+@pytest.fixture
+def sql_engine(monkeypatch):
+    """Engine SQLite em memória no lugar do SQL Server (com GETUTCDATE)"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+    @event.listens_for(engine, "connect")
+    def register_functions(dbapi_connection, _):
+        dbapi_connection.create_function("GETUTCDATE", 0, lambda: "2026-01-01 00:00:00")
+
+    monkeypatch.setattr(connections, "_sql_engine", engine)
+    monkeypatch.setattr(
+        connections, "_session_factory",
+        sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    )
+    yield engine
+    engine.dispose()
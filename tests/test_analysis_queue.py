@@ -0,0 +1,145 @@
+"""
+Testes da fila de análises
+"""
+import asyncio
+
+import pytest
+
+from core.config import queue_settings
+from services.analysis_queue import (
+    AnalysisQueue, FairScheduler, InMemoryJobStore, NonRetryableJobError
+)
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() >= deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(queue_settings, "RETRY_BASE_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(queue_settings, "RETRY_MAX_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(queue_settings, "RETRY_JITTER", 0.0)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_round_robins_between_users():
+    scheduler = FairScheduler(max_concurrent_per_user=10)
+    for job_id in ("a1", "a2", "a3"):
+        await scheduler.push("alice", job_id)
+    await scheduler.push("bob", "b1")
+
+    order = [await scheduler.pop() for _ in range(4)]
+
+    assert order == [("alice", "a1"), ("bob", "b1"), ("alice", "a2"), ("alice", "a3")]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_respects_per_user_limit():
+    scheduler = FairScheduler(max_concurrent_per_user=1)
+    await scheduler.push("alice", "a1")
+    await scheduler.push("alice", "a2")
+
+    assert await scheduler.pop() == ("alice", "a1")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(scheduler.pop(), timeout=0.05)
+
+    await scheduler.task_done("alice")
+    assert await scheduler.pop() == ("alice", "a2")
+
+
+@pytest.mark.asyncio
+async def test_scheduler_ignores_duplicate_jobs():
+    scheduler = FairScheduler(max_concurrent_per_user=1)
+    await scheduler.push("alice", "a1")
+    await scheduler.push("alice", "a1")
+
+    assert scheduler.depth == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_processes_and_completes_jobs():
+    store = InMemoryJobStore()
+    processed = []
+
+    async def handler(payload):
+        processed.append(payload["n"])
+
+    queue = AnalysisQueue(store, handler, worker_count=2)
+    await queue.start()
+    try:
+        job_ids = [await queue.enqueue("alice", {"n": n}) for n in range(3)]
+        await _wait_for(lambda: all(store._jobs[job_id]["status"] == "completed" for job_id in job_ids))
+    finally:
+        await queue.stop()
+
+    assert sorted(processed) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_queue_retries_then_fails(fast_retries):
+    store = InMemoryJobStore()
+    failures = []
+
+    async def handler(payload):
+        raise RuntimeError("boom")
+
+    async def on_failure(payload, error):
+        failures.append(error)
+
+    queue = AnalysisQueue(store, handler, on_failure=on_failure, worker_count=1, max_attempts=3)
+    await queue.start()
+    try:
+        job_id = await queue.enqueue("alice", {})
+        await _wait_for(lambda: store._jobs[job_id]["status"] == "failed")
+    finally:
+        await queue.stop()
+
+    assert store._jobs[job_id]["attempts"] == 3
+    assert failures == ["boom"]
+
+
+@pytest.mark.asyncio
+async def test_queue_does_not_retry_non_retryable_errors(fast_retries):
+    store = InMemoryJobStore()
+
+    async def handler(payload):
+        raise NonRetryableJobError("missing resume")
+
+    queue = AnalysisQueue(store, handler, worker_count=1, max_attempts=3)
+    await queue.start()
+    try:
+        job_id = await queue.enqueue("alice", {})
+        await _wait_for(lambda: store._jobs[job_id]["status"] == "failed")
+    finally:
+        await queue.stop()
+
+    assert store._jobs[job_id]["attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_recovers_persisted_jobs_on_start():
+    store = InMemoryJobStore()
+    processed = []
+
+    async def handler(payload):
+        processed.append(payload["n"])
+
+    # Job gravado por um processo anterior e nunca processado
+    first = AnalysisQueue(store, handler, worker_count=0)
+    await first.start()
+    job_id = await first.enqueue("alice", {"n": 7})
+    await first.stop()
+
+    second = AnalysisQueue(store, handler, worker_count=1)
+    await second.start()
+    try:
+        await _wait_for(lambda: store._jobs[job_id]["status"] == "completed")
+    finally:
+        await second.stop()
+
+    assert processed == [7]
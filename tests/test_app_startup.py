@@ -0,0 +1,16 @@
+"""
+Testes de inicialização da aplicação
+"""
+
+
+def test_main_imports():
+    import main
+
+    assert main.app is not None
+
+
+def test_lifecycle_imports():
+    from core.lifecycle import startup_services, shutdown_services
+
+    assert callable(startup_services)
+    assert callable(shutdown_services)
@@ -0,0 +1,187 @@
+"""
+Testes da análise em lote
+"""
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from core.config import ai_settings
+from schemas.requests.requests import BulkAnalysisRequest
+from services.analysis_service import AnalysisService
+from services.llm_governor import PRIORITY_BULK, current_priority, use_priority
+
+USER_ID = uuid4()
+
+
+@pytest.fixture
+def bulk_service(sql_engine):
+    service = AnalysisService()
+    service.calls = {"job_analysis": 0, "priorities": [], "created": [], "failed": [], "activity": []}
+    service.failing_resumes = set()
+    service.resume_delays = {}
+
+    async def get_resumes_by_ids(resume_ids):
+        return [SimpleNamespace(resume_id=resume_id, user_id=USER_ID) for resume_id in resume_ids]
+
+    async def create_analyses_bulk(analyses):
+        service.calls["created"].extend(analyses)
+
+    async def get_job_content(job_id, job_description):
+        return "Vaga: desenvolvedor Python"
+
+    async def get_job_analysis(job_content):
+        service.calls["job_analysis"] += 1
+        return {"keyRequirements": ["Python"]}, "gpt-4o-mini"
+
+    async def run_analysis(analysis, job_content, job_analysis):
+        service.calls["priorities"].append(current_priority())
+        await asyncio.sleep(service.resume_delays.get(analysis.resume_id, 0))
+        if analysis.resume_id in service.failing_resumes:
+            raise RuntimeError("resume unreadable")
+        return {"matchScore": 80}
+
+    async def handle_analysis_error(analysis_id, message):
+        service.calls["failed"].append((analysis_id, message))
+
+    async def log_activity(activity):
+        service.calls["activity"].append(activity)
+
+    service.resume_repo.get_resumes_by_ids = get_resumes_by_ids
+    service.analysis_repo.create_analyses_bulk = create_analyses_bulk
+    service.activity_repo.log_activity = log_activity
+    service._get_job_content = get_job_content
+    service._get_job_analysis = get_job_analysis
+    service._run_analysis = run_analysis
+    service._handle_analysis_error = handle_analysis_error
+    return service
+
+
+@pytest.mark.asyncio
+async def test_bulk_analysis_streams_each_result(bulk_service):
+    resume_ids = [uuid4() for _ in range(3)]
+    bulk_service.failing_resumes.add(resume_ids[1])
+    request = BulkAnalysisRequest(resume_ids=resume_ids, job_id=uuid4())
+
+    events = [event async for event in bulk_service.stream_bulk_analysis(USER_ID, request)]
+
+    assert [event["event"] for event in events][0] == "started"
+    assert sorted(event["event"] for event in events[1:-1]) == ["error", "result", "result"]
+    assert events[-1]["event"] == "complete"
+    assert (events[-1]["data"]["completed"], events[-1]["data"]["failed"]) == (2, 1)
+
+    # Vaga analisada uma vez; currículos na faixa de prioridade do lote
+    assert bulk_service.calls["job_analysis"] == 1
+    assert bulk_service.calls["priorities"] == [PRIORITY_BULK] * 3
+    assert len(bulk_service.calls["created"]) == 3
+    assert len(bulk_service.calls["activity"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_analysis_rejects_resumes_of_other_users(bulk_service):
+    async def get_resumes_by_ids(resume_ids):
+        return [SimpleNamespace(resume_id=resume_ids[0], user_id=uuid4())]
+
+    bulk_service.resume_repo.get_resumes_by_ids = get_resumes_by_ids
+    request = BulkAnalysisRequest(resume_ids=[uuid4()], job_id=uuid4())
+
+    with pytest.raises(ValueError):
+        await bulk_service.stream_bulk_analysis(USER_ID, request).__anext__()
+
+    assert bulk_service.calls["created"] == []
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_and_fails_remaining_analyses(bulk_service):
+    resume_ids = [uuid4() for _ in range(3)]
+    bulk_service.resume_delays = {resume_ids[1]: 10, resume_ids[2]: 10}
+    request = BulkAnalysisRequest(resume_ids=resume_ids, job_id=uuid4())
+
+    stream = bulk_service.stream_bulk_analysis(USER_ID, request)
+    assert (await stream.__anext__())["event"] == "started"
+    assert (await stream.__anext__())["data"]["resume_id"] == str(resume_ids[0])
+    await stream.aclose()
+
+    assert [message for _, message in bulk_service.calls["failed"]] == ["Bulk analysis cancelled"] * 2
+    assert bulk_service.calls["activity"] == []
+
+
+@pytest.mark.asyncio
+async def test_disconnect_before_start_fails_every_analysis(bulk_service):
+    request = BulkAnalysisRequest(resume_ids=[uuid4(), uuid4()], job_id=uuid4())
+
+    stream = bulk_service.stream_bulk_analysis(USER_ID, request)
+    await stream.__anext__()
+    await stream.aclose()
+
+    assert [message for _, message in bulk_service.calls["failed"]] == ["Bulk analysis cancelled"] * 2
+    assert bulk_service.calls["job_analysis"] == 0
+
+
+@pytest.mark.asyncio
+async def test_job_analysis_failure_fails_every_analysis(bulk_service):
+    async def get_job_analysis(job_content):
+        raise RuntimeError("llm down")
+
+    bulk_service._get_job_analysis = get_job_analysis
+    request = BulkAnalysisRequest(resume_ids=[uuid4(), uuid4()], job_id=uuid4())
+
+    with pytest.raises(RuntimeError):
+        [event async for event in bulk_service.stream_bulk_analysis(USER_ID, request)]
+
+    assert [message for _, message in bulk_service.calls["failed"]] == ["llm down"] * 2
+
+
+@pytest.mark.asyncio
+async def test_screening_is_skipped_when_an_input_analysis_is_a_fallback(sql_engine, monkeypatch):
+    monkeypatch.setattr(ai_settings, "BULK_PRE_SCORE_THRESHOLD", 50.0)
+    service = AnalysisService()
+    resume_analysis = {"extractedSkills": [], "isFallback": True}
+    job_analysis = {"keyRequirements": ["Python"]}
+    pre_score = service.pre_scorer.score(resume_analysis, job_analysis)
+    assert pre_score.match_score < ai_settings.BULK_PRE_SCORE_THRESHOLD
+
+    with use_priority(PRIORITY_BULK):
+        with pytest.raises(RuntimeError):
+            await service._get_compatibility_analysis(resume_analysis, job_analysis, pre_score)
+
+        screened, model = await service._get_compatibility_analysis(
+            {"extractedSkills": []}, job_analysis, pre_score
+        )
+    assert screened["screenedOut"] is True
+    assert model == "local"
+
+
+@pytest.mark.asyncio
+async def test_stage_models_are_reported_outside_the_stage_payloads(sql_engine):
+    service = AnalysisService()
+
+    async def analyze_resume(resume_content):
+        return {"extractedSkills": [{"name": "Python", "confidence": 0.9}]}, "resume-model"
+
+    async def analyze_job_description(job_content):
+        return {"keyRequirements": ["Python"]}, "job-model"
+
+    async def analyze_compatibility(resume_analysis, job_analysis):
+        return {"overallScore": 88.0, "categoryScores": {}}, "compatibility-model"
+
+    async def no_cache(*args, **kwargs):
+        return None
+
+    service.ai_service.analyze_resume = analyze_resume
+    service.ai_service.analyze_job_description = analyze_job_description
+    service.ai_service.analyze_compatibility = analyze_compatibility
+    service.stage_cache_repo.get_stage_analysis = no_cache
+    service.stage_cache_repo.cache_stage_analysis = no_cache
+
+    result = await service._analyze_with_ai("Currículo: Python", "Vaga: Python")
+
+    assert result["stageModels"] == {
+        "resume_analysis": "resume-model",
+        "job_analysis": "job-model",
+        "compatibility": "compatibility-model"
+    }
+    assert result["aiModel"] == "compatibility-model"
+    assert "modelUsed" not in result["resumeAnalysis"]
+    assert "modelUsed" not in result["compatibilityReport"]
@@ -0,0 +1,40 @@
+"""
+Testes das conexões do processo
+"""
+import pytest
+
+from data import connections
+from data.mongo_repository import AnalysisMongoRepository, StageAnalysisCacheRepository
+
+
+@pytest.fixture
+def no_connections(monkeypatch):
+    monkeypatch.setattr(connections, "_sql_engine", None)
+    monkeypatch.setattr(connections, "_session_factory", None)
+    monkeypatch.setattr(connections, "_mongo_client", None)
+
+
+@pytest.mark.asyncio
+async def test_repositories_share_one_mongo_client(no_connections):
+    first, second = AnalysisMongoRepository(), StageAnalysisCacheRepository()
+
+    first.get_collection("a")
+    second.get_collection("b")
+
+    assert first.client is second.client is connections.get_mongo_client()
+
+    await connections.close_connections()
+    assert connections._mongo_client is None
+
+
+def test_session_factory_is_bound_to_the_process_engine(sql_engine):
+    assert connections.get_session_factory() is connections.get_session_factory()
+    assert connections.get_session_factory().kw["bind"] is sql_engine
+
+
+@pytest.mark.asyncio
+async def test_close_connections_disposes_the_engine(sql_engine):
+    await connections.close_connections()
+
+    assert connections._sql_engine is None
+    assert connections._session_factory is None
@@ -0,0 +1,112 @@
+"""
+Testes da geração de cartas de apresentação em streaming
+"""
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from api.sse import format_sse
+from services.ai_service import AIService
+from services.analysis_service import AnalysisService
+
+LETTER = (
+    "Assunto: Candidatura para Desenvolvedora Python\n\n"
+    "Prezados Senhores,\n\n"
+    "Escrevo para me candidatar à vaga.\n\n"
+    "Tenho cinco anos de experiência com Python.\n\n"
+    "Agradeço a atenção.\n\n"
+    "Maria Silva"
+)
+
+
+def _service(chunk_size: int) -> AIService:
+    service = AIService()
+
+    async def stream_llm(prompt):
+        for start in range(0, len(LETTER), chunk_size):
+            yield LETTER[start:start + chunk_size]
+
+    service._stream_llm = stream_llm
+    return service
+
+
+async def _events(service: AIService):
+    return [event async for event in service.stream_cover_letter({}, {}, {"tone": "formal"})]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 7, len(LETTER)])
+async def test_paragraphs_are_emitted_as_they_complete(chunk_size):
+    events = await _events(_service(chunk_size))
+    paragraphs = [event["data"] for event in events if event["event"] == "paragraph"]
+
+    assert [paragraph["section"] for paragraph in paragraphs[:4]] == [
+        "subject", "greeting", "introduction", "body"
+    ]
+    assert paragraphs[0]["text"] == "Candidatura para Desenvolvedora Python"
+    assert len(paragraphs) == 6
+
+
+@pytest.mark.asyncio
+async def test_complete_event_carries_the_structured_letter():
+    complete = (await _events(_service(5)))[-1]
+
+    assert complete["event"] == "complete"
+    content = complete["data"]
+    assert content["greeting"] == "Prezados Senhores,"
+    assert content["body"] == ["Tenho cinco anos de experiência com Python."]
+    assert content["signature"] == "Maria Silva"
+
+
+def test_format_sse():
+    message = format_sse("paragraph", {"text": "Olá"})
+
+    assert message.startswith("event: paragraph\ndata: ")
+    assert message.endswith("\n\n")
+    assert json.loads(message.split("data: ", 1)[1]) == {"text": "Olá"}
+
+
+@pytest.mark.asyncio
+async def test_letter_without_job_analysis_is_generic():
+    service = _service(len(LETTER))
+    prompts = []
+    stream_llm = service._stream_llm
+
+    async def recording_stream(prompt):
+        prompts.append(prompt.text)
+        async for delta in stream_llm(prompt):
+            yield delta
+
+    service._stream_llm = recording_stream
+    events = [event async for event in service.stream_cover_letter({"languages": ["Português"]}, None, {})]
+
+    assert events[-1]["event"] == "complete"
+    assert "Análise da Vaga" not in prompts[0]
+    assert "Nenhuma vaga específica" in prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_stage_analyses_without_job_skip_the_job_stage(sql_engine):
+    service = AnalysisService()
+    user_id = uuid4()
+
+    async def get_resume_by_id(resume_id):
+        return SimpleNamespace(resume_id=resume_id, user_id=user_id)
+
+    async def get_resume_content(resume_id):
+        return "Currículo: Python"
+
+    async def get_resume_analysis(resume_content, user):
+        return {"extractedSkills": []}, "resume-model"
+
+    async def get_job_content(job_id, job_description):
+        raise AssertionError("job content must not be loaded without a job")
+
+    service.resume_repo.get_resume_by_id = get_resume_by_id
+    service._get_resume_content = get_resume_content
+    service._get_resume_analysis = get_resume_analysis
+    service._get_job_content = get_job_content
+
+    assert await service.get_stage_analyses(user_id, uuid4(), None) == ({"extractedSkills": []}, None)
@@ -0,0 +1,31 @@
+"""
+Testes da extração de texto de arquivos
+"""
+import io
+import zipfile
+
+from services.file_service import extract_text
+
+
+def _docx(*paragraphs: str) -> bytes:
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    document = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def test_extract_text_from_txt():
+    assert extract_text("Experiência: Python".encode("utf-8"), "cv.TXT") == "Experiência: Python"
+
+
+def test_extract_text_from_docx_keeps_paragraphs():
+    assert extract_text(_docx("Maria Silva", "Python, SQL"), "cv.docx") == "Maria Silva\nPython, SQL"
+
+
+def test_extract_text_unsupported_type():
+    assert extract_text(b"\xd0\xcf\x11\xe0", "cv.doc") is None
@@ -0,0 +1,143 @@
+"""
+Testes do pré-aquecimento da análise de vagas
+"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from services.job_warmer import JobAnalysisWarmer
+
+
+class FakeAnalysisService:
+    """Registra os aquecimentos e a concorrência máxima observada"""
+
+    def __init__(self, delay: float = 0.02, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.warmed = []
+        self.running = 0
+        self.max_running = 0
+
+    async def warm_job_analysis(self, job_id):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("job not found")
+            self.warmed.append(job_id)
+            return True
+        finally:
+            self.running -= 1
+
+
+class FakeLeaseRepository:
+    """Leases em memória compartilhados entre aquecedores (processos)"""
+
+    def __init__(self):
+        self.owners = {}
+
+    async def acquire_lease(self, lease_key, owner, ttl_seconds):
+        if self.owners.setdefault(lease_key, owner) != owner:
+            return False
+        return True
+
+    async def release_lease(self, lease_key, owner):
+        if self.owners.get(lease_key) == owner:
+            del self.owners[lease_key]
+        return True
+
+
+@pytest.fixture(autouse=True)
+def _sql(sql_engine):
+    """AnalysisRepository do aquecedor exige um engine SQL"""
+
+
+def _trending_warmer(service, job_ids, leases, owner="worker-1", **kwargs):
+    warmer = JobAnalysisWarmer(service, **kwargs)
+
+    async def trending(lookback_hours, top_n):
+        return job_ids
+
+    async def acquire_lease(lease_key, _, ttl_seconds):
+        return await leases.acquire_lease(lease_key, owner, ttl_seconds)
+
+    async def release_lease(lease_key, _):
+        return await leases.release_lease(lease_key, owner)
+
+    warmer.analysis_repo.get_trending_job_ids = trending
+    warmer.lease_repo.acquire_lease = acquire_lease
+    warmer.lease_repo.release_lease = release_lease
+    return warmer
+
+
+@pytest.mark.asyncio
+async def test_scheduled_job_is_warmed_once():
+    service = FakeAnalysisService()
+    warmer = JobAnalysisWarmer(service, concurrency=2)
+    job_id = uuid4()
+
+    warmer.schedule(job_id)
+    warmer.schedule(job_id)
+    await asyncio.gather(*warmer._scheduled)
+
+    assert service.warmed == [job_id]
+    assert warmer.get_metrics()["pending_jobs"] == 0
+
+
+@pytest.mark.asyncio
+async def test_trending_jobs_respect_the_concurrency_budget():
+    service = FakeAnalysisService()
+    job_ids = [uuid4() for _ in range(5)]
+    warmer = _trending_warmer(service, job_ids, FakeLeaseRepository(), concurrency=2, top_n=5)
+
+    assert await warmer.warm_trending_jobs() == 5
+    assert service.max_running == 2
+    assert sorted(service.warmed) == sorted(job_ids)
+
+
+@pytest.mark.asyncio
+async def test_each_trending_job_is_warmed_by_one_process_per_cycle():
+    leases = FakeLeaseRepository()
+    job_ids = [uuid4() for _ in range(4)]
+    services = [FakeAnalysisService(), FakeAnalysisService()]
+    warmers = [
+        _trending_warmer(service, job_ids, leases, owner=f"worker-{index}")
+        for index, service in enumerate(services)
+    ]
+
+    warmed = await asyncio.gather(*(warmer.warm_trending_jobs() for warmer in warmers))
+
+    assert sum(warmed) == 4
+    assert sorted(services[0].warmed + services[1].warmed) == sorted(job_ids)
+
+
+@pytest.mark.asyncio
+async def test_failed_trending_job_releases_its_lease():
+    leases = FakeLeaseRepository()
+    warmer = _trending_warmer(FakeAnalysisService(fail=True), [uuid4()], leases)
+
+    assert await warmer.warm_trending_jobs() == 0
+    assert leases.owners == {}
+
+
+@pytest.mark.asyncio
+async def test_warm_failures_are_contained():
+    warmer = JobAnalysisWarmer(FakeAnalysisService(fail=True))
+
+    assert await warmer.warm_job(uuid4()) is False
+    assert warmer.get_metrics()["pending_jobs"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_scheduled_work():
+    service = FakeAnalysisService(delay=10)
+    warmer = JobAnalysisWarmer(service)
+    warmer.schedule(uuid4())
+    await asyncio.sleep(0)
+
+    await warmer.stop()
+
+    assert service.running == 0
+    assert service.warmed == []
@@ -0,0 +1,58 @@
+"""
+Testes do backend de LLM local
+"""
+import json
+
+import pytest
+
+from services.llm_backends import FakeLLMBackend, FakeLLMError, LATENCY_PROFILES
+
+MESSAGES = [{"role": "user", "content": "Analise o currículo: Python, SQL, Docker"}]
+
+
+def _backend(**options) -> FakeLLMBackend:
+    return FakeLLMBackend(latency_profile=LATENCY_PROFILES["instant"], **options)
+
+
+async def _complete(backend: FakeLLMBackend, operation: str = "resume_analysis"):
+    return await backend.complete(MESSAGES, "gpt-4o-mini", 4000, 0.2, 1.0, operation=operation)
+
+
+@pytest.mark.asyncio
+async def test_responses_are_valid_json_and_deterministic():
+    first = await _complete(_backend(seed=1))
+    second = await _complete(_backend(seed=1))
+
+    assert isinstance(json.loads(first.content), dict)
+    assert first.content == second.content
+    assert first.total_tokens == first.prompt_tokens + first.completion_tokens
+
+
+@pytest.mark.asyncio
+async def test_usage_is_recorded_per_operation():
+    backend = _backend()
+    await _complete(backend, "resume_analysis")
+    await _complete(backend, "job_analysis")
+
+    assert set(backend.usage) == {"resume_analysis", "job_analysis"}
+
+
+@pytest.mark.asyncio
+async def test_injected_rate_limits_carry_retry_after():
+    backend = _backend(rate_limit_rate=1.0, retry_after_seconds=2.0)
+
+    with pytest.raises(FakeLLMError) as error:
+        await _complete(backend)
+
+    assert error.value.http_status == 429
+    assert error.value.headers == {"retry-after": "2.0"}
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_the_complete_response():
+    backend = _backend(seed=3)
+    chunks = [
+        chunk async for chunk in backend.stream(MESSAGES, "gpt-4o-mini", 4000, 0.7, 1.0, "cover_letter_stream")
+    ]
+
+    assert "".join(chunks)
@@ -0,0 +1,117 @@
+"""
+Testes do governador de chamadas ao LLM
+"""
+import asyncio
+
+import pytest
+
+from services.llm_governor import (
+    LLMGovernor, TokenBucket, PRIORITY_BULK, PRIORITY_INTERACTIVE, current_priority, use_priority
+)
+
+
+def _governor(**overrides) -> LLMGovernor:
+    options = dict(
+        requests_per_minute=6000, tokens_per_minute=6_000_000, min_concurrency=1,
+        max_concurrency=8, initial_concurrency=2, latency_target=1.0, interactive_weight=2
+    )
+    options.update(overrides)
+    return LLMGovernor(**options)
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(per_minute=60)
+    bucket.consume(60)
+
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_use_priority_is_scoped():
+    assert current_priority() == PRIORITY_INTERACTIVE
+    with use_priority(PRIORITY_BULK):
+        assert current_priority() == PRIORITY_BULK
+    assert current_priority() == PRIORITY_INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_blocks_until_release():
+    governor = _governor(initial_concurrency=1)
+    first = await governor.acquire(10)
+
+    waiter = asyncio.create_task(governor.acquire(10))
+    await asyncio.sleep(0.02)
+    assert not waiter.done()
+
+    await governor.release(first, latency=0.1)
+    second = await asyncio.wait_for(waiter, timeout=1)
+    assert governor.in_flight == 1
+    await governor.release(second, latency=0.1)
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_go_first_but_bulk_is_not_starved():
+    governor = _governor(initial_concurrency=1, interactive_weight=2)
+    holder = await governor.acquire(1)
+
+    order = []
+
+    async def call(name, priority):
+        ticket = await governor.acquire(1, priority)
+        order.append(name)
+        await governor.release(ticket, latency=0.1)
+
+    tasks = [asyncio.create_task(call("bulk", PRIORITY_BULK))]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(call(f"i{n}", PRIORITY_INTERACTIVE)) for n in range(3)]
+    await asyncio.sleep(0.02)
+
+    await governor.release(holder, latency=0.1)
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+
+    # O holder já conta como interativo: bulk entra após mais uma interativa
+    assert order == ["i0", "bulk", "i1", "i2"]
+
+
+@pytest.mark.asyncio
+async def test_aimd_adjusts_concurrency_limit():
+    governor = _governor(initial_concurrency=4)
+
+    ticket = await governor.acquire(1)
+    await governor.release(ticket, rate_limited=True)
+    assert governor.concurrency_limit == 2
+
+    ticket = await governor.acquire(1)
+    await governor.release(ticket, latency=0.1)
+    assert governor.concurrency_limit == 2.5
+
+    ticket = await governor.acquire(1)
+    await governor.release(ticket, latency=5.0)
+    assert governor.concurrency_limit == pytest.approx(2.25)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_new_calls():
+    governor = _governor()
+    ticket = await governor.acquire(1)
+    await governor.release(ticket, rate_limited=True, retry_after=0.1)
+
+    started = asyncio.get_running_loop().time()
+    ticket = await governor.acquire(1)
+    await governor.release(ticket, latency=0.1)
+
+    assert asyncio.get_running_loop().time() - started >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    governor = _governor(initial_concurrency=1)
+    holder = await governor.acquire(1)
+
+    waiter = asyncio.create_task(governor.acquire(1))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert governor.get_metrics()["queue_depth"][PRIORITY_INTERACTIVE] == 0
+    await governor.release(holder, latency=0.1)
@@ -0,0 +1,130 @@
+"""
+Testes do circuit breaker e do hedging das chamadas ao LLM
+"""
+import asyncio
+
+import pytest
+
+from core.config import ai_settings
+from services import llm_governor, llm_resilience
+from services.ai_service import AIService
+from services.llm_backends import LLMResponse
+from services.llm_resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN
+)
+from services.model_router import get_model_route
+
+MESSAGES = [{"role": "user", "content": "{}"}]
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, open_seconds=60)
+
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.record_failure()
+
+    assert breaker.state == CIRCUIT_OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert 0 < error.value.retry_after <= 60
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, open_seconds=60)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=0, half_open_probes=1)
+    breaker.record_failure()
+
+    assert breaker.before_call() is True
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success(probe=True)
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=0)
+    breaker.record_failure()
+
+    probe = breaker.before_call()
+    breaker.record_failure(probe)
+
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_latency_percentile_needs_min_samples():
+    tracker = LatencyTracker(window=10, min_samples=3)
+    tracker.observe("job_analysis", 1.0)
+    tracker.observe("job_analysis", 2.0)
+
+    assert tracker.percentile("job_analysis", 0.95) is None
+
+    tracker.observe("job_analysis", 3.0)
+    assert tracker.percentile("job_analysis", 0.95) == 3.0
+
+
+class SlowFirstBackend:
+    """Backend cuja primeira chamada fica presa; as seguintes respondem na hora"""
+
+    name = "slow-first"
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = False
+
+    async def complete(self, messages, model, max_tokens, temperature, top_p, operation=None):
+        self.calls += 1
+        if self.calls == 1:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return LLMResponse(content="{}", model=model, prompt_tokens=1, completion_tokens=1, total_tokens=2)
+
+
+@pytest.fixture
+def resilience(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "_circuit_breaker", CircuitBreaker())
+    monkeypatch.setattr(llm_resilience, "_latency_tracker", LatencyTracker(window=10, min_samples=1))
+    monkeypatch.setattr(llm_governor, "_llm_governor", llm_governor.LLMGovernor(
+        requests_per_minute=6000, tokens_per_minute=6_000_000, min_concurrency=1,
+        max_concurrency=8, initial_concurrency=4, latency_target=1.0, interactive_weight=2
+    ))
+    monkeypatch.setattr(ai_settings, "LLM_HEDGING_ENABLED", True)
+    monkeypatch.setattr(ai_settings, "LLM_HEDGE_MIN_DELAY_SECONDS", 0.01)
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_when_the_primary_call_stalls(resilience):
+    llm_resilience.get_latency_tracker().observe("job_analysis", 0.01)
+    service = AIService()
+    service.backend = SlowFirstBackend()
+
+    response = await asyncio.wait_for(
+        service._complete_hedged(MESSAGES, get_model_route("job_analysis"), "job_analysis", 10),
+        timeout=2
+    )
+
+    assert response.content == "{}"
+    assert service.backend.calls == 2
+    assert service.backend.cancelled
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_latency_samples(resilience):
+    service = AIService()
+
+    assert service._hedge_delay("job_analysis") is None
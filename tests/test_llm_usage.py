@@ -0,0 +1,55 @@
+"""
+Testes do registro de uso do LLM
+"""
+import asyncio
+
+import pytest
+
+from services.llm_usage import (
+    estimate_cost, record_cache, record_call, record_parse_failure, record_retry, track_llm_usage
+)
+
+
+def test_estimate_cost_uses_model_prices():
+    assert estimate_cost("gpt-4o", 1_000_000, 1_000_000) == pytest.approx(12.5)
+    assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_summary_accumulates_per_operation():
+    with track_llm_usage() as usage:
+        record_call("job_analysis", "gpt-4o-mini", "success", 0.5, prompt_tokens=100, completion_tokens=50)
+        record_call("job_analysis", "gpt-4o-mini", "timeout", 2.0)
+        record_retry("job_analysis", "invalid_json")
+        record_parse_failure("job_analysis", "gpt-4o-mini")
+        record_cache("resume", "hit")
+
+    summary = usage.to_dict()
+    job = summary["operations"]["job_analysis"]
+
+    assert (summary["calls"], summary["failedCalls"], summary["latencyMs"]) == (2, 1, 2500)
+    assert (job["promptTokens"], job["completionTokens"]) == (100, 50)
+    assert (job["retries"], job["parseFailures"]) == (1, 1)
+    assert job["models"] == {"gpt-4o-mini": 2}
+    assert summary["cache"] == {"resume": "hit"}
+
+
+def test_calls_outside_a_tracked_context_are_not_summarized():
+    with track_llm_usage() as usage:
+        pass
+    record_call("job_analysis", "gpt-4o", "success", 0.1, prompt_tokens=10)
+
+    assert usage.to_dict()["calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_child_tasks_share_the_summary():
+    with track_llm_usage() as usage:
+        await asyncio.gather(*(
+            asyncio.create_task(_call("resume_analysis")) for _ in range(3)
+        ))
+
+    assert usage.to_dict()["operations"]["resume_analysis"]["calls"] == 3
+
+
+async def _call(operation: str) -> None:
+    record_call(operation, "gpt-4o", "success", 0.1)
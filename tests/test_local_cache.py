@@ -0,0 +1,70 @@
+"""
+Testes do cache local (L1)
+"""
+import time
+
+from core.local_cache import LocalCache, estimate_size
+
+
+def _cache(**options) -> LocalCache:
+    settings = dict(max_bytes=1000, ttl_seconds=60, negative_ttl_seconds=60, max_entry_bytes=1000)
+    settings.update(options)
+    return LocalCache("test", **settings)
+
+
+def test_get_and_set():
+    cache = _cache()
+    cache.set("a", {"score": 80})
+
+    assert cache.get("a") == (True, {"score": 80})
+    assert cache.get("b") == (False, None)
+    assert cache.current_bytes == estimate_size({"score": 80})
+
+
+def test_least_recently_used_entries_are_evicted_by_bytes():
+    value = "x" * 300
+    cache = _cache(max_bytes=3 * estimate_size(value))
+    for key in ("a", "b", "c"):
+        cache.set(key, value)
+
+    cache.get("a")
+    cache.set("d", value)
+
+    assert cache.get("b") == (False, None)
+    assert all(cache.get(key)[0] for key in ("a", "c", "d"))
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_oversized_entries_are_not_stored():
+    cache = _cache(max_entry_bytes=10)
+    cache.set("a", "small")
+    cache.set("a", "x" * 100)
+
+    assert cache.get("a") == (False, None)
+
+
+def test_entries_expire():
+    cache = _cache()
+    cache.set("a", 1, ttl_seconds=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("a") == (False, None)
+    assert cache.current_bytes == 0
+
+
+def test_negative_entries():
+    cache = _cache()
+    cache.set_negative("a")
+
+    assert cache.get("a") == (True, None)
+
+    cache.set("a", 1)
+    assert cache.get("a") == (True, 1)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = _cache(max_bytes=0)
+    cache.set("a", 1)
+    cache.set_negative("b")
+
+    assert cache.get_metrics()["entries"] == 0
@@ -0,0 +1,42 @@
+"""
+Testes do roteamento de modelos
+"""
+from core.config import settings, ai_settings
+from services.model_router import ModelRoute, get_model_route
+
+
+def test_fast_route_falls_back_to_default_model_with_full_budget():
+    route = get_model_route("job_analysis")
+    fallback = route.fallback()
+
+    assert route.model == ai_settings.LLM_FAST_MODEL
+    assert fallback.model == settings.OPENAI_MODEL
+    assert fallback.max_tokens == max(route.max_tokens, ai_settings.MAX_TOKENS)
+    assert fallback.fallback() is None
+
+
+def test_long_report_routes_keep_the_global_budget():
+    for operation in ("resume_analysis", "compatibility"):
+        assert get_model_route(operation).max_tokens >= ai_settings.MAX_TOKENS
+
+
+def test_same_model_fallback_raises_the_budget():
+    route = ModelRoute("compatibility", "gpt-4o", max_tokens=1500, temperature=0.3,
+                       fallback_model="gpt-4o", fallback_max_tokens=4000)
+
+    fallback = route.fallback()
+
+    assert (fallback.model, fallback.max_tokens) == ("gpt-4o", 4000)
+
+
+def test_no_fallback_when_nothing_would_change():
+    route = ModelRoute("compatibility", "gpt-4o", max_tokens=4000, temperature=0.3,
+                       fallback_model="gpt-4o", fallback_max_tokens=4000)
+
+    assert route.fallback() is None
+
+
+def test_unknown_operation_uses_global_defaults():
+    route = get_model_route("unknown")
+
+    assert (route.model, route.max_tokens) == (settings.OPENAI_MODEL, ai_settings.MAX_TOKENS)
@@ -0,0 +1,123 @@
+"""
+Testes dos repositórios MongoDB
+"""
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from data.mongo_repository import AIAnalysisCacheRepository, StageAnalysisCacheRepository
+from services.cache_maintenance import CacheMaintenance
+
+
+class FailingCollection:
+    async def update_one(self, *args, **kwargs):
+        raise PyMongoError("write concern timeout")
+
+    async def bulk_write(self, *args, **kwargs):
+        raise PyMongoError("write concern timeout")
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.bulk_writes = []
+
+    async def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(requests)
+
+
+@pytest.mark.asyncio
+async def test_stage_cache_write_failure_is_not_fatal(monkeypatch):
+    repo = StageAnalysisCacheRepository()
+    monkeypatch.setattr(repo, "get_collection", lambda name: FailingCollection())
+
+    assert await repo.cache_stage_analysis("resume", "key-1", {"extractedSkills": []}) is None
+    assert repo.local_cache.get("resume:key-1") == (False, None)
+
+
+@pytest.fixture
+def analysis_cache(monkeypatch):
+    monkeypatch.setattr(AIAnalysisCacheRepository, "_pending_hits", {})
+    return AIAnalysisCacheRepository()
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_are_flushed_in_one_bulk_write(analysis_cache, monkeypatch):
+    collection = RecordingCollection()
+    monkeypatch.setattr(analysis_cache, "get_collection", lambda name: collection)
+    for cache_key in ("a", "a", "b"):
+        analysis_cache.record_hit(cache_key)
+
+    assert await analysis_cache.flush_hits() == 2
+
+    [requests] = collection.bulk_writes
+    increments = {request._filter["cacheKey"]: request._doc["$inc"]["hitCount"] for request in requests}
+    assert increments == {"a": 2, "b": 1}
+    assert AIAnalysisCacheRepository.pending_hit_keys() == 0
+    assert await analysis_cache.flush_hits() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_hits(analysis_cache, monkeypatch):
+    monkeypatch.setattr(analysis_cache, "get_collection", lambda name: FailingCollection())
+    analysis_cache.record_hit("a")
+
+    assert await analysis_cache.flush_hits() == 0
+    analysis_cache.record_hit("a")
+
+    assert AIAnalysisCacheRepository._pending_hits["a"]["count"] == 2
+
+
+class CacheEntriesCollection:
+    """Coleção em memória com o necessário para a remoção LRU"""
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    async def estimated_document_count(self):
+        return len(self.entries)
+
+    def find(self, filter, projection):
+        return self
+
+    def sort(self, field, direction):
+        self._ordered = sorted(self.entries, key=lambda entry: entry[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self._ordered = self._ordered[:count]
+        return self
+
+    async def to_list(self, length):
+        return self._ordered[:length]
+
+    async def delete_many(self, filter):
+        ids = set(filter["_id"]["$in"])
+        before = len(self.entries)
+        self.entries = [entry for entry in self.entries if entry["_id"] not in ids]
+        return SimpleNamespace(deleted_count=before - len(self.entries))
+
+
+@pytest.mark.asyncio
+async def test_capacity_evicts_least_recently_used_entries(analysis_cache, monkeypatch):
+    collection = CacheEntriesCollection([
+        {"_id": n, "cacheKey": f"key-{n}", "lastUsedAt": last_used}
+        for n, last_used in enumerate([5, 1, 4, 2, 3])
+    ])
+    monkeypatch.setattr(analysis_cache, "get_collection", lambda name: collection)
+    analysis_cache.local_cache.set("key-1", {"score": 80})
+
+    assert await CacheMaintenance(analysis_cache, max_entries=3).enforce_capacity() == 2
+
+    assert sorted(entry["lastUsedAt"] for entry in collection.entries) == [3, 4, 5]
+    assert analysis_cache.local_cache.get("key-1") == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_capacity_limit_can_be_disabled(analysis_cache, monkeypatch):
+    collection = CacheEntriesCollection([{"_id": 1, "cacheKey": "a", "lastUsedAt": 1}])
+    monkeypatch.setattr(analysis_cache, "get_collection", lambda name: collection)
+
+    assert await CacheMaintenance(analysis_cache, max_entries=0).enforce_capacity() == 0
+    assert await analysis_cache.enforce_capacity(1) == 0
+    assert len(collection.entries) == 1
@@ -0,0 +1,75 @@
+"""
+Testes da codificação de payloads do MongoDB
+"""
+from datetime import datetime
+
+import pytest
+
+from core.config import db_settings
+from data import payload_codec
+from data.payload_codec import (
+    LazyDocument, decode_fields, decode_payload, encode_fields, encode_payload, is_encoded,
+    resolve_codec, validate_codec_settings
+)
+
+PAYLOAD = {
+    "extractedSkills": [{"name": f"Skill {n}", "confidence": 0.9} for n in range(100)],
+    "createdAt": datetime(2024, 1, 2, 3, 4, 5),
+}
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_round_trip(codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+
+    encoded = encode_payload(PAYLOAD, codec)
+
+    assert is_encoded(encoded)
+    assert encoded["_codec"] == codec
+    assert decode_payload(encoded) == PAYLOAD
+
+
+def test_small_payloads_are_stored_as_is():
+    small = {"score": 80}
+
+    assert encode_payload(small, "zlib") is small
+
+
+def test_disabled_codec_is_a_no_op():
+    assert encode_payload(PAYLOAD, "none") is PAYLOAD
+    assert decode_payload(PAYLOAD) is PAYLOAD
+
+
+def test_encode_and_decode_fields():
+    document = {"_id": 1, "analysis": PAYLOAD, "score": 80}
+
+    encoded = encode_fields(document, ["analysis", "missing"], "zlib")
+
+    assert document["analysis"] is PAYLOAD
+    assert is_encoded(encoded["analysis"])
+    assert decode_fields(encoded, ["analysis"]) == document
+
+
+def test_lazy_document_decodes_on_access():
+    document = LazyDocument({"_id": 1, "analysis": encode_payload(PAYLOAD, "zlib")})
+
+    assert is_encoded(dict.__getitem__(document, "analysis"))
+    assert document.get("analysis") == PAYLOAD
+    assert dict.__getitem__(document, "analysis") == PAYLOAD
+    assert {**LazyDocument({"a": encode_payload(PAYLOAD, "zlib")})} == {"a": PAYLOAD}
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_codec("lz4")
+
+
+def test_zstd_without_library_is_rejected(monkeypatch):
+    monkeypatch.setattr(payload_codec, "zstandard", None)
+    monkeypatch.setattr(db_settings, "MONGO_PAYLOAD_COMPRESSION", "zstd")
+
+    with pytest.raises(RuntimeError):
+        validate_codec_settings()
+    with pytest.raises(RuntimeError):
+        decode_payload({"_codec": "zstd", "_data": b"", "_size": 0})
@@ -0,0 +1,69 @@
+"""
+Testes do pré-score de compatibilidade
+"""
+from services.pre_scorer import CompatibilityPreScorer
+
+JOB_ANALYSIS = {
+    "keyRequirements": ["Python", "SQL Server"],
+    "requiredSkills": ["Docker"],
+    "experienceLevel": "Pleno",
+    "education": "Ensino superior completo"
+}
+
+
+def _resume(skills, duration="4 anos", degree="Bacharelado em Sistemas"):
+    return {
+        "extractedSkills": [{"name": name, "confidence": 0.9} for name in skills],
+        "experience": [{"position": "Desenvolvedor", "duration": duration}],
+        "education": [{"degree": degree, "field": ""}]
+    }
+
+
+def test_matching_resume_scores_higher_than_unrelated():
+    scorer = CompatibilityPreScorer()
+
+    strong, weak = scorer.score_many(
+        [_resume(["Python", "SQL Server", "Docker"]), _resume(["Photoshop"])], JOB_ANALYSIS
+    )
+
+    assert strong.match_score > weak.match_score
+    assert strong.missing_requirements == []
+    assert weak.matched_requirements == []
+
+
+def test_score_many_matches_individual_scores():
+    scorer = CompatibilityPreScorer()
+    resumes = [_resume(["Python"]), _resume(["Docker", "SQL Server"], duration="2019 - atual")]
+
+    batch = scorer.score_many(resumes, JOB_ANALYSIS)
+
+    assert [score.match_score for score in batch] == [
+        scorer.score(resume, JOB_ANALYSIS).match_score for resume in resumes
+    ]
+
+
+def test_seniority_below_requirement_is_penalized():
+    scorer = CompatibilityPreScorer()
+
+    junior, pleno = scorer.score_many(
+        [_resume(["Python"], duration="6 meses"), _resume(["Python"], duration="4 anos")], JOB_ANALYSIS
+    )
+
+    assert junior.category_scores["experience"] < pleno.category_scores["experience"]
+
+
+def test_job_without_requirements_gets_neutral_skill_score():
+    score = CompatibilityPreScorer().score(_resume(["Python"]), {})
+
+    assert score.category_scores["skills"] == 50.0
+
+
+def test_zero_confidence_skill_does_not_count_as_matched():
+    scorer = CompatibilityPreScorer()
+    resume = _resume(["Python", "SQL Server", "Docker"])
+    resume["extractedSkills"][0]["confidence"] = 0.0
+
+    score = scorer.score(resume, JOB_ANALYSIS)
+
+    assert "Python" in score.missing_requirements
+    assert score.match_score < scorer.score(_resume(["Python", "SQL Server", "Docker"]), JOB_ANALYSIS).match_score
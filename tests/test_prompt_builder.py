@@ -0,0 +1,67 @@
+"""
+Testes da montagem de prompts
+"""
+import services.prompt_builder as prompt_builder
+from services.prompt_builder import PromptBuilder, compact_json, count_tokens, trim_document
+
+RESUME = "\n".join([
+    "Maria Silva",
+    "EXPERIÊNCIA",
+    *[f"Empresa {n}: desenvolvimento de APIs em Python e SQL Server" for n in range(60)],
+    "FORMAÇÃO",
+    "Bacharelado em Sistemas de Informação",
+    "HOBBIES",
+    *[f"Atividade {n}: corrida, fotografia e culinária" for n in range(60)],
+])
+
+
+def test_compact_json_drops_internal_keys_and_whitespace():
+    assert compact_json({"a": [1, 2], "isFallback": False}) == '{"a":[1,2]}'
+
+
+def test_short_document_is_not_trimmed():
+    text, trimmed = trim_document("Python, SQL", 100)
+
+    assert (text, trimmed) == ("Python, SQL", False)
+
+
+def test_trim_drops_low_priority_sections_first():
+    budget = count_tokens(RESUME) // 2
+
+    text, trimmed = trim_document(RESUME, budget)
+
+    assert trimmed
+    assert count_tokens(text) <= budget
+    assert "FORMAÇÃO" in text
+    assert "HOBBIES" not in text
+
+
+def test_build_respects_budget():
+    prompt = (
+        PromptBuilder("resume_analysis", budget_tokens=300)
+        .add_text("Analise o currículo e responda em JSON.")
+        .add_document("Currículo", RESUME)
+        .build()
+    )
+
+    assert prompt.trimmed
+    assert prompt.total_tokens <= 300 + 10
+    assert set(prompt.token_counts) == {"instructions", "Currículo"}
+
+
+def test_tokenizer_load_failure_falls_back_to_estimate(monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("no network")
+
+    monkeypatch.setattr(prompt_builder, "_encoder", None)
+    monkeypatch.setattr(prompt_builder, "_encoder_loaded", False)
+    if prompt_builder.tiktoken is not None:
+        monkeypatch.setattr(prompt_builder.tiktoken, "encoding_for_model", fail)
+        monkeypatch.setattr(prompt_builder.tiktoken, "get_encoding", fail)
+
+    assert count_tokens("a" * 40) == 11
+
+    # Sem nova tentativa de carga a cada chamada
+    monkeypatch.setattr(prompt_builder, "_encoder_loaded", True)
+    assert count_tokens("a" * 40) == 11
+
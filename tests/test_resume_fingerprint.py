@@ -0,0 +1,53 @@
+"""
+Testes da impressão digital (SimHash) de currículos
+"""
+import random
+
+from services.resume_fingerprint import ResumeFingerprint, compute_fingerprint
+
+WORDS = (
+    "desenvolvedor python sql server docker kubernetes apis rest microsserviços "
+    "liderança equipe projetos ágeis scrum azure mongodb fastapi testes automatizados "
+    "integração contínua arquitetura performance observabilidade mentoria"
+).split()
+
+
+def _resume(seed: int, length: int = 300) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def test_numbers_and_accents_do_not_change_the_fingerprint():
+    original = "Desenvolvedora Sênior na Empresa X de 2019 a 2023, telefone 11 99999-0000"
+    edited = "desenvolvedora senior na empresa x de 2020 a 2024, telefone 21 98888-1111"
+
+    assert compute_fingerprint(original).value == compute_fingerprint(edited).value
+
+
+def test_small_edit_stays_within_distance_and_shares_a_band():
+    text = _resume(1)
+    edited = text.replace(WORDS[0], "engenheiro", 1)
+
+    original, near = compute_fingerprint(text), compute_fingerprint(edited)
+
+    assert original.distance(near.value) <= 6
+    assert set(original.bands(7)) & set(near.bands(7))
+
+
+def test_unrelated_resumes_are_far_apart():
+    first, second = compute_fingerprint(_resume(1)), compute_fingerprint(_resume(2))
+
+    assert first.distance(second.value) > 6
+
+
+def test_bands_cover_all_bits():
+    fingerprint = ResumeFingerprint(value=(1 << 64) - 1, token_count=100)
+
+    bands = fingerprint.bands(7)
+
+    assert len(bands) == 7
+    assert sum(bin(int(band.split(":")[1], 16)).count("1") for band in bands) == 64
+
+
+def test_empty_text():
+    assert compute_fingerprint("").token_count == 0
@@ -0,0 +1,162 @@
+"""
+Testes do cache compartilhado e do cache em camadas
+"""
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from core.config import cache_settings
+from core.shared_cache import (
+    InMemorySharedCache, SharedCache, TieredCache, decode_value, encode_value
+)
+from services.analysis_service import AnalysisService
+
+
+def test_shared_cache_is_abstract():
+    with pytest.raises(TypeError):
+        SharedCache()
+
+
+def test_values_round_trip_with_dates_and_uuids():
+    value = {"id": uuid4(), "createdAt": datetime(2024, 1, 2, 3, 4, 5), "skills": ["Python"]}
+
+    assert decode_value(encode_value(value)) == value
+
+
+@pytest.mark.asyncio
+async def test_in_memory_get_set_and_invalidate():
+    cache = InMemorySharedCache()
+    await cache.set_many("jobs", {"a": 1, "b": 2})
+    await cache.set("users", "a", 3)
+
+    assert await cache.get_many("jobs", ["a", "b", "c"]) == {"a": 1, "b": 2}
+
+    await cache.invalidate("jobs", "a")
+    assert await cache.get("jobs", "a") is None
+
+    await cache.invalidate_namespace("jobs")
+    assert await cache.get("jobs", "b") is None
+    assert await cache.get("users", "a") == 3
+
+
+@pytest.mark.asyncio
+async def test_in_memory_entries_expire():
+    cache = InMemorySharedCache()
+    await cache.set("jobs", "a", 1, ttl_seconds=0.01)
+
+    await asyncio.sleep(0.02)
+
+    assert await cache.get("jobs", "a") is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_fills_l1_from_the_shared_tier():
+    shared = InMemorySharedCache()
+    cache = TieredCache(f"test-{uuid4()}", shared=shared)
+    await shared.set(cache.namespace, "a", {"score": 80})
+
+    assert await cache.get_many(["a", "b"]) == {"a": {"score": 80}}
+
+    # Removido só do compartilhado: o L1 do processo continua servindo
+    await shared.invalidate(cache.namespace, "a")
+    assert await cache.get("a") == {"score": 80}
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_invalidate_clears_both_tiers():
+    shared = InMemorySharedCache()
+    cache = TieredCache(f"test-{uuid4()}", shared=shared)
+    await cache.set("a", 1)
+
+    await cache.invalidate("a")
+
+    assert await cache.get("a") is None
+    assert await shared.get(cache.namespace, "a") is None
+
+
+@pytest.fixture
+def stale_namespace(monkeypatch):
+    """Namespace cujo TTL suave vence imediatamente"""
+    namespace = f"test-{uuid4()}"
+    monkeypatch.setitem(cache_settings.NAMESPACE_SOFT_TTL_SECONDS, namespace, 0)
+    return namespace
+
+
+def _counting_loader():
+    calls = []
+
+    async def loader():
+        calls.append(len(calls) + 1)
+        return len(calls)
+
+    return loader, calls
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_serves_fresh_values_without_reloading():
+    cache = TieredCache(f"test-{uuid4()}", shared=InMemorySharedCache())
+    loader, calls = _counting_loader()
+
+    assert await cache.get_or_load("a", loader) == 1
+    assert await cache.get_or_load("a", loader) == 1
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_serves_stale_and_refreshes_once(stale_namespace):
+    cache = TieredCache(stale_namespace, shared=InMemorySharedCache())
+    loader, calls = _counting_loader()
+    await cache.get_or_load("a", loader)
+
+    # Vários leitores do valor vencido disparam uma única recarga
+    assert [await cache.get_or_load("a", loader) for _ in range(3)] == [1, 1, 1]
+    await asyncio.gather(*cache._refreshing.values())
+
+    assert calls == [1, 2]
+    assert await cache.get_or_load("a", loader) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_serving_the_stale_value(stale_namespace):
+    cache = TieredCache(stale_namespace, shared=InMemorySharedCache())
+
+    async def failing_loader():
+        raise RuntimeError("database unavailable")
+
+    await cache.get_or_load("a", _counting_loader()[0])
+    assert await cache.get_or_load("a", failing_loader) == 1
+    await asyncio.gather(*cache._refreshing.values())
+
+    assert await cache.get_or_load("a", failing_loader) == 1
+    await asyncio.gather(*cache._refreshing.values())
+
+
+@pytest.mark.asyncio
+async def test_job_content_cache_follows_job_edits(sql_engine):
+    service = AnalysisService()
+    job = {"version": "v1", "Title": "Desenvolvedor Python", "Description": "APIs"}
+    loads = []
+
+    async def execute_scalar(query, params=None):
+        return job["version"]
+
+    async def execute_query(query, params=None):
+        loads.append(params["job_id"])
+        return [{key: value for key, value in job.items() if key != "version"}]
+
+    service.analysis_repo.execute_scalar = execute_scalar
+    service.analysis_repo.execute_query = execute_query
+    job_id = uuid4()
+
+    first = await service._get_job_content(job_id, None)
+    assert await service._get_job_content(job_id, None) == first
+    assert len(loads) == 1
+
+    # Vaga editada: novo hash de conteúdo, nova leitura
+    job.update(version="v2", Description="APIs e microsserviços")
+    edited = await service._get_job_content(job_id, None)
+
+    assert "microsserviços" in edited
+    assert len(loads) == 2
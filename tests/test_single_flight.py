@@ -0,0 +1,175 @@
+"""
+Testes de coalescência de análises (single-flight e lease entre workers)
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.config import ai_settings
+from services.analysis_service import AnalysisService
+from services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"score": 80}
+
+    results = await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+
+    assert calls == 1
+    assert results == [{"score": 80}] * 5
+    assert flights.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flights = SingleFlight()
+    calls = 0
+
+    async def fail():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("llm down")
+
+    results = await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    with pytest.raises(RuntimeError):
+        await flights.do("key", fail)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_leader_cancellation_does_not_cancel_followers():
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"score": 80}
+
+    leader = asyncio.create_task(flights.do("key", compute))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flights.do("key", compute)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    results = await asyncio.gather(*followers)
+
+    assert leader.cancelled()
+    assert results == [{"score": 80}] * 3
+    # Um seguidor assume a chave; os demais aguardam a nova execução
+    assert calls == 2
+    assert flights.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_follower_cancellation_is_propagated():
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flights.do("key", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("key", compute))
+    await asyncio.sleep(0.01)
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    assert await leader == "done"
+
+
+class FakeLeaseRepository:
+    """Leases em memória (uma chave, um owner)"""
+
+    def __init__(self):
+        self.owners = {}
+        self.released = []
+
+    async def acquire_lease(self, lease_key, owner, ttl_seconds):
+        if self.owners.get(lease_key, owner) != owner:
+            return False
+        self.owners[lease_key] = owner
+        return True
+
+    async def release_lease(self, lease_key, owner):
+        if self.owners.get(lease_key) == owner:
+            del self.owners[lease_key]
+            self.released.append(lease_key)
+        return True
+
+
+class FakeAnalysisCacheRepository:
+    def __init__(self):
+        self.entries = {}
+
+    async def get_cached_analysis(self, cache_key, use_local=True):
+        return self.entries.get(cache_key)
+
+    @staticmethod
+    def is_stale(entry):
+        return False
+
+
+@pytest.fixture
+def lease_service(sql_engine, monkeypatch):
+    monkeypatch.setattr(ai_settings, "ANALYSIS_LEASE_ENABLED", True)
+    monkeypatch.setattr(ai_settings, "ANALYSIS_LEASE_POLL_SECONDS", 0.01)
+
+    service = AnalysisService()
+    service.lease_repo = FakeLeaseRepository()
+    service.cache_repo = FakeAnalysisCacheRepository()
+    service.computed = 0
+
+    async def analyze_and_cache(cache_key, *args):
+        service.computed += 1
+        result = {"matchScore": 75}
+        service.cache_repo.entries[cache_key] = {
+            "result": result, "expiresAt": datetime.utcnow() + timedelta(hours=1)
+        }
+        return result
+
+    service._analyze_and_cache = analyze_and_cache
+    return service
+
+
+@pytest.mark.asyncio
+async def test_lease_holder_computes_and_releases(lease_service):
+    result = await lease_service._compute_analysis("key", "resume", "job")
+
+    assert result == {"matchScore": 75}
+    assert lease_service.computed == 1
+    assert lease_service.lease_repo.released == ["key"]
+
+
+@pytest.mark.asyncio
+async def test_waiter_reuses_result_from_lease_holder(lease_service):
+    # Outro worker detém o lease e grava o resultado pouco depois
+    lease_service.lease_repo.owners["key"] = "other-worker"
+
+    async def other_worker_finishes():
+        await asyncio.sleep(0.05)
+        lease_service.cache_repo.entries["key"] = {"result": {"matchScore": 90}}
+        del lease_service.lease_repo.owners["key"]
+
+    finisher = asyncio.create_task(other_worker_finishes())
+    result = await lease_service._compute_analysis("key", "resume", "job")
+    await finisher
+
+    assert result == {"matchScore": 90}
+    assert lease_service.computed == 0
@@ -0,0 +1,100 @@
+"""
+Testes do extrator local de habilidades
+"""
+from uuid import uuid4
+
+import pytest
+
+from core.config import ai_settings
+from data.sql_repository import SkillRepository
+from domain.entities.domain import Skill
+from services import skill_extractor
+from services.skill_extractor import SkillExtractor
+
+
+def _extractor(*names: str) -> SkillExtractor:
+    return SkillExtractor([Skill(skill_id=uuid4(), name=name, category="Tech") for name in names])
+
+
+def test_extracts_catalog_skills_with_accents_and_case():
+    extractor = _extractor("Python", "Gestão de Projetos")
+
+    result = extractor.extract("Experiência com PYTHON e gestao de projetos ágeis.")
+
+    assert {match.name for match in result.matches} == {"Python", "Gestão de Projetos"}
+
+
+def test_aliases_and_derived_variants_map_to_canonical_skill():
+    extractor = _extractor("Kubernetes", "Node.js")
+
+    result = extractor.extract("Deploy em k8s com nodejs")
+
+    assert {match.name for match in result.matches} == {"Kubernetes", "Node.js"}
+
+
+def test_matches_respect_word_boundaries():
+    extractor = _extractor("Go", "Java")
+
+    result = extractor.extract("Good knowledge of JavaScript")
+
+    assert result.matches == []
+
+
+def test_spans_point_to_the_original_text():
+    extractor = _extractor("SQL Server")
+    text = "Banco:  SQL   Server"
+
+    match = extractor.extract(text).matches[0]
+
+    start, end = match.spans[0]
+    assert text[start:end] == "SQL   Server"
+
+
+def test_canonical_name_wins_over_alias_of_earlier_skill():
+    extractor = _extractor("Metodologias Ágeis", "Scrum")
+
+    result = extractor.extract("Experiência com Scrum")
+
+    assert [match.name for match in result.matches] == ["Scrum"]
+    assert result.matches[0].confidence >= 0.9
+
+
+def test_short_derived_variants_are_not_generated():
+    extractor = _extractor(".NET")
+
+    assert extractor.extract("Net salary after taxes").matches == []
+    assert [match.name for match in extractor.extract("Experiência com .NET").matches] == [".NET"]
+
+
+def test_lowercase_short_terms_need_a_skills_context():
+    extractor = _extractor("Go")
+
+    assert extractor.extract("I go to work by bus").matches == []
+    assert [match.name for match in extractor.extract("Habilidades: python, go, docker").matches] == ["Go"]
+
+
+@pytest.mark.asyncio
+async def test_extractor_is_rebuilt_when_catalog_version_changes(sql_engine, monkeypatch):
+    catalog = {"version": "1:a", "skills": [Skill(skill_id=uuid4(), name="Python", category="Tech")]}
+
+    async def get_catalog_version(self):
+        return catalog["version"]
+
+    async def get_active_skills(self):
+        return catalog["skills"]
+
+    monkeypatch.setattr(SkillRepository, "get_catalog_version", get_catalog_version)
+    monkeypatch.setattr(SkillRepository, "get_active_skills", get_active_skills)
+    monkeypatch.setattr(ai_settings, "SKILL_CATALOG_REFRESH_SECONDS", 0)
+    monkeypatch.setattr(skill_extractor, "_skill_extractor", None)
+
+    first = await skill_extractor.get_skill_extractor()
+    assert await skill_extractor.get_skill_extractor() is first
+
+    # Habilidade renomeada: mesma contagem, checksum diferente
+    catalog["version"] = "1:b"
+    catalog["skills"] = [Skill(skill_id=uuid4(), name="Python 3", category="Tech")]
+    rebuilt = await skill_extractor.get_skill_extractor()
+
+    assert rebuilt is not first
+    assert [match.name for match in rebuilt.extract("Python 3").matches] == ["Python 3"]
@@ -0,0 +1,109 @@
+"""
+Testes dos repositórios SQL
+"""
+import asyncio
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from core.config import db_settings
+from data import sql_executor
+from data.sql_executor import run_in_sql_pool
+from data.sql_repository import AnalysisRepository
+
+
+@pytest.fixture
+def analyses_table(sql_engine):
+    with sql_engine.begin() as connection:
+        connection.execute(text("""
+        CREATE TABLE CompatibilityAnalyses (
+            AnalysisId TEXT PRIMARY KEY,
+            MatchScore REAL,
+            Status TEXT,
+            ProcessingTimeMs INTEGER,
+            CompletedAt TEXT,
+            MongoAnalysisId TEXT
+        )
+        """))
+    return sql_engine
+
+
+@pytest.mark.asyncio
+async def test_complete_analysis_commits_the_update(analyses_table):
+    analysis_id = uuid4()
+    with analyses_table.begin() as connection:
+        connection.execute(
+            text("INSERT INTO CompatibilityAnalyses (AnalysisId, Status) VALUES (:id, 'processing')"),
+            {"id": str(analysis_id)}
+        )
+
+    assert await AnalysisRepository().complete_analysis(analysis_id, 87.5, 1200, "abc123") is True
+
+    # Nova sessão: só enxerga a alteração se ela foi commitada
+    row = await AnalysisRepository().execute_query(
+        "SELECT Status, MatchScore, MongoAnalysisId FROM CompatibilityAnalyses WHERE AnalysisId = :id",
+        {"id": str(analysis_id)}
+    )
+    assert row == [{"Status": "completed", "MatchScore": 87.5, "MongoAnalysisId": "abc123"}]
+
+
+@pytest.mark.asyncio
+async def test_complete_analysis_unknown_id(analyses_table):
+    assert await AnalysisRepository().complete_analysis(uuid4(), 50.0, 10, None) is False
+
+
+@pytest.fixture
+def sql_pool(monkeypatch):
+    """Pool SQL próprio do teste, com duas threads"""
+    monkeypatch.setattr(db_settings, "SQL_THREAD_POOL_SIZE", 2)
+    monkeypatch.setattr(sql_executor, "_executor", None)
+    yield
+    sql_executor.shutdown_sql_executor()
+
+
+@pytest.mark.asyncio
+async def test_sql_pool_keeps_the_event_loop_free(sql_pool):
+    loop_thread = threading.get_ident()
+    ticks = 0
+
+    def blocking_query():
+        time.sleep(0.1)
+        return threading.get_ident()
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    try:
+        thread = await run_in_sql_pool(blocking_query)
+    finally:
+        task.cancel()
+
+    assert thread != loop_thread
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_sql_pool_is_bounded(sql_pool):
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def query():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    await asyncio.gather(*(run_in_sql_pool(query) for _ in range(6)))
+
+    assert max_running == 2
@@ -0,0 +1,83 @@
+"""
+Testes do executor de estágios
+"""
+import asyncio
+
+import pytest
+
+from services.stage_executor import Stage, StageGraphExecutor, StageTimeoutError
+
+
+def _value(value, delay: float = 0.0):
+    async def stage(inputs):
+        await asyncio.sleep(delay)
+        return value
+    return stage
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently():
+    executor = StageGraphExecutor([
+        Stage("resume", _value("r", delay=0.1)),
+        Stage("job", _value("j", delay=0.1)),
+    ])
+
+    started = asyncio.get_running_loop().time()
+    results, timings = await executor.run()
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert results == {"resume": "r", "job": "j"}
+    assert set(timings) == {"resume", "job"}
+    assert elapsed < 0.19
+
+
+@pytest.mark.asyncio
+async def test_dependent_stage_receives_dependency_results():
+    async def compatibility(inputs):
+        return inputs["resume"] + inputs["job"]
+
+    executor = StageGraphExecutor([
+        Stage("compatibility", compatibility, depends_on=["resume", "job"]),
+        Stage("resume", _value("r")),
+        Stage("job", _value("j")),
+    ])
+
+    results, _ = await executor.run()
+
+    assert results["compatibility"] == "rj"
+
+
+@pytest.mark.asyncio
+async def test_stage_timeout_cancels_the_graph():
+    cancelled = asyncio.Event()
+
+    async def slow(inputs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    executor = StageGraphExecutor([
+        Stage("resume", _value("r", delay=1), timeout=0.05),
+        Stage("job", slow),
+    ])
+
+    with pytest.raises(StageTimeoutError) as error:
+        await executor.run()
+
+    assert error.value.stage_name == "resume"
+    assert cancelled.is_set()
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown stage"):
+        StageGraphExecutor([Stage("compatibility", _value(1), depends_on=["resume"])])
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError, match="Cycle"):
+        StageGraphExecutor([
+            Stage("a", _value(1), depends_on=["b"]),
+            Stage("b", _value(2), depends_on=["a"]),
+        ])
@@ -0,0 +1,47 @@
+"""
+Testes da normalização de texto
+"""
+from services.text_normalizer import (
+    canonicalize_job_record, canonicalize_text, content_hash, fold_text, normalize_skill_name
+)
+
+
+def test_whitespace_and_invisible_characters_are_unified():
+    text = "Maria  Silva​\r\nPython\t\tSQL\r\n\n\n\nDocker"
+
+    assert canonicalize_text(text) == "Maria Silva\nPython SQL\n\nDocker"
+
+
+def test_page_numbers_and_repeated_headers_are_removed():
+    text = (
+        "Maria Silva - Currículo\nExperiência\nPágina 1 de 2"
+        "\fMaria Silva - Currículo\nFormação\nPágina 2 de 2"
+    )
+
+    assert canonicalize_text(text) == "Maria Silva - Currículo\nExperiência\n\nFormação"
+
+
+def test_canonicalization_is_idempotent():
+    text = "Currículo\n  Maria  Silva \r\n\n\n\nPython \fpage 2"
+    canonical = canonicalize_text(text)
+
+    assert canonicalize_text(canonical) == canonical
+
+
+def test_equivalent_texts_share_a_content_hash():
+    assert content_hash("Python  SQL\r\n") == content_hash("Python SQL")
+    assert content_hash("Python") != content_hash("Java")
+
+
+def test_job_record_fields_are_ordered_and_empty_fields_omitted():
+    job = {"Title": "Dev", "Description": "APIs  REST", "CompanyName": "ACME", "Benefits": None}
+
+    assert canonicalize_job_record(job) == "Company: ACME\nPosition: Dev\n\nDescription:\nAPIs REST"
+
+
+def test_fold_text_keeps_a_position_map():
+    folded, positions = fold_text("São  Paulo")
+
+    assert folded == "sao paulo"
+    assert positions[folded.index("p")] == 5
+    assert normalize_skill_name("  Programação ") == "programacao"